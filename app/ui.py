@@ -4,15 +4,16 @@ Premium dashboard design with modern styling.
 
 Run with:
     streamlit run app/ui.py
+    streamlit run app/ui.py -- --model model/violence_model_encoder.onnx
 """
 
 import os
 import sys
+import argparse
 import tempfile
 import streamlit as st
 import numpy as np
 from pathlib import Path
-from tensorflow import keras
 import plotly.graph_objects as go
 
 # Add project root to path for imports
@@ -20,6 +21,7 @@ project_root = str(Path(__file__).parent.parent)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+from src.backends import BACKENDS, load_backend
 from src.frames import extract_frames
 from src.model_download import ensure_model_exists, get_model_path
 
@@ -465,12 +467,25 @@ def render_sidebar_info():
 
 
 # ==================== BACKEND FUNCTIONS (UNCHANGED) ====================
-def load_model(model_path: str = "model/violence_model.h5"):
-    """Load model from disk."""
+def parse_args():
+    """Options passed after `--` on the streamlit command line."""
+    parser = argparse.ArgumentParser(description="Violence detection web app")
+    parser.add_argument("--model", type=str, default=get_model_path(),
+                        help="Keras, TFLite or ONNX model (default: model/violence_model.h5)")
+    parser.add_argument("--backend", choices=BACKENDS, default="auto",
+                        help="Inference engine (default: auto, from the model file extension)")
+    parser.add_argument("--fold-time", action="store_true",
+                        help="Run the backbone on all frames of a clip as one batch (same outputs)")
+    return parser.parse_known_args()[0]
+
+
+@st.cache_resource
+def load_model(model_path: str = "model/violence_model.h5", backend: str = "auto", fold: bool = False):
+    """Load model from disk once per server process (traced and warmed up)."""
     if not os.path.isfile(model_path):
         return None
     try:
-        model = keras.models.load_model(model_path)
+        model = load_backend(model_path, backend, batch_sizes=(1,), fold=fold)
         return model
     except Exception as e:
         st.error(f"Error loading model: {e}")
@@ -480,7 +495,8 @@ def load_model(model_path: str = "model/violence_model.h5"):
 def predict_video(video_path: str, model):
     """Predict violence label and confidence for a video."""
     try:
-        frames = extract_frames(video_path, num_frames=30, img_size=224)
+        frames = extract_frames(video_path, num_frames=model.input_shape[0],
+                                img_size=model.input_shape[1], dtype=model.input_dtype)
         
         if frames is None:
             return None, None
@@ -489,7 +505,7 @@ def predict_video(video_path: str, model):
         X = np.expand_dims(frames, axis=0)
         
         # Predict
-        prediction = model.predict(X, verbose=0)
+        prediction = model.predict(X)
         confidence = prediction[0][0]
         
         label = "VIOLENT" if confidence > 0.5 else "NONVIOLENT"
@@ -518,8 +534,8 @@ def main():
     render_sidebar_info()
     
     # Check if model exists
-    model_path = get_model_path()
-    model = load_model(model_path)
+    args = parse_args()
+    model = load_model(args.model, args.backend, args.fold_time)
     
     if model is None:
         st.error("⚠️ Model not found!", icon="🚨")
@@ -2,11 +2,15 @@
 Package initialization file for src module.
 """
 
+from . import backends
+from . import embeddings
 from . import frames
 from . import load_data
 from . import net
 
 __all__ = [
+    'backends',
+    'embeddings',
     'frames',
     'load_data',
     'net',
@@ -0,0 +1,302 @@
+"""
+Inference backends behind one interface.
+
+Every backend scores batches of preprocessed videos:
+
+    backend.input_shape   (num_frames, H, W, 3)
+    backend.input_dtype   "float32" or "uint8"
+    backend.predict(X)    (batch, num_frames, H, W, 3) -> (batch, 1) probabilities
+
+so predict.py and the Streamlit app can run the same code on a Keras model,
+an exported TFLite model (see src/export_tflite.py) or an ONNX model run by
+onnxruntime (see src/export_onnx.py). load_backend() picks the backend from
+the model file's extension; Keras models are served through CompiledBackend.
+"""
+
+import os
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from typing import Optional, Sequence, Tuple
+
+try:
+    # When running as module: python -m src.<module>
+    from src.net import fold_time, load_model, model_input_dtype
+except ImportError:
+    # When running directly
+    from net import fold_time, load_model, model_input_dtype
+
+try:
+    # Standalone LiteRT runtime (the successor of tf.lite.Interpreter)
+    from ai_edge_litert.interpreter import Interpreter
+except ImportError:
+    Interpreter = tf.lite.Interpreter
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+BACKENDS = ("auto", "compiled", "keras", "tflite", "onnx")
+
+# Batch sizes CompiledBackend traces by default
+BATCH_BUCKETS = (1, 2, 4, 8)
+
+# ONNX tensor element types used by exported models
+_ONNX_DTYPES = {"tensor(uint8)": "uint8", "tensor(float)": "float32"}
+
+
+class KerasBackend:
+    """Run a Keras model with model.predict."""
+
+    name = "keras"
+
+    def __init__(self, model):
+        self.model = model
+        self.input_shape = tuple(model.inputs[0].shape[1:])
+        self.input_dtype = model_input_dtype(model)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.model.predict(X, verbose=0)
+
+
+class CompiledBackend:
+    """
+    Run a Keras model through tf.functions traced once per batch-size bucket.
+
+    model.predict builds a data pipeline and may retrace on every call, which
+    dominates latency for the one-to-eight-video batches we serve. Here each
+    bucket gets a concrete function with a fixed input signature, traced (and
+    run once) at construction, so no request ever pays for tracing. A batch is
+    zero-padded up to the smallest bucket that holds it. Batches larger than
+    the largest bucket are run in chunks.
+
+    Args:
+        model: Keras model (e.g. the fold_time model)
+        batch_sizes: Static batch sizes to trace
+        jit_compile: Compile the functions with XLA
+        warm_up: Run every bucket once at construction
+    """
+
+    name = "compiled"
+
+    def __init__(self, model, batch_sizes: Sequence[int] = BATCH_BUCKETS,
+                 jit_compile: bool = False, warm_up: bool = True):
+        self.model = model
+        self.input_shape = tuple(model.inputs[0].shape[1:])
+        self.input_dtype = model_input_dtype(model)
+        self.batch_sizes = tuple(sorted(set(batch_sizes)))
+        if not self.batch_sizes or self.batch_sizes[0] < 1:
+            raise ValueError(f"batch_sizes must be positive, got {batch_sizes}")
+
+        function = tf.function(lambda x: model(x, training=False),
+                               jit_compile=jit_compile, autograph=False)
+        self._functions = {}
+        self._padded = {}
+        for size in self.batch_sizes:
+            spec = tf.TensorSpec((size,) + self.input_shape, self.input_dtype)
+            self._functions[size] = function.get_concrete_function(spec)
+            self._padded[size] = np.zeros((size,) + self.input_shape, dtype=self.input_dtype)
+            if warm_up:
+                self._functions[size](tf.constant(self._padded[size]))
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        outputs = []
+        largest = self.batch_sizes[-1]
+        for start in range(0, len(X), largest):
+            chunk = X[start:start + largest]
+            n = len(chunk)
+            size = next(b for b in self.batch_sizes if b >= n)
+            if size != n:
+                padded = self._padded[size]
+                padded[:n] = chunk
+                padded[n:] = 0
+                chunk = padded
+            outputs.append(self._functions[size](tf.constant(chunk, dtype=self.input_dtype)).numpy()[:n])
+        if not outputs:
+            return np.empty((0, 1), dtype=np.float32)
+        return np.concatenate(outputs)
+
+
+class TFLiteBackend:
+    """
+    Run a model exported by src/export_tflite.py with the TFLite interpreter.
+
+    Accepts either a full-model file (input (1, num_frames, H, W, 3); the LSTM
+    only converts with a static batch, so videos are run one at a time) or
+    the encoder file of a split export, in which case the matching
+    *_head.tflite next to it is loaded too. A split model encodes all frames of a
+    video in one call.
+
+    Args:
+        model_path: .tflite file (full model, or the *_encoder.tflite of a split export)
+        num_threads: Interpreter threads (default: TFLite's choice)
+    """
+
+    name = "tflite"
+
+    def __init__(self, model_path: str, num_threads: Optional[int] = None):
+        first = Interpreter(model_path=model_path, num_threads=num_threads)
+        shape = tuple(first.get_input_details()[0]["shape_signature"])
+
+        if len(shape) == 5:
+            self._model, self._encoder, self._head = first, None, None
+            self.input_shape = shape[1:]
+        elif len(shape) == 4:
+            head_path = split_head_path(model_path)
+            if not os.path.isfile(head_path):
+                raise FileNotFoundError(f"Split TFLite encoder needs its head model: {head_path}")
+            self._model, self._encoder = None, first
+            self._head = Interpreter(model_path=head_path, num_threads=num_threads)
+            num_frames = self._head.get_input_details()[0]["shape_signature"][1]
+            self.input_shape = (num_frames,) + shape[1:]
+        else:
+            raise ValueError(f"Unexpected TFLite input shape {shape} in {model_path}")
+
+        self.input_dtype = np.dtype(first.get_input_details()[0]["dtype"]).name
+        self._encoder_frames = None
+        for interpreter in (self._model, self._head):
+            if interpreter is not None:
+                interpreter.allocate_tensors()
+
+    @staticmethod
+    def _run(interpreter, x: np.ndarray) -> np.ndarray:
+        interpreter.set_tensor(interpreter.get_input_details()[0]["index"], x)
+        interpreter.invoke()
+        return interpreter.get_tensor(interpreter.get_output_details()[0]["index"])
+
+    def _encode(self, frames: np.ndarray) -> np.ndarray:
+        if self._encoder_frames != len(frames):
+            self._encoder.resize_tensor_input(self._encoder.get_input_details()[0]["index"],
+                                              list(frames.shape))
+            self._encoder.allocate_tensors()
+            self._encoder_frames = len(frames)
+        return self._run(self._encoder, frames)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=self.input_dtype)
+        outputs = np.empty((len(X), 1), dtype=np.float32)
+        for i, video in enumerate(X):
+            if self._model is not None:
+                outputs[i] = self._run(self._model, video[np.newaxis])[0]
+            else:
+                embeddings = self._encode(video)
+                outputs[i] = self._run(self._head, embeddings[np.newaxis].astype(np.float32))[0]
+        return outputs
+
+
+class ONNXBackend:
+    """
+    Run a model exported by src/export_onnx.py with onnxruntime's CPU provider.
+
+    Accepts a full-model .onnx file (input (batch, num_frames, H, W, 3)) or
+    the encoder file of a split export, in which case the matching
+    *_head.onnx next to it is loaded too. Both have a dynamic batch
+    dimension, so a whole batch of videos runs in one call per graph.
+
+    Args:
+        model_path: .onnx file (full model, or the *_encoder.onnx of a split export)
+        num_threads: Intra-op threads (default: onnxruntime's choice)
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_path: str, num_threads: Optional[int] = None):
+        if ort is None:
+            raise ImportError("onnxruntime is not installed. Install it with: pip install onnxruntime")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        def session(path):
+            return ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+
+        first = session(model_path)
+        inputs = first.get_inputs()[0]
+        if len(inputs.shape) == 5:
+            self._model, self._encoder, self._head = first, None, None
+            self.input_shape = tuple(inputs.shape[1:])
+        elif len(inputs.shape) == 4:
+            head_path = split_head_path(model_path)
+            if not os.path.isfile(head_path):
+                raise FileNotFoundError(f"Split ONNX encoder needs its head model: {head_path}")
+            self._model, self._encoder = None, first
+            self._head = session(head_path)
+            self.input_shape = (self._head.get_inputs()[0].shape[1],) + tuple(inputs.shape[1:])
+        else:
+            raise ValueError(f"Unexpected ONNX input shape {inputs.shape} in {model_path}")
+
+        if inputs.type not in _ONNX_DTYPES:
+            raise ValueError(f"Unsupported ONNX input type {inputs.type} in {model_path}")
+        self.input_dtype = _ONNX_DTYPES[inputs.type]
+
+    @staticmethod
+    def _run(session, x: np.ndarray) -> np.ndarray:
+        return session.run(None, {session.get_inputs()[0].name: x})[0]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=self.input_dtype)
+        if self._model is not None:
+            return self._run(self._model, X)
+        # Encode the frames of all videos in one call, then regroup per video
+        batch, num_frames = X.shape[:2]
+        embeddings = self._run(self._encoder, X.reshape((batch * num_frames,) + X.shape[2:]))
+        return self._run(self._head, embeddings.reshape(batch, num_frames, -1))
+
+
+def split_head_path(encoder_path: str) -> str:
+    """Path of the head model that belongs to a split export's encoder file."""
+    stem, ext = os.path.splitext(encoder_path)
+    if stem.endswith("_encoder"):
+        stem = stem[:-len("_encoder")]
+    return f"{stem}_head{ext}"
+
+
+def batch_buckets(max_batch_size: int) -> Tuple[int, ...]:
+    """Powers of two below max_batch_size, plus max_batch_size itself."""
+    return tuple(b for b in BATCH_BUCKETS + (16, 32, 64) if b < max_batch_size) + (max_batch_size,)
+
+
+def load_backend(model_path: str, backend: str = "auto", num_threads: Optional[int] = None,
+                 batch_sizes: Sequence[int] = BATCH_BUCKETS, jit_compile: bool = False,
+                 fold: bool = False):
+    """
+    Load a model for inference.
+
+    Args:
+        model_path: Keras model (.h5/.keras), TFLite model (.tflite) or ONNX model (.onnx)
+        backend: One of BACKENDS; "auto" decides from the file extension
+            (Keras files use "compiled")
+        num_threads: Threads for the TFLite and ONNX backends
+        batch_sizes: Batch-size buckets for the compiled backend
+        jit_compile: Compile the compiled backend's functions with XLA
+        fold: Run Keras models through net.fold_time (same weights and outputs;
+            opt-in until src/benchmark.py shows a gain on the serving hardware)
+
+    Returns:
+        CompiledBackend or KerasBackend, TFLiteBackend or ONNXBackend
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}, got '{backend}'")
+    if backend == "auto":
+        extension = os.path.splitext(model_path)[1].lower()
+        backend = {".tflite": "tflite", ".onnx": "onnx"}.get(extension, "compiled")
+
+    if backend == "tflite":
+        return TFLiteBackend(model_path, num_threads=num_threads)
+    if backend == "onnx":
+        return ONNXBackend(model_path, num_threads=num_threads)
+    model = load_model(model_path)
+    if fold:
+        # Run the backbone on all frames of a clip as one batch (same weights and outputs)
+        model = fold_time(model)
+    if backend == "compiled":
+        return CompiledBackend(model, batch_sizes=batch_sizes, jit_compile=jit_compile)
+    return KerasBackend(model)
+
+
+def as_backend(model):
+    """Wrap a Keras model in a KerasBackend; backends are returned unchanged."""
+    return KerasBackend(model) if isinstance(model, keras.Model) else model
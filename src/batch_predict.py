@@ -0,0 +1,236 @@
+"""
+Batch prediction over many videos with a single loaded model.
+
+Accepts directories (searched recursively), glob patterns, manifest files
+(one path per line, or the first column of a CSV) and plain video paths.
+Videos are decoded by a pool of threads while earlier batches are being
+scored (see predict.predict_videos); one result row per video is streamed
+out as JSONL or CSV as soon as its batch finishes.
+
+Usage:
+    python -m src.batch_predict data/violent "clips/**/*.mp4" --output results.jsonl
+    python -m src.batch_predict --manifest nightly.txt --output results.csv --batch-size 16
+    python -m src.batch_predict data --cascade --output results.csv
+"""
+
+import os
+import sys
+import csv
+import glob
+import json
+import time
+import argparse
+from typing import Dict, Iterable, List, Optional, Sequence
+
+try:
+    # When running as module: python -m src.batch_predict
+    from src.backends import batch_buckets, load_backend
+    from src.cascade import CASCADE_FIELDS, DEFAULT_BAND, cascade_summary, load_cascade
+    from src.model_download import get_model_path
+    from src.predict import RESULT_FIELDS, predict_videos
+except ImportError:
+    # When running directly
+    from backends import batch_buckets, load_backend
+    from cascade import CASCADE_FIELDS, DEFAULT_BAND, cascade_summary, load_cascade
+    from model_download import get_model_path
+    from predict import RESULT_FIELDS, predict_videos
+
+# File extensions picked up when scanning directories
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm", ".mpeg", ".mpg", ".wmv", ".flv", ".m4v")
+
+
+def read_manifest(manifest_path: str) -> List[str]:
+    """
+    Read video paths from a manifest file.
+
+    Plain text manifests have one path per line; CSV manifests use the first
+    column (a 'path' header row is skipped). Blank lines and lines starting
+    with '#' are ignored. Relative paths are resolved against the manifest's
+    directory.
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    paths = []
+
+    with open(manifest_path, newline="") as f:
+        rows = csv.reader(f) if manifest_path.lower().endswith(".csv") else ([line] for line in f)
+        for row in rows:
+            if not row:
+                continue
+            entry = row[0].strip()
+            if not entry or entry.startswith("#") or entry.lower() == "path":
+                continue
+            paths.append(entry if os.path.isabs(entry) else os.path.join(base_dir, entry))
+
+    return paths
+
+
+def collect_videos(inputs: Iterable[str], manifests: Iterable[str] = ()) -> List[str]:
+    """
+    Expand directories, globs and manifests into a de-duplicated list of video paths.
+
+    Args:
+        inputs: Directories, glob patterns or video file paths
+        manifests: Manifest files listing video paths
+
+    Returns:
+        Video paths in input order, each listed once
+    """
+    paths = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            for root, _, files in os.walk(entry):
+                paths.extend(os.path.join(root, f) for f in sorted(files)
+                             if f.lower().endswith(VIDEO_EXTENSIONS))
+        elif glob.has_magic(entry):
+            paths.extend(p for p in sorted(glob.glob(entry, recursive=True)) if os.path.isfile(p))
+        else:
+            paths.append(entry)
+
+    for manifest in manifests:
+        paths.extend(read_manifest(manifest))
+
+    return list(dict.fromkeys(paths))
+
+
+class ResultWriter:
+    """Stream result rows to a file or stdout as JSONL or CSV."""
+
+    FORMATS = ("jsonl", "csv")
+
+    def __init__(self, output_path: Optional[str] = None, fmt: Optional[str] = None,
+                 fields: Sequence[str] = RESULT_FIELDS):
+        if fmt is None:
+            fmt = "csv" if output_path and output_path.lower().endswith(".csv") else "jsonl"
+        if fmt not in self.FORMATS:
+            raise ValueError(f"format must be one of {self.FORMATS}, got '{fmt}'")
+        self.fmt = fmt
+        self._file = open(output_path, "w", newline="") if output_path else sys.stdout
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(self._file, fieldnames=list(fields))
+            self._csv.writeheader()
+
+    def write(self, row: Dict) -> None:
+        if self._csv is not None:
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(row) + "\n")
+        # Flush per row so partial results survive an interrupted run
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not sys.stdout:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Predict violence for many videos with one loaded model"
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        help="Video files, directories (searched recursively) or glob patterns"
+    )
+    parser.add_argument(
+        "--manifest",
+        action="append",
+        default=[],
+        help="File listing video paths (one per line, or first CSV column); repeatable"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default=get_model_path(),
+        help="Trained model: Keras, .tflite or .onnx (default: model/violence_model.h5)"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Results file (default: stdout)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=ResultWriter.FORMATS,
+        default=None,
+        help="Output format (default: from --output extension, else jsonl)"
+    )
+    parser.add_argument("--batch-size", type=int, default=8, help="Videos per forward pass (default: 8)")
+    parser.add_argument("--workers", type=int, default=None, help="Decode threads (default: CPU count)")
+    parser.add_argument("--queue-depth", type=int, default=16,
+                        help="Decoded videos that may wait for inference; bounds memory (default: 16)")
+    parser.add_argument("--cascade", action="store_true",
+                        help="Screen every video with a cheap model first; run --model only on uncertain ones")
+    parser.add_argument("--screener", type=str, default=None,
+                        help="Screener model for --cascade (default: --model resized, see --screener-frames/size)")
+    parser.add_argument("--screener-frames", type=int, default=None,
+                        help="Frames per video of the resized screener (default: 10)")
+    parser.add_argument("--screener-size", type=int, default=None,
+                        help="Frame size of the resized screener (default: 160)")
+    parser.add_argument("--band", type=float, nargs=2, default=None, metavar=("LOW", "HIGH"),
+                        help="Screener scores escalated to the full model (default: 0.2 0.8)")
+
+    args = parser.parse_args()
+
+    video_paths = collect_videos(args.inputs, args.manifest)
+    if not video_paths:
+        print("ERROR: No videos found.", file=sys.stderr)
+        sys.exit(1)
+
+    for path in (args.model, args.screener):
+        if path and not os.path.isfile(path):
+            print(f"ERROR: Model not found: {path}", file=sys.stderr)
+            sys.exit(1)
+
+    if args.cascade:
+        print(f"Loading cascade (full model {args.model})...", file=sys.stderr)
+        try:
+            cascade = load_cascade(args.model, args.screener, args.screener_frames, args.screener_size,
+                                   band=tuple(args.band or DEFAULT_BAND),
+                                   batch_sizes=batch_buckets(args.batch_size))
+        except ValueError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
+        rows = cascade.predict(video_paths, batch_size=args.batch_size,
+                               num_workers=args.workers, queue_depth=args.queue_depth)
+        fields = CASCADE_FIELDS
+    else:
+        print(f"Loading model from {args.model}...", file=sys.stderr)
+        model = load_backend(args.model, batch_sizes=batch_buckets(args.batch_size))
+        rows = predict_videos(video_paths, model, batch_size=args.batch_size,
+                              num_workers=args.workers, queue_depth=args.queue_depth)
+        fields = RESULT_FIELDS
+
+    print(f"Scoring {len(video_paths)} videos (batch_size={args.batch_size})...", file=sys.stderr)
+    start = time.perf_counter()
+    failed = 0
+    results = []
+    with ResultWriter(args.output, args.format, fields) as writer:
+        for row in rows:
+            failed += row["error"] is not None
+            if args.cascade:
+                results.append(row)
+            writer.write(row)
+
+    elapsed = time.perf_counter() - start
+    print(f"Done: {len(video_paths)} videos in {elapsed:.1f}s "
+          f"({len(video_paths) / elapsed:.2f} videos/s), {failed} failed", file=sys.stderr)
+    if args.cascade:
+        summary = cascade_summary(results, cascade)
+        print(f"Cascade: {summary['screened']} decided by screener, {summary['escalated']} escalated; "
+              f"{summary['cascade_ms']:.1f} vs {summary['model_ms']:.1f} ms per clip "
+              f"({summary['compute_saved']:.1%} compute saved)", file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Benchmark inference variants of the violence detection model on CPU.
+
+Compares the TimeDistributed(ResNet50) model against the FrameBatched variant
+that folds time into the batch dimension, and checks both give the same output.
+With --compiled, compares model.predict against the fixed-signature
+tf.function backend (backends.CompiledBackend), including first-call latency.
+
+Usage:
+    python -m src.benchmark
+    python -m src.benchmark --model model/violence_model.h5 --batch-size 4 --repeats 10
+    python -m src.benchmark --compiled --batch-size 3
+"""
+
+import os
+import time
+import argparse
+import numpy as np
+from typing import Dict
+
+try:
+    # When running as module: python -m src.benchmark
+    from src.backends import CompiledBackend, KerasBackend, batch_buckets
+    from src.net import build_model, fold_time, load_model, model_input_dtype
+except ImportError:
+    # When running directly
+    from backends import CompiledBackend, KerasBackend, batch_buckets
+    from net import build_model, fold_time, load_model, model_input_dtype
+
+
+def random_videos(batch_size: int, num_frames: int, dtype: str, seed: int = 0,
+                  img_size: int = 224) -> np.ndarray:
+    """Random input batch of shape (batch_size, num_frames, img_size, img_size, 3)."""
+    rng = np.random.default_rng(seed)
+    frames = rng.integers(0, 256, size=(batch_size, num_frames, img_size, img_size, 3), dtype=np.uint8)
+    return frames if dtype == "uint8" else frames.astype(np.float32) / 255.0
+
+
+def benchmark_fold_time(model, batch_size: int = 1, repeats: int = 5) -> Dict[str, Dict[str, float]]:
+    """
+    Time TimeDistributed vs FrameBatched inference of the same weights.
+
+    Runs of the two variants are interleaved so that machine load affects
+    both equally.
+
+    Args:
+        model: Full model with the build_model (TimeDistributed) layout
+        batch_size: Videos per forward pass
+        repeats: Timed forward passes per variant
+
+    Returns:
+        Dict keyed by variant name with median/min seconds per batch and
+        videos/sec, plus max_abs_diff of the folded outputs vs the original
+    """
+    folded = fold_time(model)
+    X = random_videos(batch_size, model.inputs[0].shape[1], model_input_dtype(model),
+                      img_size=model.inputs[0].shape[2])
+
+    variants = {'time_distributed': model, 'frame_batched': folded}
+    durations = {name: [] for name in variants}
+    outputs = {}
+
+    for name, variant in variants.items():
+        outputs[name] = variant.predict(X, verbose=0)  # warm-up / graph build
+    for _ in range(repeats):
+        for name, variant in variants.items():
+            start = time.perf_counter()
+            variant.predict(X, verbose=0)
+            durations[name].append(time.perf_counter() - start)
+
+    results = {}
+    for name, times in durations.items():
+        median = float(np.median(times))
+        results[name] = {
+            'median_s': median,
+            'min_s': float(np.min(times)),
+            'videos_per_s': batch_size / median,
+        }
+    results['frame_batched']['speedup'] = (
+        results['time_distributed']['median_s'] / results['frame_batched']['median_s']
+    )
+    results['frame_batched']['max_abs_diff'] = float(
+        np.max(np.abs(outputs['frame_batched'] - outputs['time_distributed']))
+    )
+    return results
+
+
+def benchmark_compiled(model, batch_size: int = 1, repeats: int = 5,
+                       jit_compile: bool = False) -> Dict[str, Dict[str, float]]:
+    """
+    Time model.predict vs CompiledBackend on the same time-folded model.
+
+    The compiled backend traces the batch_buckets(batch_size) buckets and warms
+    them up when it is built (setup_s). first_s is the first call after setup,
+    which is what the first request after a deploy pays.
+
+    Args:
+        model: Full model with the build_model layout
+        batch_size: Videos per call (padded up to a bucket by the compiled backend)
+        repeats: Timed calls per variant after the first one
+        jit_compile: Compile with XLA
+
+    Returns:
+        Dict keyed by variant name with setup_s, first_s, median_s, p95_s and
+        videos_per_s, plus max_abs_diff of the compiled outputs vs predict
+    """
+    folded = fold_time(model)
+    X = random_videos(batch_size, model.inputs[0].shape[1], model_input_dtype(model),
+                      img_size=model.inputs[0].shape[2])
+
+    builders = {
+        'predict': lambda: KerasBackend(folded),
+        'compiled': lambda: CompiledBackend(folded, batch_sizes=batch_buckets(batch_size),
+                                            jit_compile=jit_compile),
+    }
+    results = {}
+    outputs = {}
+    for name, build in builders.items():
+        start = time.perf_counter()
+        backend = build()
+        setup = time.perf_counter() - start
+
+        start = time.perf_counter()
+        outputs[name] = backend.predict(X)
+        first = time.perf_counter() - start
+
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            backend.predict(X)
+            times.append(time.perf_counter() - start)
+        median = float(np.median(times))
+        results[name] = {
+            'setup_s': setup,
+            'first_s': first,
+            'median_s': median,
+            'p95_s': float(np.percentile(times, 95)),
+            'videos_per_s': batch_size / median,
+        }
+    results['compiled']['max_abs_diff'] = float(np.max(np.abs(outputs['compiled'] - outputs['predict'])))
+    return results
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark TimeDistributed vs time-folded backbone inference"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default=None,
+        help="Trained model to benchmark (default: freshly built model with random weights)"
+    )
+    parser.add_argument("--batch-size", type=int, default=1, help="Videos per forward pass (default: 1)")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed passes per variant (default: 5)")
+    parser.add_argument("--compiled", action="store_true",
+                        help="Benchmark model.predict vs the compiled tf.function backend instead")
+    parser.add_argument("--jit-compile", action="store_true", help="Use XLA for --compiled")
+
+    args = parser.parse_args()
+
+    if args.model and os.path.isfile(args.model):
+        print(f"Loading model from {args.model}...")
+        model = load_model(args.model)
+    else:
+        # Speed does not depend on weight values, so skip the ImageNet download
+        print("Building model with random weights...")
+        model = build_model(weights=None)
+
+    if args.compiled:
+        results = benchmark_compiled(model, batch_size=args.batch_size, repeats=args.repeats,
+                                     jit_compile=args.jit_compile)
+        print("\n" + "=" * 60)
+        print(f"BENCHMARK (batch_size={args.batch_size}, repeats={args.repeats})")
+        print("=" * 60)
+        for name, r in results.items():
+            print(f"{name:10s} setup {r['setup_s']:6.1f} s   first {r['first_s'] * 1000:8.1f} ms   "
+                  f"median {r['median_s'] * 1000:8.1f} ms   p95 {r['p95_s'] * 1000:8.1f} ms")
+        print("-" * 60)
+        print(f"Max |output difference|: {results['compiled']['max_abs_diff']:.2e}")
+        print("=" * 60)
+        return
+
+    results = benchmark_fold_time(model, batch_size=args.batch_size, repeats=args.repeats)
+
+    print("\n" + "=" * 60)
+    print(f"BENCHMARK (batch_size={args.batch_size}, repeats={args.repeats})")
+    print("=" * 60)
+    for name, r in results.items():
+        print(f"{name:18s} median {r['median_s'] * 1000:8.1f} ms   "
+              f"min {r['min_s'] * 1000:8.1f} ms   {r['videos_per_s']:6.2f} videos/s")
+    print("-" * 60)
+    print(f"Speedup (frame_batched): {results['frame_batched']['speedup']:.2f}x")
+    print(f"Max |output difference|: {results['frame_batched']['max_abs_diff']:.2e}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Compare per-frame backbones for CPU cost and accuracy.
+
+For every backbone in net.BACKBONES (or those given with --backbones) the
+model is built at --img-size and measured in a fresh process, so one
+backbone's memory never counts towards the next one's peak:
+
+    - frames_per_s / clip_ms: throughput and median latency of one clip through
+      the compiled backend (what predict.py and serve.py run)
+    - params / size_mb: parameter count and size of the saved .keras model
+    - peak_rss_mb: peak resident memory after building and running the model
+    - val_accuracy: with --data-dir, validation accuracy of an LSTM head trained
+      for --epochs on the frozen backbone's cached embeddings (the same training
+      as train.py --cached-embeddings)
+
+Usage:
+    python -m src.benchmark_backbones
+    python -m src.benchmark_backbones --backbones mobilenet_v3_small resnet50 --img-size 160
+    python -m src.benchmark_backbones --data-dir data --epochs 5 --report outputs/backbones.json
+"""
+
+import os
+import json
+import time
+import resource
+import argparse
+import tempfile
+import multiprocessing
+import numpy as np
+from typing import Dict, List, Optional
+
+try:
+    # When running as module: python -m src.benchmark_backbones
+    from src.backends import CompiledBackend
+    from src.benchmark import random_videos
+    from src.embeddings import (CACHE_DIR, backbone_id, get_embedding_dataset_split,
+                                load_embeddings, precompute_embeddings)
+    from src.load_data import split_video_files
+    from src.net import BACKBONES, build_model, build_temporal_head, split_model
+except ImportError:
+    # When running directly
+    from backends import CompiledBackend
+    from benchmark import random_videos
+    from embeddings import (CACHE_DIR, backbone_id, get_embedding_dataset_split,
+                            load_embeddings, precompute_embeddings)
+    from load_data import split_video_files
+    from net import BACKBONES, build_model, build_temporal_head, split_model
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def validation_accuracy(encoder, data_dir: str, num_frames: int, epochs: int,
+                        batch_size: int = 8, cache_dir: str = CACHE_DIR) -> Optional[float]:
+    """
+    Train an LSTM head on a frozen encoder's cached embeddings and score the validation split.
+
+    Returns:
+        Validation accuracy, or None if no validation video could be encoded
+    """
+    backbone = backbone_id(encoder)
+    train_files, val_files = split_video_files(data_dir, validation_split=0.2, num_frames=num_frames)
+    precompute_embeddings(train_files + val_files, encoder, backbone,
+                          num_frames=num_frames, cache_dir=cache_dir)
+
+    feature_dim = encoder.outputs[0].shape[-1]
+    train_dataset, _, train_steps, _, _ = get_embedding_dataset_split(
+        data_dir=data_dir, backbone=backbone, cache_dir=cache_dir, num_frames=num_frames,
+        feature_dim=feature_dim, batch_size=batch_size, epochs=epochs
+    )
+    if train_dataset is None:
+        return None
+
+    head = build_temporal_head(num_frames=num_frames, feature_dim=feature_dim)
+    head.fit(train_dataset, steps_per_epoch=train_steps, epochs=epochs, verbose=0)
+
+    cached = [(load_embeddings(path, backbone, cache_dir, num_frames), label) for path, label in val_files]
+    cached = [(embeddings, label) for embeddings, label in cached if embeddings is not None]
+    if not cached:
+        return None
+    X = np.stack([embeddings for embeddings, _ in cached])
+    y = np.array([label for _, label in cached])
+    predictions = head.predict(X, batch_size=batch_size, verbose=0)[:, 0] > 0.5
+    return float(np.mean(predictions == y))
+
+
+def benchmark_backbone(backbone: str, img_size: int = 224, num_frames: int = 30,
+                       weights: Optional[str] = 'imagenet', repeats: int = 5,
+                       data_dir: Optional[str] = None, epochs: int = 5) -> Dict[str, float]:
+    """
+    Measure one backbone (meant to run in its own process, see main).
+
+    Args:
+        backbone: One of net.BACKBONES
+        img_size: Frame height and width
+        num_frames: Frames per clip
+        weights: Backbone initialization ('imagenet' or None)
+        repeats: Timed clips after warm-up
+        data_dir: Dataset root for val_accuracy (skipped when None)
+        epochs: Head training epochs for val_accuracy
+
+    Returns:
+        Dict with params, size_mb, setup_s, clip_ms, frames_per_s,
+        peak_rss_mb and val_accuracy (None without data_dir)
+    """
+    start = time.perf_counter()
+    model = build_model(num_frames=num_frames, input_dtype="uint8", weights=weights,
+                        backbone=backbone, img_size=img_size)
+    compiled = CompiledBackend(model, batch_sizes=(1,))
+    setup = time.perf_counter() - start
+
+    X = random_videos(1, num_frames, "uint8", img_size=img_size)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        compiled.predict(X)
+        times.append(time.perf_counter() - start)
+    median = float(np.median(times))
+    rss = peak_rss_mb()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.keras")
+        model.save(path)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+
+    accuracy = None
+    if data_dir:
+        encoder, _ = split_model(model)
+        accuracy = validation_accuracy(encoder, data_dir, num_frames, epochs)
+
+    return {
+        'backbone': backbone,
+        'img_size': img_size,
+        'params': int(model.count_params()),
+        'size_mb': size_mb,
+        'setup_s': setup,
+        'clip_ms': median * 1000,
+        'frames_per_s': num_frames / median,
+        'peak_rss_mb': rss,
+        'val_accuracy': accuracy,
+    }
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Compare backbone speed, size, memory and accuracy on CPU"
+    )
+    parser.add_argument("--backbones", nargs="+", choices=tuple(BACKBONES), default=list(BACKBONES),
+                        help="Backbones to compare (default: all)")
+    parser.add_argument("--img-size", type=int, default=224, help="Frame resolution (default: 224)")
+    parser.add_argument("--num-frames", type=int, default=30, help="Frames per clip (default: 30)")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed clips per backbone (default: 5)")
+    parser.add_argument("--weights", choices=("imagenet", "none"), default="imagenet",
+                        help="Backbone weights; 'none' skips the download (speed only) (default: imagenet)")
+    parser.add_argument("--data-dir", type=str, default=None,
+                        help="Dataset root; trains a head per backbone to report validation accuracy")
+    parser.add_argument("--epochs", type=int, default=5, help="Head training epochs (default: 5)")
+    parser.add_argument("--report", type=str, default=None, help="Write the results as JSON")
+
+    args = parser.parse_args()
+
+    weights = None if args.weights == "none" else args.weights
+    data_dir = args.data_dir if args.data_dir and os.path.isdir(args.data_dir) else None
+    if args.data_dir and data_dir is None:
+        print(f"WARNING: Data directory not found: {args.data_dir}; skipping validation accuracy")
+
+    # A fresh process per backbone, so peak RSS is that backbone's alone
+    context = multiprocessing.get_context("spawn")
+    results: List[Dict] = []
+    for backbone in args.backbones:
+        print(f"Benchmarking {backbone} at {args.img_size}x{args.img_size}...")
+        with context.Pool(processes=1) as pool:
+            results.append(pool.apply(benchmark_backbone, (backbone,), {
+                'img_size': args.img_size, 'num_frames': args.num_frames, 'weights': weights,
+                'repeats': args.repeats, 'data_dir': data_dir, 'epochs': args.epochs,
+            }))
+
+    print("\n" + "=" * 88)
+    print(f"BACKBONES ({args.img_size}x{args.img_size}, {args.num_frames} frames per clip)")
+    print("=" * 88)
+    print(f"{'backbone':20s} {'params':>10s} {'size MB':>8s} {'clip ms':>9s} {'frames/s':>9s} "
+          f"{'peak RSS MB':>12s} {'val acc':>8s}")
+    for r in results:
+        accuracy = "n/a" if r['val_accuracy'] is None else f"{r['val_accuracy']:.4f}"
+        print(f"{r['backbone']:20s} {r['params']:10,d} {r['size_mb']:8.1f} {r['clip_ms']:9.1f} "
+              f"{r['frames_per_s']:9.1f} {r['peak_rss_mb']:12.0f} {accuracy:>8s}")
+    print("=" * 88)
+
+    if args.report:
+        os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+        with open(args.report, "w") as f:
+            json.dump({'img_size': args.img_size, 'num_frames': args.num_frames,
+                       'weights': args.weights, 'results': results}, f, indent=2)
+        print(f"Report saved to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Helpers shared by the on-disk caches (split manifest, dataset index,
+embeddings, teacher scores, frame store).
+
+Every cache entry is tied to the video file as it exists on disk, via its size
+and modification time, and every cache file is replaced atomically.
+"""
+
+import os
+import json
+from contextlib import contextmanager
+from typing import Any, Optional, Tuple
+
+
+def file_stamp(path: str) -> Tuple[int, int]:
+    """(size, mtime_ns) of a file; changes whenever the file is rewritten."""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def file_key(path: str) -> str:
+    """Key identifying a file's current contents: 'abspath|size|mtime_ns'."""
+    size, mtime_ns = file_stamp(path)
+    return f"{os.path.abspath(path)}|{size}|{mtime_ns}"
+
+
+@contextmanager
+def atomic_open(path: str, mode: str = "w"):
+    """
+    Open a temporary file next to `path` and move it over `path` on success.
+
+    An interrupted or failed write never leaves a truncated file at `path`;
+    the temporary file is removed instead. Parent directories are created.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, mode) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_json(path: str, data: Any, indent: Optional[int] = None) -> None:
+    """Write `data` as JSON to `path` atomically (see atomic_open)."""
+    with atomic_open(path) as f:
+        json.dump(data, f, indent=indent)
@@ -0,0 +1,324 @@
+"""
+Two-stage cascade inference: a cheap screener on every clip, the full model
+only where the screener is unsure.
+
+Most clips are clearly non-violent (or clearly violent), and a cheap model
+scores them far from the threshold. The cascade runs the screener on every
+clip. It accepts the screener's score when it falls outside the
+uncertainty band [low, high], and escalates the clips inside the band to
+the full model. The screener can be a separate small model (e.g. a
+distilled student, see train.py --distill) or the full model itself
+rebuilt for fewer frames and a lower resolution (net.resize_model).
+
+Both stages run through predict.predict_videos, so decoding and inference
+overlap in each stage. Every result records the stage that decided it and
+the compute it saved. Compute is measured as the per-clip inference time
+of each model, taken once at construction: a screened clip costs
+screener_ms, an escalated one screener_ms + model_ms, and a full-model-only
+run costs model_ms for every clip.
+
+Usage:
+    python -m src.predict --video a.mp4 b.mp4 c.mp4 --cascade --screener-frames 10 --screener-size 160
+    python -m src.predict --video a.mp4 b.mp4 --cascade --screener model/violence_model_student_mobilenet_v3_small.keras
+    python -m src.batch_predict data --cascade --band 0.1 0.9 --output results.csv
+    python -m src.cascade --data-dir data          # pick a band on the validation split
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    # When running as module
+    from src.backends import BATCH_BUCKETS, CompiledBackend, as_backend, load_backend
+    from src.load_data import split_video_files
+    from src.model_download import get_model_path
+    from src.net import load_model, resize_model
+    from src.predict import THRESHOLD, predict_videos
+except ImportError:
+    # When running directly
+    from backends import BATCH_BUCKETS, CompiledBackend, as_backend, load_backend
+    from load_data import split_video_files
+    from model_download import get_model_path
+    from net import load_model, resize_model
+    from predict import THRESHOLD, predict_videos
+
+# Screener scores inside [low, high] are escalated to the full model
+DEFAULT_BAND = (0.2, 0.8)
+
+# Frames per clip and frame size of the default screener (the full model
+# resized, roughly 6x cheaper than ResNet50 at 30 x 224 x 224)
+DEFAULT_SCREENER_FRAMES = 10
+DEFAULT_SCREENER_SIZE = 160
+
+# Bands compared by sweep_bands unless others are given
+SWEEP_BANDS = ((0.5, 0.5), (0.4, 0.6), (0.3, 0.7), (0.2, 0.8), (0.1, 0.9), (0.05, 0.95))
+
+# Keys of the result dicts produced by Cascade.predict, in output order
+CASCADE_FIELDS = ["path", "label", "confidence", "stage", "screener_confidence",
+                  "compute_ms", "compute_saved_ms", "error"]
+
+
+def clip_cost_ms(model, repeats: int = 3) -> float:
+    """Median inference time of one clip (batch of 1, after a warm-up call)."""
+    X = np.zeros((1,) + tuple(model.input_shape), dtype=model.input_dtype)
+    model.predict(X)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(X)
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times))
+
+
+class Cascade:
+    """
+    Screener + full model with an uncertainty band.
+
+    Args:
+        screener: Cheap model or backend run on every clip
+        model: Full model or backend run on uncertain clips
+        band: (low, high) screener scores that are escalated, inclusive
+    """
+
+    def __init__(self, screener, model, band: Tuple[float, float] = DEFAULT_BAND):
+        low, high = band
+        if not 0.0 <= low <= high <= 1.0:
+            raise ValueError(f"band must satisfy 0 <= low <= high <= 1, got {band}")
+        self.screener = as_backend(screener)
+        self.model = as_backend(model)
+        self.band = (low, high)
+        self.screener_ms = clip_cost_ms(self.screener)
+        self.model_ms = clip_cost_ms(self.model)
+
+    def uncertain(self, score: float) -> bool:
+        return self.band[0] <= score <= self.band[1]
+
+    def _result(self, screened: Dict, final: Optional[Dict] = None) -> Dict:
+        if final is None:
+            compute = self.screener_ms
+            confidence, label, error = screened["confidence"], screened["label"], screened["error"]
+        else:
+            compute = self.screener_ms + self.model_ms
+            confidence, label, error = final["confidence"], final["label"], final["error"]
+        return {
+            "path": screened["path"], "label": label, "confidence": confidence,
+            "stage": 1 if final is None else 2,
+            "screener_confidence": screened["confidence"],
+            "compute_ms": None if error else round(compute, 1),
+            "compute_saved_ms": None if error else round(self.model_ms - compute, 1),
+            "error": error,
+        }
+
+    def predict(self, video_paths: List[str], batch_size: int = 8, num_workers: Optional[int] = None,
+                queue_depth: int = 16) -> Iterator[Dict]:
+        """
+        Score videos with the cascade.
+
+        Clips decided by the screener are yielded as soon as their screener
+        batch finishes; escalated clips follow once the full model has
+        scored them.
+
+        Args:
+            video_paths: Videos to score
+            batch_size, num_workers, queue_depth: As in predict.predict_videos
+
+        Yields:
+            One result dict per video with the CASCADE_FIELDS keys. Videos the
+            screener cannot decode are reported at stage 1 with an error.
+        """
+        escalated = {}
+        for screened in predict_videos(video_paths, self.screener, batch_size=batch_size,
+                                       num_workers=num_workers, queue_depth=queue_depth):
+            if screened["error"] or not self.uncertain(screened["confidence"]):
+                yield self._result(screened)
+            else:
+                escalated.setdefault(screened["path"], []).append(screened)
+
+        if not escalated:
+            return
+        paths = [path for path, results in escalated.items() for _ in results]
+        for final in predict_videos(paths, self.model, batch_size=batch_size,
+                                    num_workers=num_workers, queue_depth=queue_depth):
+            yield self._result(escalated[final["path"]].pop(), final)
+
+
+def load_cascade(model_path: str, screener_path: Optional[str] = None,
+                 screener_frames: Optional[int] = None, screener_size: Optional[int] = None,
+                 band: Tuple[float, float] = DEFAULT_BAND,
+                 batch_sizes: Sequence[int] = BATCH_BUCKETS) -> Cascade:
+    """
+    Load a cascade from model files.
+
+    Args:
+        model_path: Full model (Keras, .tflite or .onnx)
+        screener_path: Separate screener model; if None, the screener is the
+            Keras model at model_path resized by screener_frames/screener_size
+        screener_frames: Frames per clip for a resized screener
+            (default DEFAULT_SCREENER_FRAMES)
+        screener_size: Frame size for a resized screener (default DEFAULT_SCREENER_SIZE)
+        band: Uncertainty band, see Cascade
+        batch_sizes: Batch-size buckets for compiled backends
+
+    Returns:
+        Cascade ready to predict
+    """
+    model = load_backend(model_path, batch_sizes=batch_sizes)
+    if screener_path:
+        screener = load_backend(screener_path, batch_sizes=batch_sizes)
+    else:
+        if model_path.lower().endswith((".tflite", ".onnx")):
+            raise ValueError("A resized screener needs a Keras model; pass a screener model instead")
+        small = resize_model(load_model(model_path),
+                             num_frames=screener_frames or DEFAULT_SCREENER_FRAMES,
+                             img_size=screener_size or DEFAULT_SCREENER_SIZE)
+        screener = CompiledBackend(small, batch_sizes=batch_sizes)
+    return Cascade(screener, model, band=band)
+
+
+def cascade_summary(results: Iterable[Dict], cascade: Cascade) -> Dict[str, float]:
+    """
+    Aggregate cascade results.
+
+    Returns:
+        Dict with 'videos' (scored), 'screened' (decided by stage 1), 'escalated',
+        'failed', 'screener_ms' and 'model_ms' (per-clip costs),
+        'cascade_ms' (mean compute per clip), 'compute_saved' (fraction of
+        full-model-only compute) and 'speedup'
+    """
+    results = list(results)
+    failed = sum(r["error"] is not None for r in results)
+    results = [r for r in results if r["error"] is None]
+    escalated = sum(r["stage"] == 2 for r in results)
+    cascade_ms = float(np.mean([r["compute_ms"] for r in results])) if results else float("nan")
+    return {
+        'videos': len(results),
+        'screened': len(results) - escalated,
+        'escalated': escalated,
+        'failed': failed,
+        'screener_ms': cascade.screener_ms,
+        'model_ms': cascade.model_ms,
+        'cascade_ms': cascade_ms,
+        'compute_saved': 1.0 - cascade_ms / cascade.model_ms if results else float("nan"),
+        'speedup': cascade.model_ms / cascade_ms if results else float("nan"),
+    }
+
+
+def sweep_bands(cascade: Cascade, video_files: List[Tuple[str, int]],
+                bands: Sequence[Tuple[float, float]] = SWEEP_BANDS, batch_size: int = 8) -> List[Dict]:
+    """
+    Compare uncertainty bands on labelled videos.
+
+    Both models score every video once; each band's outcome then follows
+    without running anything again.
+
+    Args:
+        cascade: Cascade whose models are compared (its own band is ignored)
+        video_files: (video_path, label) pairs, e.g. the validation split
+        bands: (low, high) bands to compare
+        batch_size: Videos per forward pass
+
+    Returns:
+        One dict per band with 'band', 'escalated' (fraction of videos),
+        'accuracy', 'model_accuracy' (full model alone), 'agreement' (with
+        the full model), 'compute_saved' and 'speedup'
+    """
+    labels = dict(video_files)
+    scores = []
+    for model in (cascade.screener, cascade.model):
+        results = predict_videos(list(labels), model, batch_size=batch_size)
+        scores.append({r["path"]: r["confidence"] for r in results if r["error"] is None})
+    paths = [path for path in labels if path in scores[0] and path in scores[1]]
+    if not paths:
+        return []
+
+    y = np.array([labels[path] for path in paths])
+    screener = np.array([scores[0][path] for path in paths])
+    full = np.array([scores[1][path] for path in paths])
+    full_pred = full > THRESHOLD
+
+    report = []
+    for low, high in bands:
+        escalate = (screener >= low) & (screener <= high)
+        pred = np.where(escalate, full, screener) > THRESHOLD
+        cascade_ms = cascade.screener_ms + escalate.mean() * cascade.model_ms
+        report.append({
+            'band': (low, high),
+            'escalated': float(escalate.mean()),
+            'accuracy': float(np.mean(pred == y)),
+            'model_accuracy': float(np.mean(full_pred == y)),
+            'agreement': float(np.mean(pred == full_pred)),
+            'compute_saved': 1.0 - cascade_ms / cascade.model_ms,
+            'speedup': cascade.model_ms / cascade_ms,
+        })
+    return report
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Compare cascade uncertainty bands on the validation split"
+    )
+    parser.add_argument("--model", type=str, default=get_model_path(),
+                        help="Full model (default: model/violence_model.h5)")
+    parser.add_argument("--screener", type=str, default=None,
+                        help="Screener model (default: --model resized, see --screener-frames/size)")
+    parser.add_argument("--screener-frames", type=int, default=None,
+                        help=f"Frames per video of the resized screener (default: {DEFAULT_SCREENER_FRAMES})")
+    parser.add_argument("--screener-size", type=int, default=None,
+                        help=f"Frame size of the resized screener (default: {DEFAULT_SCREENER_SIZE})")
+    parser.add_argument("--band", type=float, nargs=2, action="append", default=None,
+                        metavar=("LOW", "HIGH"), help="Band to compare; repeatable (default: a standard sweep)")
+    parser.add_argument("--data-dir", type=str, default="data", help="Dataset root (default: data)")
+    parser.add_argument("--validation-split", type=float, default=0.2,
+                        help="Fraction of each class used for validation (default: 0.2)")
+    parser.add_argument("--batch-size", type=int, default=8, help="Videos per forward pass (default: 8)")
+    parser.add_argument("--report", type=str, default=None, help="Write the comparison as JSON")
+
+    args = parser.parse_args()
+
+    for path in (args.model, args.screener):
+        if path and not os.path.isfile(path):
+            print(f"ERROR: Model not found: {path}")
+            sys.exit(1)
+    _, val_files = split_video_files(args.data_dir, args.validation_split)
+    if not val_files:
+        print(f"ERROR: No validation videos found in {args.data_dir}")
+        sys.exit(1)
+
+    print(f"Loading cascade (full model {args.model})...")
+    try:
+        cascade = load_cascade(args.model, args.screener, args.screener_frames, args.screener_size,
+                               batch_sizes=(1, args.batch_size))
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+    print(f"Scoring {len(val_files)} validation videos with both models...")
+    report = sweep_bands(cascade, val_files, [tuple(b) for b in args.band or SWEEP_BANDS],
+                         batch_size=args.batch_size)
+
+    print("\n" + "=" * 72)
+    print(f"CASCADE BANDS (screener {cascade.screener_ms:.1f} ms, full model {cascade.model_ms:.1f} ms per clip)")
+    print("=" * 72)
+    for r in report:
+        low, high = r['band']
+        print(f"[{low:.2f}, {high:.2f}]  escalated {r['escalated']:6.1%}  acc {r['accuracy']:.4f} "
+              f"(full {r['model_accuracy']:.4f})  agree {r['agreement']:.4f}  "
+              f"saved {r['compute_saved']:6.1%} ({r['speedup']:.1f}x)")
+    print("=" * 72)
+
+    if args.report:
+        os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+        with open(args.report, "w") as f:
+            json.dump({'model': args.model, 'screener': args.screener, 'screener_ms': cascade.screener_ms,
+                       'model_ms': cascade.model_ms, 'results': report}, f, indent=2)
+        print(f"Report saved to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
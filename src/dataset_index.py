@@ -0,0 +1,207 @@
+"""
+Incremental metadata index of the video dataset.
+
+Every video under data/nonviolent and data/violent is probed once for its
+frame count, frame rate, duration, codec and whether it can be decoded at
+all. Results are stored in data/index.json keyed by relative path together
+with the file's size and modification time; later runs re-probe only files
+that are new or have changed, in parallel worker processes.
+
+Training uses the index to leave out videos that extract_frames would reject
+(unreadable, or fewer frames than the model samples) before building the
+dataset, so steps per epoch match the number of samples actually yielded.
+
+Usage:
+    python -m src.dataset_index
+    python -m src.dataset_index --data-dir data --num-frames 30 --workers 4
+"""
+
+import os
+import sys
+import json
+import argparse
+import multiprocessing
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+
+try:
+    # When running as module
+    from src.cache_io import atomic_write_json, file_stamp
+except ImportError:
+    # When running directly
+    from cache_io import atomic_write_json, file_stamp
+
+# Class directories in label order
+CLASSES = ("nonviolent", "violent")
+
+# Index written to the data directory
+INDEX_FILE = "index.json"
+
+# Below this many files to probe, starting worker processes costs more than it saves
+PARALLEL_MIN_FILES = 8
+
+
+def list_video_files(data_dir: str = "data") -> List[Tuple[str, int]]:
+    """
+    List every video file in the class directories, sorted by name within each class.
+
+    Args:
+        data_dir: Root directory containing 'violent' and 'nonviolent' subdirectories
+
+    Returns:
+        List of (video_path, label) tuples
+    """
+    files = []
+    for label, class_name in enumerate(CLASSES):
+        class_dir = os.path.join(data_dir, class_name)
+        if not os.path.isdir(class_dir):
+            continue
+        files.extend((os.path.join(class_dir, f), label) for f in sorted(os.listdir(class_dir))
+                     if os.path.isfile(os.path.join(class_dir, f)))
+    return files
+
+
+def probe_video(video_path: str) -> Dict:
+    """
+    Read a video's container metadata and check that its first and last frames decode.
+
+    Args:
+        video_path: Path to the video file
+
+    Returns:
+        Dict with frames, fps, duration (seconds), codec (FourCC string) and decodable
+    """
+    info = {'frames': 0, 'fps': 0.0, 'duration': 0.0, 'codec': "", 'decodable': False}
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return info
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = float(cap.get(cv2.CAP_PROP_FPS))
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+        info.update({
+            'frames': max(frames, 0),
+            'fps': fps,
+            'duration': frames / fps if fps > 0 and frames > 0 else 0.0,
+            'codec': "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00 "),
+        })
+        # A truncated file still opens and reports its full frame count; make
+        # sure the first and the last frame can actually be read
+        decodable = frames > 0 and cap.grab()
+        if decodable and frames > 1:
+            decodable = cap.set(cv2.CAP_PROP_POS_FRAMES, frames - 1) and cap.grab()
+        info['decodable'] = bool(decodable)
+    except Exception as e:
+        print(f"Error probing {video_path}: {e}")
+    finally:
+        cap.release()
+    return info
+
+
+def _probe(video_path: str) -> Tuple[str, Dict]:
+    return video_path, probe_video(video_path)
+
+
+def index_dataset(data_dir: str = "data", index_path: Optional[str] = None,
+                  workers: Optional[int] = None) -> List[Dict]:
+    """
+    Return metadata for every video in the dataset, probing only new or changed files.
+
+    Args:
+        data_dir: Root directory containing 'violent' and 'nonviolent' subdirectories
+        index_path: Index location (default: data_dir/index.json)
+        workers: Probe processes (default: CPU count)
+
+    Returns:
+        List of dicts with path, label, size, mtime_ns, frames, fps, duration,
+        codec and decodable, in list_video_files order
+    """
+    index_path = index_path or os.path.join(data_dir, INDEX_FILE)
+    cached = {}
+    if os.path.isfile(index_path):
+        with open(index_path) as f:
+            cached = json.load(f)
+
+    files = list_video_files(data_dir)
+    entries = {}
+    stale = []
+    for video_path, label in files:
+        rel = os.path.relpath(video_path, data_dir).replace(os.sep, "/")
+        size, mtime_ns = file_stamp(video_path)
+        entry = cached.get(rel)
+        if entry is None or (entry['size'], entry['mtime_ns']) != (size, mtime_ns):
+            entry = {'label': label, 'size': size, 'mtime_ns': mtime_ns}
+            stale.append(video_path)
+        entries[rel] = dict(entry, label=label)
+
+    if stale:
+        workers = workers or os.cpu_count() or 1
+        print(f"Probing {len(stale)} new or changed videos ({len(files) - len(stale)} indexed)...")
+        if workers > 1 and len(stale) >= PARALLEL_MIN_FILES:
+            # Spawn rather than fork: forking a process that already runs a
+            # TensorFlow runtime (e.g. train.py) can deadlock the children
+            with multiprocessing.get_context("spawn").Pool(processes=min(workers, len(stale))) as pool:
+                probed = pool.map(_probe, stale, chunksize=max(1, len(stale) // (4 * workers)))
+        else:
+            probed = [_probe(video_path) for video_path in stale]
+        for video_path, info in probed:
+            entries[os.path.relpath(video_path, data_dir).replace(os.sep, "/")].update(info)
+
+    if stale or len(entries) != len(cached):
+        try:
+            atomic_write_json(index_path, entries, indent=1)
+        except OSError as e:
+            print(f"Warning: could not write dataset index {index_path}: {e}")
+
+    return [dict(entry, path=os.path.join(data_dir, rel)) for rel, entry in entries.items()]
+
+
+def is_usable(entry: Dict, num_frames: int = 30) -> bool:
+    """Whether extract_frames can sample num_frames frames from an indexed video."""
+    return entry['decodable'] and entry['frames'] >= num_frames
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Build or refresh the dataset metadata index"
+    )
+    parser.add_argument("--data-dir", type=str, default="data", help="Dataset root (default: data)")
+    parser.add_argument("--num-frames", type=int, default=30,
+                        help="Frames sampled per video; shorter videos are reported as unusable (default: 30)")
+    parser.add_argument("--workers", type=int, default=None, help="Probe processes (default: CPU count)")
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.data_dir):
+        print(f"ERROR: Data directory not found: {args.data_dir}")
+        sys.exit(1)
+
+    entries = index_dataset(args.data_dir, workers=args.workers)
+
+    print("\n" + "=" * 60)
+    print(f"DATASET INDEX ({os.path.join(args.data_dir, INDEX_FILE)})")
+    print("=" * 60)
+    for label, class_name in enumerate(CLASSES):
+        in_class = [e for e in entries if e['label'] == label]
+        usable = [e for e in in_class if is_usable(e, args.num_frames)]
+        hours = sum(e['duration'] for e in usable) / 3600
+        print(f"{class_name:12s} {len(in_class):6d} videos, {len(usable):6d} usable ({hours:.2f} h)")
+    broken = [e for e in entries if not e['decodable']]
+    short = [e for e in entries if e['decodable'] and e['frames'] < args.num_frames]
+    print(f"Undecodable: {len(broken)}")
+    for e in broken:
+        print(f"  {e['path']}")
+    print(f"Fewer than {args.num_frames} frames: {len(short)}")
+    for e in short:
+        print(f"  {e['path']} ({e['frames']} frames)")
+    codecs = {}
+    for e in entries:
+        codecs[e['codec'] or "?"] = codecs.get(e['codec'] or "?", 0) + 1
+    print("Codecs: " + ", ".join(f"{codec} {count}" for codec, count in sorted(codecs.items())))
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Knowledge distillation of a trained model into a cheaper student.
+
+The teacher (the trained ResNet50 + LSTM model) scores every training video
+once. Its scores are cached on disk like frame embeddings: keyed by file path,
+size and modification time, one file per teacher weights. Re-running
+distillation with other student settings never runs the teacher again, and
+adding videos only scores the new ones.
+
+The student (by default MobileNetV3-Small + GRU, see train.py --distill)
+is trained on a blend of hard labels and the teacher's temperature-softened
+scores:
+
+    target = alpha * label + (1 - alpha) * sigmoid(logit(teacher_score) / T)
+
+Binary cross-entropy is linear in the target, so this is the usual
+alpha-weighted sum of the hard-label and soft-label losses.
+"""
+
+import os
+import json
+import time
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+try:
+    # When running as module
+    from src.backends import CompiledBackend
+    from src.cache_io import atomic_write_json, file_key
+    from src.embeddings import backbone_id
+    from src.frames import extract_frames
+    from src.net import model_input_dtype
+    from src.predict import THRESHOLD
+except ImportError:
+    # When running directly
+    from backends import CompiledBackend
+    from cache_io import atomic_write_json, file_key
+    from embeddings import backbone_id
+    from frames import extract_frames
+    from net import model_input_dtype
+    from predict import THRESHOLD
+
+# Default on-disk location of cached teacher scores
+SOFT_LABEL_DIR = os.path.join("cache", "soft_labels")
+
+
+def _load_videos(model, video_path: str) -> Optional[np.ndarray]:
+    """Decode one video as a batch of one at a model's input shape and dtype."""
+    num_frames, img_size = model.inputs[0].shape[1], model.inputs[0].shape[2]
+    frames = extract_frames(video_path, num_frames=num_frames, img_size=img_size,
+                            dtype=model_input_dtype(model))
+    return None if frames is None else frames[np.newaxis]
+
+
+def precompute_soft_labels(files: List[Tuple[str, int]], teacher,
+                           cache_dir: str = SOFT_LABEL_DIR) -> Dict[str, float]:
+    """
+    Score every video in `files` with the teacher, reusing cached scores.
+
+    Args:
+        files: (video_path, label) tuples, e.g. from load_data.split_video_files
+        teacher: Trained end-to-end model
+        cache_dir: Directory holding one JSON file of scores per teacher
+
+    Returns:
+        Dict mapping video_path -> teacher score for every video that could be decoded
+    """
+    path = os.path.join(cache_dir, f"{backbone_id(teacher)}.json")
+    cached = {}
+    if os.path.isfile(path):
+        with open(path) as f:
+            cached = json.load(f)
+
+    backend = None
+    scores = {}
+    computed = 0
+    for video_path, _ in files:
+        key = file_key(video_path)
+        if key not in cached:
+            videos = _load_videos(teacher, video_path)
+            if videos is None:
+                continue
+            if backend is None:
+                backend = CompiledBackend(teacher, batch_sizes=(1,))
+            cached[key] = float(backend.predict(videos)[0, 0])
+            computed += 1
+            if computed % 50 == 0:
+                print(f"  Scored {computed} videos with the teacher...")
+        scores[video_path] = cached[key]
+
+    if computed:
+        atomic_write_json(path, cached)
+
+    print(f"  Teacher scores: {len(scores) - computed} cached, {computed} computed, "
+          f"{len(files) - len(scores)} failed")
+    return scores
+
+
+def distillation_targets(files: List[Tuple[str, int]], soft_labels: Dict[str, float],
+                         temperature: float = 2.0, alpha: float = 0.5) -> Dict[str, float]:
+    """
+    Blend hard labels with temperature-softened teacher scores.
+
+    Args:
+        files: (video_path, label) tuples
+        soft_labels: video_path -> teacher score from precompute_soft_labels
+        temperature: Softening temperature (1 keeps the teacher's scores)
+        alpha: Weight of the hard label (0 trains on the teacher alone)
+
+    Returns:
+        Dict mapping video_path -> training target in [0, 1]
+    """
+    targets = {}
+    for video_path, label in files:
+        if video_path not in soft_labels:
+            continue
+        p = np.clip(soft_labels[video_path], 1e-6, 1 - 1e-6)
+        soft = 1.0 / (1.0 + np.exp(-np.log(p / (1 - p)) / temperature))
+        targets[video_path] = float(alpha * label + (1 - alpha) * soft)
+    return targets
+
+
+def compare_models(models: Dict, video_files: List[Tuple[str, int]],
+                   sizes_mb: Optional[Dict[str, float]] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Score the same videos with several models, each at its own input resolution.
+
+    Unlike export_tflite.compare_backends, the models may take different frame
+    sizes, so every video is decoded once per model. Decoding is not timed.
+    The first model is the reference for agreement.
+
+    Args:
+        models: Name -> end-to-end Keras model
+        video_files: (video_path, label) pairs, e.g. the validation split
+        sizes_mb: Optional name -> saved model size in MB to include in the report
+
+    Returns:
+        Name -> {'accuracy', 'precision', 'recall', 'agreement', 'median_ms',
+        'p95_ms', 'params', 'size_mb', 'videos'}
+    """
+    backends = {name: CompiledBackend(model, batch_sizes=(1,)) for name, model in models.items()}
+
+    scores = {name: [] for name in models}
+    latencies = {name: [] for name in models}
+    labels = []
+    for path, label in video_files:
+        batches = {name: _load_videos(model, path) for name, model in models.items()}
+        if any(videos is None for videos in batches.values()):
+            continue
+        labels.append(label)
+        for name, backend in backends.items():
+            start = time.perf_counter()
+            scores[name].append(float(backend.predict(batches[name])[0, 0]))
+            latencies[name].append((time.perf_counter() - start) * 1000)
+
+    labels = np.array(labels)
+    reference = np.array(next(iter(scores.values())))
+    report = {}
+    for name, model in models.items():
+        s = np.array(scores[name])
+        predicted = s > THRESHOLD
+        true_positives = int(np.sum(predicted & (labels == 1)))
+        report[name] = {
+            'videos': len(s),
+            'accuracy': float(np.mean(predicted == labels)) if len(s) else float("nan"),
+            'precision': true_positives / int(np.sum(predicted)) if np.any(predicted) else float("nan"),
+            'recall': true_positives / int(np.sum(labels == 1)) if np.any(labels == 1) else float("nan"),
+            'agreement': float(np.mean(predicted == (reference > THRESHOLD))) if len(s) else float("nan"),
+            'median_ms': float(np.median(latencies[name])) if len(s) else float("nan"),
+            'p95_ms': float(np.percentile(latencies[name], 95)) if len(s) else float("nan"),
+            'params': int(model.count_params()),
+            'size_mb': (sizes_mb or {}).get(name, float("nan")),
+        }
+    return report
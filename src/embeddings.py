@@ -0,0 +1,297 @@
+"""
+Cache per-frame backbone embeddings on disk.
+
+The backbone is frozen during training, so its pooled (num_frames, feature_dim)
+output for a video never changes. Computing it once and training only the temporal head
+on the cached embeddings avoids re-running the backbone every epoch.
+
+Cache entries are keyed by file path, size, modification time and backbone
+identity, so edited videos or a different backbone never hit stale entries.
+
+EmbeddingRing is the in-memory counterpart for streaming inference: it keeps
+the embeddings of the most recent frames so overlapping windows reuse them.
+"""
+
+import os
+import math
+import hashlib
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+try:
+    # When running as module
+    from src.cache_io import atomic_open, file_key
+    from src.frames import extract_frames
+    from src.load_data import split_video_files
+    from src.net import model_input_dtype
+except ImportError:
+    # When running directly
+    from cache_io import atomic_open, file_key
+    from frames import extract_frames
+    from load_data import split_video_files
+    from net import model_input_dtype
+
+# Default on-disk location of cached embeddings
+CACHE_DIR = os.path.join("cache", "embeddings")
+
+
+def backbone_id(encoder) -> str:
+    """
+    Identify a frame encoder by its input signature and weights.
+
+    Args:
+        encoder: Keras frame encoder (see net.build_frame_encoder)
+
+    Returns:
+        Short hex digest that changes whenever the encoder's output would
+    """
+    digest = hashlib.sha1()
+    digest.update(f"{model_input_dtype(encoder)}|{tuple(encoder.inputs[0].shape)}".encode())
+    for weight in encoder.get_weights():
+        digest.update(np.ascontiguousarray(weight).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def cache_path(video_path: str, backbone: str, cache_dir: str = CACHE_DIR, num_frames: int = 30) -> str:
+    """
+    Path of the cache entry for a video as it currently exists on disk.
+
+    Args:
+        video_path: Path to the video file
+        backbone: Encoder identity from backbone_id
+        cache_dir: Cache root directory
+        num_frames: Number of frames sampled per video; backbone_id only
+            covers the per-frame input, so each frame count has its own entries
+
+    Returns:
+        Path to the .npy file holding the video's embeddings
+    """
+    key = f"{file_key(video_path)}|{backbone}|{num_frames}"
+    digest = hashlib.sha1(key.encode()).hexdigest()
+    return os.path.join(cache_dir, backbone, f"{num_frames}f", digest[:2], f"{digest}.npy")
+
+
+def _is_cached(path: str, num_frames: int) -> bool:
+    """Whether a cache entry exists and holds num_frames embeddings (read via mmap, header only)."""
+    if not os.path.isfile(path):
+        return False
+    try:
+        return np.load(path, mmap_mode="r").shape[0] == num_frames
+    except (OSError, ValueError):
+        return False
+
+
+def load_embeddings(video_path: str, backbone: str, cache_dir: str = CACHE_DIR,
+                    num_frames: int = 30) -> Optional[np.ndarray]:
+    """
+    Load cached embeddings for a video.
+
+    Returns:
+        np.ndarray of shape (num_frames, feature_dim), or None if not cached
+        (an entry with another frame count counts as not cached)
+    """
+    path = cache_path(video_path, backbone, cache_dir, num_frames)
+    if not _is_cached(path, num_frames):
+        return None
+    return np.load(path)
+
+
+def compute_embeddings(encoder, video_path: str, num_frames: int = 30) -> Optional[np.ndarray]:
+    """
+    Run the frame encoder over the sampled frames of one video.
+
+    Returns:
+        np.ndarray of shape (num_frames, feature_dim) as float32,
+        or None if frames could not be extracted
+    """
+    frames = extract_frames(video_path, num_frames=num_frames, img_size=encoder.inputs[0].shape[1],
+                            dtype=model_input_dtype(encoder))
+    if frames is None:
+        return None
+    return encoder.predict(frames, batch_size=num_frames, verbose=0).astype(np.float32)
+
+
+def precompute_embeddings(files: List[Tuple[str, int]], encoder, backbone: str,
+                          num_frames: int = 30, cache_dir: str = CACHE_DIR) -> Dict[str, int]:
+    """
+    Make sure every video in `files` has cached embeddings.
+
+    Videos already cached for this backbone are skipped, so re-running after
+    adding videos only encodes the new ones.
+
+    Args:
+        files: (video_path, label) tuples, e.g. from load_data.split_video_files
+        encoder: Frozen frame encoder
+        backbone: Encoder identity from backbone_id
+        num_frames: Number of frames sampled per video
+        cache_dir: Cache root directory
+
+    Returns:
+        Dict with counts of 'cached' (already present), 'computed' and 'failed' videos
+    """
+    stats = {'cached': 0, 'computed': 0, 'failed': 0}
+
+    for i, (video_path, _) in enumerate(files):
+        path = cache_path(video_path, backbone, cache_dir, num_frames)
+        if _is_cached(path, num_frames):
+            stats['cached'] += 1
+            continue
+
+        embeddings = compute_embeddings(encoder, video_path, num_frames=num_frames)
+        if embeddings is None:
+            stats['failed'] += 1
+            continue
+
+        with atomic_open(path, "wb") as f:
+            np.save(f, embeddings)
+        stats['computed'] += 1
+
+        if stats['computed'] % 50 == 0:
+            print(f"  Encoded {i + 1}/{len(files)} videos...")
+
+    return stats
+
+
+def get_embedding_dataset_split(data_dir: str = "data", backbone: str = "",
+                                cache_dir: str = CACHE_DIR, num_frames: int = 30,
+                                feature_dim: int = 2048, batch_size: int = 8,
+                                validation_split: float = 0.2, epochs: int = 10,
+                                targets: Optional[Dict[str, float]] = None) -> Tuple:
+    """
+    Create tf.data.Dataset objects over cached embeddings.
+
+    Mirrors load_data.get_dataset_split (same stratified file split, same return
+    value) but yields (num_frames, feature_dim) embeddings instead of frames.
+    Only videos with a cache entry are used, so step counts are exact.
+
+    Args:
+        data_dir: Root directory containing 'violent' and 'nonviolent' subdirectories
+        backbone: Encoder identity from backbone_id
+        cache_dir: Cache root directory
+        num_frames: Number of frames per video
+        feature_dim: Size of each frame embedding
+        batch_size: Batch size for training
+        validation_split: Fraction of data to use for validation (default 0.2)
+        epochs: Number of training epochs (used for repeating train dataset)
+        targets: Optional video_path -> float training target (e.g. distillation
+            soft labels, see src/distill.py) replacing the hard labels of the
+            training split; validation keeps hard labels
+
+    Returns:
+        (train_dataset, val_dataset, train_steps, val_steps, class_counts)
+    """
+
+    import tensorflow as tf
+
+    train_files, val_files = split_video_files(data_dir, validation_split, num_frames=num_frames)
+    train_files = [(p, l) for p, l in train_files
+                   if _is_cached(cache_path(p, backbone, cache_dir, num_frames), num_frames)
+                   and (targets is None or p in targets)]
+    val_files = [(p, l) for p, l in val_files
+                 if _is_cached(cache_path(p, backbone, cache_dir, num_frames), num_frames)]
+
+    train_count = len(train_files)
+    val_count = len(val_files)
+    if train_count == 0:
+        print("Error: No cached embeddings found.")
+        return None, None, 0, 0, {}
+
+    def make_gen(files, targets=None):
+        def gen():
+            for video_path, label in files:
+                target = np.int32(label) if targets is None else np.float32(targets[video_path])
+                yield load_embeddings(video_path, backbone, cache_dir, num_frames), target
+        return gen
+
+    def signature(label_dtype):
+        return (
+            tf.TensorSpec(shape=(num_frames, feature_dim), dtype=tf.float32),
+            tf.TensorSpec(shape=(), dtype=label_dtype)
+        )
+
+    train_dataset = tf.data.Dataset.from_generator(
+        make_gen(train_files, targets),
+        output_signature=signature(tf.int32 if targets is None else tf.float32)
+    )
+    val_dataset = tf.data.Dataset.from_generator(make_gen(val_files), output_signature=signature(tf.int32))
+
+    # Embeddings are ~240 KB per video, so a full-epoch shuffle buffer is cheap
+    train_dataset = train_dataset.shuffle(buffer_size=train_count)
+    train_dataset = train_dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE).repeat()
+    val_dataset = val_dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+    train_steps = math.ceil(train_count / batch_size)
+    val_steps = math.ceil(val_count / batch_size)
+
+    train_nonviolent = sum(1 for _, l in train_files if l == 0)
+    val_nonviolent = sum(1 for _, l in val_files if l == 0)
+    class_counts = {
+        'nonviolent': train_nonviolent + val_nonviolent,
+        'violent': (train_count - train_nonviolent) + (val_count - val_nonviolent),
+        'total': train_count + val_count,
+        'train': train_count,
+        'val': val_count,
+        'train_nonviolent': train_nonviolent,
+        'train_violent': train_count - train_nonviolent,
+        'val_nonviolent': val_nonviolent,
+        'val_violent': val_count - val_nonviolent
+    }
+
+    print(f"\nEmbedding dataset ready:")
+    print(f"  Training videos: {train_count}, validation videos: {val_count}")
+    print(f"  Train steps per epoch: {train_steps} (batch_size={batch_size})")
+    print(f"  Val steps per epoch: {val_steps} (batch_size={batch_size})")
+
+    return train_dataset, val_dataset, train_steps, val_steps, class_counts
+
+
+class EmbeddingRing:
+    """
+    Fixed-capacity ring buffer of per-frame embeddings for streaming inference.
+
+    Frames are numbered by the order they were appended. Only the most
+    recent `capacity` embeddings are kept; older ones are overwritten
+    (evicted) as new frames arrive, so memory never grows with video length.
+    Windows of consecutive frames are assembled from the cached vectors, so
+    a frame shared by several overlapping windows is encoded only once.
+    """
+
+    def __init__(self, capacity: int, feature_dim: int = 2048, dtype=np.float32):
+        if capacity < 1:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        self._data = np.empty((capacity, feature_dim), dtype=dtype)
+        self.end = 0  # number of frames appended so far
+
+    @property
+    def start(self) -> int:
+        """Number of the oldest frame still cached."""
+        return max(0, self.end - self.capacity)
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+    def append(self, embeddings: np.ndarray) -> None:
+        """Append (n, feature_dim) embeddings for the next n frames."""
+        n = len(embeddings)
+        if n > self.capacity:
+            raise ValueError(f"cannot append {n} embeddings to a ring of capacity {self.capacity}")
+        slots = np.arange(self.end, self.end + n) % self.capacity
+        self._data[slots] = embeddings
+        self.end += n
+
+    def window(self, first: int, length: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Gather embeddings of frames first .. first + length - 1.
+
+        Raises:
+            IndexError: If any of those frames was evicted or not appended yet
+        """
+        if first < self.start or first + length > self.end:
+            raise IndexError(
+                f"frames {first}..{first + length - 1} not cached "
+                f"(cached: {self.start}..{self.end - 1})"
+            )
+        slots = np.arange(first, first + length) % self.capacity
+        return np.take(self._data, slots, axis=0, out=out)
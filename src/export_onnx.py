@@ -0,0 +1,145 @@
+"""
+Export a trained model to ONNX for onnxruntime inference.
+
+The model is converted with tf2onnx as two graphs, <output>_encoder.onnx
+(ResNet50 + pooling, one frame per row) and <output>_head.onnx (LSTM +
+dense stack), both with a dynamic batch dimension. --full writes a single
+graph instead, which needs more memory to convert.
+
+Only the export needs TensorFlow and tf2onnx; the ONNX backend
+(backends.ONNXBackend) needs just onnxruntime.
+
+Usage:
+    python -m src.export_onnx                     # model/violence_model_{encoder,head}.onnx
+    python -m src.export_onnx --verify
+    python -m src.predict --video clip.mp4 --model model/violence_model_encoder.onnx
+"""
+
+import os
+import sys
+import argparse
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from typing import List
+
+try:
+    # When running as module: python -m src.export_onnx
+    from src.backends import ONNXBackend
+    from src.model_download import get_model_path
+    from src.net import fold_time, load_model, model_input_dtype, split_model
+except ImportError:
+    # When running directly
+    from backends import ONNXBackend
+    from model_download import get_model_path
+    from net import fold_time, load_model, model_input_dtype, split_model
+
+# ONNX opset targeted by the exporter
+ONNX_OPSET = 17
+
+
+def convert_to_onnx(model: keras.Model, output_path: str, opset: int = ONNX_OPSET) -> None:
+    """
+    Convert a single-input Keras model to an ONNX file with a dynamic batch dimension.
+
+    Args:
+        model: Model to convert
+        output_path: Target .onnx path
+        opset: ONNX opset version
+    """
+    try:
+        import tf2onnx
+    except ImportError:
+        raise ImportError("tf2onnx is not installed. Install it with: pip install tf2onnx")
+
+    spec = tf.TensorSpec((None,) + tuple(model.inputs[0].shape[1:]), model.inputs[0].dtype, name="input")
+    function = tf.function(lambda x: model(x, training=False), autograph=False)
+    tf2onnx.convert.from_function(function, input_signature=[spec], opset=opset, output_path=output_path)
+
+
+def export_onnx(model: keras.Model, output_path: str, full: bool = False,
+                opset: int = ONNX_OPSET) -> List[str]:
+    """
+    Export a trained end-to-end model to ONNX.
+
+    Args:
+        model: Trained model (build_model layout)
+        output_path: Target .onnx path; split exports (the default) write
+            <stem>_encoder.onnx and <stem>_head.onnx instead
+        full: Write one graph for the whole model instead of encoder + head
+        opset: ONNX opset version
+
+    Returns:
+        Paths of the written files (the first one is what load_backend takes)
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    if full:
+        convert_to_onnx(fold_time(model), output_path, opset)
+        return [output_path]
+
+    encoder, head = split_model(model)
+    stem = os.path.splitext(output_path)[0]
+    written = [f"{stem}_encoder.onnx", f"{stem}_head.onnx"]
+    convert_to_onnx(encoder, written[0], opset)
+    convert_to_onnx(head, written[1], opset)
+    return written
+
+
+def verify_export(model: keras.Model, onnx_path: str, batch_size: int = 2, seed: int = 0) -> float:
+    """
+    Compare ONNX and Keras outputs on random videos.
+
+    Returns:
+        Largest absolute difference between the two models' scores
+    """
+    rng = np.random.default_rng(seed)
+    frames = rng.integers(0, 256, size=(batch_size,) + tuple(model.inputs[0].shape[1:]), dtype=np.uint8)
+    X = frames if model_input_dtype(model) == "uint8" else frames.astype(np.float32) / 255.0
+
+    expected = fold_time(model).predict(X, verbose=0)
+    actual = ONNXBackend(onnx_path).predict(X)
+    return float(np.max(np.abs(actual - expected)))
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Export the trained model to ONNX for onnxruntime"
+    )
+    parser.add_argument("--model", type=str, default=get_model_path(),
+                        help="Path to trained model (default: model/violence_model.h5)")
+    parser.add_argument("--output", type=str, default=os.path.join("model", "violence_model.onnx"),
+                        help="Output path; split exports add _encoder/_head (default: model/violence_model.onnx)")
+    parser.add_argument("--full", action="store_true",
+                        help="Export one graph for the whole model (needs more memory to convert)")
+    parser.add_argument("--opset", type=int, default=ONNX_OPSET,
+                        help=f"ONNX opset version (default: {ONNX_OPSET})")
+    parser.add_argument("--verify", action="store_true",
+                        help="Check onnxruntime outputs against Keras on random input")
+
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.model):
+        print(f"ERROR: Model not found: {args.model}")
+        sys.exit(1)
+
+    print(f"Loading model from {args.model}...")
+    model = load_model(args.model)
+
+    print(f"Exporting to ONNX (opset {args.opset})...")
+    try:
+        written = export_onnx(model, args.output, full=args.full, opset=args.opset)
+    except ImportError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    for path in written:
+        print(f"  {path} ({os.path.getsize(path) / (1024 * 1024):.1f} MB)")
+
+    if args.verify:
+        diff = verify_export(model, written[0])
+        print(f"Max |score difference| vs Keras: {diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
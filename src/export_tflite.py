@@ -0,0 +1,322 @@
+"""
+Export a trained model to TFLite for CPU serving.
+
+Quantization modes:
+    float32  no quantization
+    dynamic  dynamic-range quantization: int8 weights, float activations
+    int8     full-integer quantization of the ResNet50 frame encoder, calibrated
+             on frames from the training videos (requires --split)
+
+A full-model export is one .tflite file. The LSTM only converts with a
+static batch size, so it scores one video per call. A split export
+(--split) writes <output>_encoder.tflite and <output>_head.tflite: the
+encoder runs all frames of a clip as one batch, and the head keeps float
+activations (dynamic-range weights) because LSTM state does not survive
+int8 calibration well.
+
+With --evaluate, the exported model is compared with the Keras model on
+the validation split: accuracy, agreement, score difference, latency and
+file size.
+
+Usage:
+    python -m src.export_tflite --quantize dynamic
+    python -m src.export_tflite --quantize int8 --split --evaluate --report outputs/tflite_report.json
+    python -m src.predict --video clip.mp4 --model model/violence_model_int8_encoder.tflite
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    # When running as module: python -m src.export_tflite
+    from src.backends import KerasBackend, TFLiteBackend
+    from src.frames import extract_frames
+    from src.load_data import split_video_files
+    from src.model_download import get_model_path
+    from src.net import fold_time, load_model, model_input_dtype, split_model
+except ImportError:
+    # When running directly
+    from backends import KerasBackend, TFLiteBackend
+    from frames import extract_frames
+    from load_data import split_video_files
+    from model_download import get_model_path
+    from net import fold_time, load_model, model_input_dtype, split_model
+
+QUANTIZATIONS = ("float32", "dynamic", "int8")
+
+
+def convert_to_tflite(model: keras.Model, batch_size: Optional[int] = None,
+                      quantization: str = "dynamic",
+                      representative_data: Optional[Callable[[], Iterator[List[np.ndarray]]]] = None) -> bytes:
+    """
+    Convert a Keras model to a TFLite flatbuffer.
+
+    Args:
+        model: Model to convert (single input)
+        batch_size: Static batch size, or None for a resizable batch dimension
+        quantization: One of QUANTIZATIONS
+        representative_data: Calibration generator yielding [input] lists
+            (required for "int8")
+
+    Returns:
+        Serialized TFLite model
+    """
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"quantization must be one of {QUANTIZATIONS}, got '{quantization}'")
+    if quantization == "int8" and representative_data is None:
+        raise ValueError("int8 quantization needs representative_data for calibration")
+
+    # Keras 3 models convert through a SavedModel with an explicit signature
+    spec = tf.TensorSpec((batch_size,) + tuple(model.inputs[0].shape[1:]), model.inputs[0].dtype)
+    archive = keras.export.ExportArchive()
+    archive.track(model)
+    archive.add_endpoint("serve", lambda x: model(x, training=False), input_signature=[spec])
+
+    export_dir = tempfile.mkdtemp(prefix="tflite_export_")
+    try:
+        archive.write_out(export_dir, verbose=False)
+        converter = tf.lite.TFLiteConverter.from_saved_model(export_dir)
+        if quantization != "float32":
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if quantization == "int8":
+            converter.representative_dataset = representative_data
+        return converter.convert()
+    finally:
+        shutil.rmtree(export_dir, ignore_errors=True)
+
+
+def calibration_frames(video_files: Sequence[Tuple[str, int]], num_videos: int = 16,
+                       frames_per_video: int = 10, num_frames: int = 30,
+                       img_size: int = 224, dtype: str = "uint8") -> Callable[[], Iterator[List[np.ndarray]]]:
+    """
+    Build a representative dataset of single frames for encoder calibration.
+
+    Videos are taken alternately from each class so both are represented,
+    and decoded with the same extract_frames call as load_data.video_generator.
+
+    Args:
+        video_files: (video_path, label) pairs, e.g. the training split
+        num_videos: Videos to sample
+        frames_per_video: Evenly spaced frames kept from each video
+        num_frames: Frames extracted per video (as in training)
+        img_size: Frame height and width (the encoder's input resolution)
+        dtype: Model input dtype
+
+    Returns:
+        Zero-argument generator function yielding [frame[np.newaxis]]
+    """
+    by_class = [[path for path, label in video_files if label == c] for c in (0, 1)]
+    interleaved = [path for pair in zip(*by_class) for path in pair]
+    longer = max(by_class, key=len)
+    interleaved += longer[len(interleaved) // 2:]
+    selected = interleaved[:num_videos]
+
+    def representative_data():
+        for path in selected:
+            frames = extract_frames(path, num_frames=num_frames, img_size=img_size, dtype=dtype)
+            if frames is None:
+                continue
+            step = max(1, num_frames // frames_per_video)
+            for frame in frames[::step][:frames_per_video]:
+                yield [frame[np.newaxis]]
+
+    return representative_data
+
+
+def export_tflite(model: keras.Model, output_path: str, quantization: str = "dynamic",
+                  split: bool = False,
+                  calibration_files: Sequence[Tuple[str, int]] = (),
+                  calibration_videos: int = 16) -> List[str]:
+    """
+    Export a trained end-to-end model to TFLite.
+
+    Args:
+        model: Trained model (build_model layout)
+        output_path: Target .tflite path; split exports write
+            <stem>_encoder.tflite and <stem>_head.tflite instead
+        quantization: One of QUANTIZATIONS
+        split: Export encoder and head separately
+        calibration_files: (video_path, label) pairs for int8 calibration
+        calibration_videos: Videos used for calibration
+
+    Returns:
+        Paths of the written files (the first one is what load_backend takes)
+    """
+    if quantization == "int8" and not split:
+        raise ValueError("int8 quantization is only supported for split exports (--split)")
+    if quantization == "int8" and not calibration_files:
+        raise ValueError("int8 quantization needs calibration videos (check --data-dir)")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    num_frames, img_size = model.inputs[0].shape[1], model.inputs[0].shape[2]
+    written = []
+
+    def write(path, content):
+        with open(path, "wb") as f:
+            f.write(content)
+        written.append(path)
+
+    if not split:
+        write(output_path, convert_to_tflite(fold_time(model), batch_size=1, quantization=quantization))
+        return written
+
+    encoder, head = split_model(model)
+    representative_data = None
+    if quantization == "int8":
+        representative_data = calibration_frames(calibration_files, num_videos=calibration_videos,
+                                                 num_frames=num_frames, img_size=img_size,
+                                                 dtype=model_input_dtype(model))
+    stem = os.path.splitext(output_path)[0]
+    write(f"{stem}_encoder.tflite",
+          convert_to_tflite(encoder, quantization=quantization, representative_data=representative_data))
+    write(f"{stem}_head.tflite",
+          convert_to_tflite(head, batch_size=1, quantization="float32" if quantization == "float32" else "dynamic"))
+    return written
+
+
+def compare_backends(backends: Dict[str, object], video_files: Sequence[Tuple[str, int]],
+                     sizes_mb: Optional[Dict[str, float]] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Score the same videos with several backends, one video per call.
+
+    The first backend is the reference for agreement and score differences.
+
+    Args:
+        backends: Name -> backend (see src/backends.py), all with the same input shape/dtype
+        video_files: (video_path, label) pairs, e.g. the validation split
+        sizes_mb: Optional name -> model size in MB to include in the report
+
+    Returns:
+        Name -> {'accuracy', 'agreement', 'max_abs_diff', 'median_ms', 'p95_ms',
+        'size_mb', 'videos'}
+    """
+    reference = next(iter(backends.values()))
+    num_frames, img_size = reference.input_shape[0], reference.input_shape[1]
+
+    scores = {name: [] for name in backends}
+    latencies = {name: [] for name in backends}
+    labels = []
+    for path, label in video_files:
+        frames = extract_frames(path, num_frames=num_frames, img_size=img_size, dtype=reference.input_dtype)
+        if frames is None:
+            continue
+        labels.append(label)
+        X = frames[np.newaxis]
+        for name, backend in backends.items():
+            if not latencies[name]:
+                backend.predict(X)  # warm-up
+            start = time.perf_counter()
+            scores[name].append(float(backend.predict(X)[0, 0]))
+            latencies[name].append((time.perf_counter() - start) * 1000)
+
+    labels = np.array(labels)
+    reference_scores = np.array(next(iter(scores.values())))
+    report = {}
+    for name in backends:
+        s = np.array(scores[name])
+        report[name] = {
+            'videos': len(s),
+            'accuracy': float(np.mean((s > 0.5) == labels)) if len(s) else float("nan"),
+            'agreement': float(np.mean((s > 0.5) == (reference_scores > 0.5))) if len(s) else float("nan"),
+            'max_abs_diff': float(np.max(np.abs(s - reference_scores))) if len(s) else float("nan"),
+            'median_ms': float(np.median(latencies[name])) if len(s) else float("nan"),
+            'p95_ms': float(np.percentile(latencies[name], 95)) if len(s) else float("nan"),
+            'size_mb': (sizes_mb or {}).get(name, float("nan")),
+        }
+    return report
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Export the trained model to TFLite (optionally quantized)"
+    )
+    parser.add_argument("--model", type=str, default=get_model_path(),
+                        help="Path to trained model (default: model/violence_model.h5)")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Output .tflite path (default: model/violence_model_<quantize>.tflite)")
+    parser.add_argument("--quantize", choices=QUANTIZATIONS, default="dynamic",
+                        help="Quantization mode (default: dynamic)")
+    parser.add_argument("--split", action="store_true",
+                        help="Export frame encoder and temporal head as separate files")
+    parser.add_argument("--data-dir", type=str, default="data",
+                        help="Dataset root for calibration and evaluation (default: data)")
+    parser.add_argument("--validation-split", type=float, default=0.2,
+                        help="Validation fraction, as used in training (default: 0.2)")
+    parser.add_argument("--calibration-videos", type=int, default=16,
+                        help="Training videos used for int8 calibration (default: 16)")
+    parser.add_argument("--evaluate", action="store_true",
+                        help="Compare accuracy and latency with the Keras model on the validation split")
+    parser.add_argument("--report", type=str, default=None,
+                        help="Write the evaluation report as JSON")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="TFLite interpreter threads for evaluation")
+
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.model):
+        print(f"ERROR: Model not found: {args.model}")
+        sys.exit(1)
+    output_path = args.output or os.path.join("model", f"violence_model_{args.quantize}.tflite")
+
+    print(f"Loading model from {args.model}...")
+    model = load_model(args.model)
+    train_files, val_files = split_video_files(args.data_dir, args.validation_split)
+
+    print(f"Exporting ({args.quantize}{', split' if args.split else ''})...")
+    try:
+        written = export_tflite(model, output_path, quantization=args.quantize, split=args.split,
+                                calibration_files=train_files,
+                                calibration_videos=args.calibration_videos)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+    size_mb = sum(os.path.getsize(path) for path in written) / (1024 * 1024)
+    for path in written:
+        print(f"  {path} ({os.path.getsize(path) / (1024 * 1024):.1f} MB)")
+
+    if not args.evaluate:
+        return
+    if not val_files:
+        print(f"ERROR: No validation videos found in {args.data_dir}")
+        sys.exit(1)
+
+    tflite_name = f"tflite_{args.quantize}"
+    backends = {
+        'keras': KerasBackend(fold_time(model)),
+        tflite_name: TFLiteBackend(written[0], num_threads=args.threads),
+    }
+    sizes_mb = {'keras': os.path.getsize(args.model) / (1024 * 1024), tflite_name: size_mb}
+
+    print(f"\nEvaluating on {len(val_files)} validation videos...")
+    report = compare_backends(backends, val_files, sizes_mb)
+
+    print("\n" + "=" * 78)
+    print(f"{'backend':16s} {'accuracy':>9s} {'agree':>7s} {'max|Δ|':>8s} "
+          f"{'median ms':>10s} {'p95 ms':>9s} {'size MB':>8s}")
+    print("-" * 78)
+    for name, r in report.items():
+        print(f"{name:16s} {r['accuracy']:9.4f} {r['agreement']:7.3f} {r['max_abs_diff']:8.4f} "
+              f"{r['median_ms']:10.1f} {r['p95_ms']:9.1f} {r['size_mb']:8.1f}")
+    print("=" * 78)
+
+    if args.report:
+        os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+        with open(args.report, "w") as f:
+            json.dump({'model': args.model, 'quantization': args.quantize, 'split': args.split,
+                       'files': written, 'results': report}, f, indent=2)
+        print(f"Report saved to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Memory-mapped store of sampled, resized frames for training.
+
+The frames extract_frames samples from a video never change, yet streaming
+training decodes every video again every epoch. compile() decodes each video
+once and writes its (num_frames, img_size, img_size, 3) uint8 frames as one
+fixed-size row of a flat file; a JSON index maps each video (path, size,
+modification time) to its row. Later epochs and runs read rows through a
+read-only np.memmap: a sample is a view of the page cache, not a copy, so
+reading runs at disk speed and every process training from the same store
+shares the same pages.
+
+One store file holds one (num_frames, img_size) combination, e.g.
+cache/frames/frames_30x224.u8, 4.5 MB per video at the defaults.
+
+Usage:
+    python -m src.frame_store
+    python -m src.frame_store --data-dir data --num-frames 30 --img-size 160
+"""
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+try:
+    # When running as module
+    from src.cache_io import atomic_write_json, file_stamp
+    from src.dataset_index import list_video_files
+    from src.frames import extract_frames
+except ImportError:
+    # When running directly
+    from cache_io import atomic_write_json, file_stamp
+    from dataset_index import list_video_files
+    from frames import extract_frames
+
+# Default on-disk location of frame stores
+FRAME_STORE_DIR = os.path.join("cache", "frames")
+
+
+class FrameStore:
+    """
+    Fixed-size uint8 frame rows in a memory-mapped file, indexed by video.
+
+    Reading (get, __getitem__) returns views of the mapping and is safe from
+    several threads; compile() must not run while another process reads the store.
+    """
+
+    def __init__(self, store_dir: str = FRAME_STORE_DIR, num_frames: int = 30, img_size: int = 224):
+        self.num_frames = num_frames
+        self.img_size = img_size
+        self.sample_shape = (num_frames, img_size, img_size, 3)
+        self.sample_bytes = int(np.prod(self.sample_shape))
+        base = os.path.join(store_dir, f"frames_{num_frames}x{img_size}")
+        self.data_path = base + ".u8"
+        self.index_path = base + ".json"
+
+        self._index = {'rows': 0, 'free': [], 'videos': {}}
+        if os.path.isfile(self.index_path):
+            with open(self.index_path) as f:
+                self._index = json.load(f)
+        self._frames = None
+
+    def __len__(self) -> int:
+        return len(self._index['videos'])
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the store file."""
+        return self._index['rows'] * self.sample_bytes
+
+    def _frames_view(self) -> np.ndarray:
+        """The whole store as a read-only (rows, num_frames, img_size, img_size, 3) array."""
+        if self._frames is None:
+            self._frames = np.memmap(self.data_path, dtype=np.uint8, mode="r",
+                                     shape=(self._index['rows'],) + self.sample_shape)
+        return self._frames
+
+    def row(self, video_path: str) -> Optional[int]:
+        """Row holding a video's frames, or None if it is not stored or has changed since."""
+        entry = self._index['videos'].get(os.path.abspath(video_path))
+        if entry is None:
+            return None
+        if (entry['size'], entry['mtime_ns']) != file_stamp(video_path):
+            return None
+        return entry['row']
+
+    def __getitem__(self, row: int) -> np.ndarray:
+        """Zero-copy view of one stored sample."""
+        return self._frames_view()[row]
+
+    def get(self, video_path: str) -> Optional[np.ndarray]:
+        """
+        Frames of a video as stored, without decoding it.
+
+        Returns:
+            Read-only uint8 view of shape (num_frames, img_size, img_size, 3),
+            or None if the video is not stored or has changed since
+        """
+        row = self.row(video_path)
+        return None if row is None else self[row]
+
+    def compile(self, files: List[Tuple[str, int]]) -> Dict[str, int]:
+        """
+        Decode every video in `files` that is not stored yet, straight into the store.
+
+        Changed videos are rewritten in their old row; new videos take a free
+        row or extend the file. Videos that cannot be decoded are left out.
+
+        Args:
+            files: (video_path, label) tuples, e.g. from load_data.split_video_files
+
+        Returns:
+            Dict with counts of 'cached' (already stored), 'computed' and 'failed' videos
+        """
+        videos = self._index['videos']
+        free = self._index['free']
+        stats = {'cached': 0, 'computed': 0, 'failed': 0}
+
+        todo = []
+        for video_path, _ in files:
+            if self.row(video_path) is not None:
+                stats['cached'] += 1
+            else:
+                todo.append(video_path)
+        if not todo:
+            return stats
+
+        # Size the file for the worst case (every video new) up front, then
+        # trim whatever was not used
+        rows = self._index['rows']
+        needed = rows + max(0, len(todo) - len(free))
+        os.makedirs(os.path.dirname(os.path.abspath(self.data_path)), exist_ok=True)
+        with open(self.data_path, "ab") as f:
+            f.truncate(needed * self.sample_bytes)
+
+        self._frames = None
+        frames = np.memmap(self.data_path, dtype=np.uint8, mode="r+", shape=(needed,) + self.sample_shape)
+        for video_path in todo:
+            key = os.path.abspath(video_path)
+            size, mtime_ns = file_stamp(video_path)
+            entry = videos.pop(key, None)
+            if entry is not None:
+                row = entry['row']
+            elif free:
+                row = free.pop()
+            else:
+                row = rows
+                rows += 1
+
+            # Decode directly into the mapped row; no intermediate array
+            if extract_frames(video_path, num_frames=self.num_frames, img_size=self.img_size,
+                              dtype="uint8", out=frames[row]) is None:
+                free.append(row)
+                stats['failed'] += 1
+                continue
+            videos[key] = {'row': row, 'size': size, 'mtime_ns': mtime_ns}
+            stats['computed'] += 1
+            if stats['computed'] % 50 == 0:
+                print(f"  Stored {stats['computed']}/{len(todo)} videos...")
+
+        frames.flush()
+        del frames
+        # Rows at the end that failed are cut off again
+        while rows > 0 and rows - 1 in free:
+            free.remove(rows - 1)
+            rows -= 1
+        with open(self.data_path, "r+b") as f:
+            f.truncate(rows * self.sample_bytes)
+        self._index['rows'] = rows
+
+        # The index is written only after the frames are on disk, so it never
+        # points at rows that were not written
+        atomic_write_json(self.index_path, self._index)
+        return stats
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Decode the dataset once into a memory-mapped frame store for training"
+    )
+    parser.add_argument("--data-dir", type=str, default="data", help="Dataset root (default: data)")
+    parser.add_argument("--store-dir", type=str, default=FRAME_STORE_DIR,
+                        help=f"Frame store directory (default: {FRAME_STORE_DIR})")
+    parser.add_argument("--num-frames", type=int, default=30, help="Frames per video (default: 30)")
+    parser.add_argument("--img-size", type=int, default=224, help="Frame resolution (default: 224)")
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.data_dir):
+        print(f"ERROR: Data directory not found: {args.data_dir}")
+        sys.exit(1)
+
+    store = FrameStore(args.store_dir, num_frames=args.num_frames, img_size=args.img_size)
+    files = list_video_files(args.data_dir)
+    print(f"Compiling {len(files)} videos into {store.data_path}...")
+    stats = store.compile(files)
+    print(f"  Cached: {stats['cached']}, computed: {stats['computed']}, failed: {stats['failed']}")
+    print(f"  Store: {len(store)} videos, {store.nbytes / (1024 ** 3):.2f} GB")
+
+
+if __name__ == "__main__":
+    main()
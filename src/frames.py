@@ -6,69 +6,215 @@ import cv2
 import numpy as np
 from typing import Optional
 
+# Output dtypes supported by extract_frames
+FRAME_DTYPES = ("float32", "uint8")
 
-def extract_frames(video_path: str, num_frames: int = 30, img_size: int = 224) -> Optional[np.ndarray]:
+# Sampling strategies for extract_frames
+SAMPLING_MODES = ("auto", "grab", "seek")
+
+# Seeking only pays off when sampled frames are far apart; below this average
+# gap (in frames) grabbing through the skipped frames is cheaper than a seek,
+# which has to decode forward from the previous keyframe anyway.
+SEEK_MIN_STRIDE = 16
+
+
+def _sample_indices(total_frames: int, num_frames: int) -> np.ndarray:
+    """Uniformly spaced frame indices covering the whole video."""
+    return np.linspace(0, total_frames - 1, num_frames, dtype=int)
+
+
+def _supports_accurate_seek(cap: cv2.VideoCapture, total_frames: int) -> bool:
+    """
+    Probe whether CAP_PROP_POS_FRAMES lands exactly on the requested frame.
+
+    Seeks to the middle of the video and checks that both the reported frame
+    position and the presentation timestamp agree with the target. Containers
+    with broken indexes or variable frame rate fail the check.
+
+    The capture position is left undefined; callers must reopen or re-seek.
+    """
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if fps <= 0:
+        return False
+
+    probe_idx = total_frames // 2
+    if not cap.set(cv2.CAP_PROP_POS_FRAMES, probe_idx):
+        return False
+    if not cap.grab():
+        return False
+
+    # After grabbing frame N the capture reports position N + 1
+    if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != probe_idx + 1:
+        return False
+
+    # Timestamp must be within one frame of where frame N should be
+    expected_ms = probe_idx * 1000.0 / fps
+    return abs(cap.get(cv2.CAP_PROP_POS_MSEC) - expected_ms) <= 1000.0 / fps
+
+
+def _read_grab(cap: cv2.VideoCapture, frame_indices: np.ndarray):
+    """
+    Yield sampled frames, reading the video front to back.
+
+    With the FFmpeg backend grab() still decodes every frame, skipped or not;
+    what is saved is the BGR conversion and copy, which retrieve() runs only
+    for the sampled frames. Yields None on failure.
+    """
+    frame_count = 0
+    for target in frame_indices:
+        while frame_count < target:
+            if not cap.grab():
+                yield None
+                return
+            frame_count += 1
+
+        if not cap.grab():
+            yield None
+            return
+        frame_count += 1
+
+        ret, frame = cap.retrieve()
+        yield frame if ret else None
+
+
+def _read_seek(cap: cv2.VideoCapture, frame_indices: np.ndarray):
+    """Yield sampled frames by seeking straight to each index. Yields None on failure."""
+    for target in frame_indices:
+        if not cap.set(cv2.CAP_PROP_POS_FRAMES, int(target)):
+            yield None
+            return
+        ret, frame = cap.read()
+        yield frame if ret else None
+
+
+class FrameConverter:
+    """
+    Convert decoded BGR frames into model input frames, in place.
+
+    Resizes first so the colour conversion runs on the small image, then
+    writes RGB (scaled to [0, 1] for float32) into a caller-provided slot.
+    Scratch buffers are allocated once and reused for every frame.
+    """
+
+    def __init__(self, img_size: int = 224, dtype: str = "float32"):
+        if dtype not in FRAME_DTYPES:
+            raise ValueError(f"dtype must be one of {FRAME_DTYPES}, got '{dtype}'")
+        self.img_size = img_size
+        self.dtype = dtype
+        self._resized = np.empty((img_size, img_size, 3), dtype=np.uint8)
+        self._rgb = self._resized if dtype == "uint8" else np.empty_like(self._resized)
+
+    def __call__(self, frame: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            frame: BGR uint8 frame as returned by cv2.VideoCapture
+            out: C-contiguous (img_size, img_size, 3) array of this converter's dtype
+
+        Returns:
+            out
+        """
+        cv2.resize(frame, (self.img_size, self.img_size), dst=self._resized)
+        if self.dtype == "uint8":
+            # Convert BGR to RGB straight into the output slot
+            cv2.cvtColor(self._resized, cv2.COLOR_BGR2RGB, dst=out)
+        else:
+            # Convert BGR to RGB, then normalize to [0, 1] into the output slot
+            cv2.cvtColor(self._resized, cv2.COLOR_BGR2RGB, dst=self._rgb)
+            np.divide(self._rgb, np.float32(255.0), out=out, dtype=np.float32)
+        return out
+
+
+def extract_frames(video_path: str, num_frames: int = 30, img_size: int = 224,
+                   sampling: str = "auto", dtype: str = "float32",
+                   out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
     """
     Extract uniformly sampled frames from a video file.
-    
+
     Args:
         video_path: Path to the video file
         num_frames: Number of frames to extract (default 30)
         img_size: Target frame size (224x224 for ResNet50)
-    
+        sampling: Frame access strategy:
+            - "grab": grab() through skipped frames, retrieve() only sampled ones
+            - "seek": jump to each sampled frame via CAP_PROP_POS_FRAMES
+            - "auto": seek when frames are far apart and the file seeks
+              accurately, otherwise grab (default)
+        dtype: "float32" for frames normalized to [0, 1] (default), or "uint8"
+            for raw RGB pixels; uint8 is 4x smaller and is meant for models
+            built with build_model(input_dtype="uint8"), which normalize in-graph
+        out: Optional preallocated C-contiguous array of shape
+            (num_frames, img_size, img_size, 3) and dtype `dtype` to write frames
+            into, e.g. a slot of a batch buffer. Allocated when not given.
+            Its contents are undefined if extraction fails.
+
     Returns:
-        np.ndarray of shape (num_frames, img_size, img_size, 3) normalized to [0, 1] as float32,
-        or None if video is corrupt or has fewer frames than required
+        np.ndarray of shape (num_frames, img_size, img_size, 3) as `dtype`
+        (`out` itself when provided), or None if video is corrupt or has fewer
+        frames than required
     """
+    if sampling not in SAMPLING_MODES:
+        raise ValueError(f"sampling must be one of {SAMPLING_MODES}, got '{sampling}'")
+    if dtype not in FRAME_DTYPES:
+        raise ValueError(f"dtype must be one of {FRAME_DTYPES}, got '{dtype}'")
+    if out is not None:
+        expected_shape = (num_frames, img_size, img_size, 3)
+        if out.shape != expected_shape or out.dtype != np.dtype(dtype):
+            raise ValueError(
+                f"out must have shape {expected_shape} and dtype {dtype}, "
+                f"got {out.shape} {out.dtype}"
+            )
+        if not out.flags.c_contiguous:
+            raise ValueError("out must be C-contiguous")
+
+    cap = None
     try:
         cap = cv2.VideoCapture(video_path)
-        
+
         # Check if video is corrupted
         if not cap.isOpened():
             return None
-        
+
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
+
         # Return None if video has fewer frames than required
         if total_frames < num_frames:
-            cap.release()
             return None
-        
+
         # Calculate frame indices to sample uniformly
-        frame_indices = np.linspace(0, total_frames - 1, num_frames, dtype=int)
-        
-        frames_list = []
-        frame_count = 0
-        target_idx = 0
-        
-        while cap.isOpened() and target_idx < num_frames:
-            ret, frame = cap.read()
-            
-            if not ret:
+        frame_indices = _sample_indices(total_frames, num_frames)
+
+        use_seek = sampling == "seek"
+        if sampling == "auto" and total_frames / num_frames >= SEEK_MIN_STRIDE:
+            use_seek = _supports_accurate_seek(cap, total_frames)
+            if not use_seek:
+                # The probe moved the read position; start again from frame 0
                 cap.release()
+                cap = cv2.VideoCapture(video_path)
+
+        reader = _read_seek(cap, frame_indices) if use_seek else _read_grab(cap, frame_indices)
+
+        if out is None:
+            out = np.empty((num_frames, img_size, img_size, 3), dtype=dtype)
+
+        convert = FrameConverter(img_size=img_size, dtype=dtype)
+
+        extracted = 0
+        for i, frame in enumerate(reader):
+            if frame is None:
                 return None
-            
-            # Check if this frame should be included
-            if frame_count == frame_indices[target_idx]:
-                # Convert BGR to RGB
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                # Resize to img_size x img_size
-                frame = cv2.resize(frame, (img_size, img_size))
-                # Normalize to [0, 1] as float32
-                frame = frame.astype(np.float32) / 255.0
-                frames_list.append(frame)
-                target_idx += 1
-            
-            frame_count += 1
-        
-        cap.release()
-        
+            convert(frame, out[i])
+            extracted += 1
+
         # Return array of shape (num_frames, img_size, img_size, 3)
-        if len(frames_list) == num_frames:
-            return np.array(frames_list, dtype=np.float32)
+        if extracted == num_frames:
+            return out
         else:
             return None
-    
+
     except Exception as e:
         print(f"Error extracting frames from {video_path}: {e}")
         return None
+
+    finally:
+        if cap is not None:
+            cap.release()
@@ -0,0 +1,327 @@
+"""
+Live stream ingestion (RTSP, webcam, GStreamer pipelines, files) with a bounded ring buffer.
+
+src/frames.py assumes finite files with a known frame count. LiveReader
+instead reads any cv2.VideoCapture source on a background thread. It
+preprocesses only the frames sampled at the model's rate and stores them
+in a fixed-size FrameRing. When the consumer falls behind, the ring
+applies a drop policy instead of growing:
+
+    drop_oldest  overwrite the oldest unconsumed frame (lowest latency)
+    drop_newest  discard the incoming frame
+    block        stop reading until there is room (only sensible for files)
+
+A local file can be replayed at real-time speed (realtime=True) to stand in
+for a camera. monitor() connects a reader to a StreamingScorer and yields
+periodic predictions together with achieved FPS, dropped frame counts and
+end-to-end latency (frame capture -> score).
+
+Usage:
+    python -m src.live --source rtsp://camera/stream
+    python -m src.live --source 0 --drop-policy drop_oldest
+    python -m src.live --source recording.mp4 --realtime
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+import cv2
+import numpy as np
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    # When running as module: python -m src.live
+    from src.frames import FrameConverter
+    from src.model_download import get_model_path
+    from src.net import load_model
+    from src.predict import get_label
+    from src.streaming import StreamingScorer
+except ImportError:
+    # When running directly
+    from frames import FrameConverter
+    from model_download import get_model_path
+    from net import load_model
+    from predict import get_label
+    from streaming import StreamingScorer
+
+DROP_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class FrameRing:
+    """
+    Fixed-capacity, thread-safe FIFO of preprocessed frames.
+
+    Frames are copied into preallocated slots, so memory is fixed at
+    construction. Each frame carries its capture timestamp
+    (time.perf_counter()) for latency measurement and its position in the
+    source in seconds.
+    """
+
+    def __init__(self, capacity: int, frame_shape: Tuple[int, ...], dtype: str = "uint8",
+                 drop_policy: str = "drop_oldest"):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"drop_policy must be one of {DROP_POLICIES}, got '{drop_policy}'")
+        if capacity < 1:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        self.drop_policy = drop_policy
+        self._frames = np.empty((capacity,) + tuple(frame_shape), dtype=dtype)
+        self._times = np.zeros(capacity, dtype=np.float64)
+        self._stream_times = np.zeros(capacity, dtype=np.float64)
+        self._head = 0  # sequence number of the next frame to read
+        self._tail = 0  # sequence number of the next frame to write
+        self._closed = False
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        with self._cond:
+            return self._tail - self._head
+
+    def put(self, frame: np.ndarray, timestamp: float, stream_time: float = 0.0) -> bool:
+        """
+        Add a frame, applying the drop policy if the ring is full.
+
+        Returns:
+            False if the frame was discarded (drop_newest, or ring closed)
+        """
+        with self._cond:
+            if self._tail - self._head >= self.capacity:
+                if self.drop_policy == "drop_newest":
+                    self.dropped += 1
+                    return False
+                if self.drop_policy == "drop_oldest":
+                    self._head += 1
+                    self.dropped += 1
+                else:
+                    while self._tail - self._head >= self.capacity and not self._closed:
+                        self._cond.wait()
+            if self._closed:
+                return False
+
+            slot = self._tail % self.capacity
+            self._frames[slot] = frame
+            self._times[slot] = timestamp
+            self._stream_times[slot] = stream_time
+            self._tail += 1
+            self._cond.notify_all()
+            return True
+
+    def get(self, out: np.ndarray, timeout: Optional[float] = None) -> Optional[Tuple[float, float]]:
+        """
+        Copy the oldest unread frame into `out`.
+
+        Returns:
+            (capture timestamp, stream time in seconds) of the frame, or None
+            if the ring is closed and drained (or the timeout expired)
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._tail > self._head or self._closed, timeout):
+                return None
+            if self._tail == self._head:
+                return None
+            slot = self._head % self.capacity
+            out[...] = self._frames[slot]
+            self._head += 1
+            self._cond.notify_all()
+            return float(self._times[slot]), float(self._stream_times[slot])
+
+    def close(self) -> None:
+        """Wake up waiting readers/writers; remaining frames can still be read."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class LiveReader:
+    """
+    Read a cv2.VideoCapture source on a background thread into a FrameRing.
+
+    Args:
+        source: Anything cv2.VideoCapture accepts (camera index, RTSP/HTTP URL,
+            GStreamer pipeline, file path)
+        sample_fps: Frames per second to keep (others are only grabbed);
+            None keeps every frame
+        img_size: Model input frame size
+        dtype: Model input dtype ("uint8" or "float32")
+        buffer_size: Ring capacity in frames
+        drop_policy: One of DROP_POLICIES
+        realtime: Pace reading to the source's FPS. Use it to replay a file
+            as if it were a live camera; live sources pace themselves.
+    """
+
+    def __init__(self, source, sample_fps: Optional[float] = None, img_size: int = 224,
+                 dtype: str = "uint8", buffer_size: int = 32, drop_policy: str = "drop_oldest",
+                 realtime: bool = False):
+        self.source = source
+        self.sample_fps = sample_fps
+        self.realtime = realtime
+        self.ring = FrameRing(buffer_size, (img_size, img_size, 3), dtype, drop_policy)
+        self._convert = FrameConverter(img_size=img_size, dtype=dtype)
+        self._scratch = np.empty((img_size, img_size, 3), dtype=dtype)
+
+        self._cap = cv2.VideoCapture(source)
+        if not self._cap.isOpened():
+            raise RuntimeError(f"Could not open video source: {source}")
+        fps = self._cap.get(cv2.CAP_PROP_FPS)
+        self.source_fps = fps if fps > 0 else 30.0
+
+        self.frames_read = 0
+        self.frames_sampled = 0
+        self._started = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "LiveReader":
+        self._started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.ring.close()
+        if self._started is None:
+            # Never started, so _run will not release the source
+            self._cap.release()
+        else:
+            self._thread.join()
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    @property
+    def capture_fps(self) -> float:
+        """Source frames read per second of wall-clock time."""
+        if self._started is None:
+            return 0.0
+        return self.frames_read / max(time.perf_counter() - self._started, 1e-9)
+
+    def _run(self):
+        sample_dt = 1.0 / self.sample_fps if self.sample_fps else 0.0
+        try:
+            while not self._stop.is_set():
+                if self.realtime:
+                    # Replay at the source's frame rate
+                    due = self._started + self.frames_read / self.source_fps
+                    delay = due - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                if not self._cap.grab():
+                    break
+                captured = time.perf_counter()
+                t = self.frames_read / self.source_fps
+                self.frames_read += 1
+
+                # Keep frames on the sample grid; skipped ones are never decoded
+                if sample_dt and t + 0.5 / self.source_fps < self.frames_sampled * sample_dt:
+                    continue
+                ret, raw = self._cap.retrieve()
+                if not ret:
+                    break
+                self.frames_sampled += 1
+                self.ring.put(self._convert(raw, self._scratch), captured, t)
+        finally:
+            self._cap.release()
+            self.ring.close()
+
+
+def monitor(reader: LiveReader, scorer: StreamingScorer) -> Iterator[Dict]:
+    """
+    Feed frames from a running LiveReader to a StreamingScorer.
+
+    Yields:
+        A dict every time the scorer emits a score, with 'score', 'label',
+        'stream_time_s' (source position of the newest scored frame), 'latency_ms' (capture of the
+        newest frame -> score available), 'capture_fps', 'processed_fps',
+        'frames_read', 'frames_processed' and 'dropped'
+    """
+    frame = np.empty(scorer.frame_shape, dtype=scorer.dtype)
+    started = time.perf_counter()
+    processed = 0
+
+    while True:
+        entry = reader.ring.get(frame, timeout=1.0)
+        if entry is None:
+            if not reader.running and len(reader.ring) == 0:
+                return
+            continue
+        captured, stream_time = entry
+
+        score = scorer.update(frame)
+        processed += 1
+        if score is None:
+            continue
+
+        now = time.perf_counter()
+        yield {
+            'score': score,
+            'label': get_label(score),
+            'stream_time_s': stream_time,
+            'latency_ms': (now - captured) * 1000,
+            'capture_fps': reader.capture_fps,
+            'processed_fps': processed / max(now - started, 1e-9),
+            'frames_read': reader.frames_read,
+            'frames_processed': processed,
+            'dropped': reader.ring.dropped,
+        }
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Monitor a live video source (RTSP, webcam, pipeline, or replayed file)"
+    )
+    parser.add_argument("--source", type=str, required=True,
+                        help="Camera index (e.g. 0), stream URL, GStreamer pipeline or video file")
+    parser.add_argument("--model", type=str, default=get_model_path(),
+                        help="Path to trained model (default: model/violence_model.h5)")
+    parser.add_argument("--window", type=float, default=5.0,
+                        help="Seconds covered by the model's frame sequence (default: 5)")
+    parser.add_argument("--emit-every", type=int, default=5,
+                        help="Emit a prediction every N sampled frames (default: 5)")
+    parser.add_argument("--buffer", type=int, default=32,
+                        help="Ring buffer capacity in frames (default: 32)")
+    parser.add_argument("--drop-policy", choices=DROP_POLICIES, default="drop_oldest",
+                        help="What to do when the buffer is full (default: drop_oldest)")
+    parser.add_argument("--realtime", action="store_true",
+                        help="Replay a file source at its native frame rate")
+
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.model):
+        print(f"ERROR: Model not found: {args.model}")
+        sys.exit(1)
+
+    print(f"Loading model from {args.model}...")
+    scorer = StreamingScorer(load_model(args.model), emit_every=args.emit_every)
+
+    source = int(args.source) if args.source.isdigit() else args.source
+    try:
+        reader = LiveReader(source, sample_fps=scorer.num_frames / args.window,
+                            img_size=scorer.frame_shape[0], dtype=scorer.dtype,
+                            buffer_size=args.buffer, drop_policy=args.drop_policy,
+                            realtime=args.realtime).start()
+    except RuntimeError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+    try:
+        for r in monitor(reader, scorer):
+            print(f"{r['stream_time_s']:8.2f}s  {r['score']:.4f} {r['label']:10s}  "
+                  f"latency {r['latency_ms']:7.1f} ms  capture {r['capture_fps']:5.1f} fps  "
+                  f"processed {r['processed_fps']:5.1f} fps  dropped {r['dropped']}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.stop()
+
+    print(f"\nRead {reader.frames_read} frames, sampled {reader.frames_sampled}, "
+          f"dropped {reader.ring.dropped}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,55 +4,177 @@ Memory-efficient streaming of video samples without loading entire dataset into
 """
 
 import os
+import json
 import math
 import numpy as np
 from pathlib import Path
-from typing import Generator, Tuple, List
+from typing import Generator, List, Optional, Tuple
 
 try:
     # When running as module
+    from src.cache_io import atomic_write_json
+    from src.dataset_index import CLASSES, index_dataset, is_usable, list_video_files
+    from src.frame_store import FrameStore
     from src.frames import extract_frames
 except ImportError:
     # When running directly
+    from cache_io import atomic_write_json
+    from dataset_index import CLASSES, index_dataset, is_usable, list_video_files
+    from frame_store import FrameStore
     from frames import extract_frames
 
+# Split manifest written to the data directory, and the seed it is drawn with
+SPLIT_MANIFEST = "split.json"
+SPLIT_SEED = 42
 
-def count_videos(data_dir: str = "data") -> Tuple[int, int]:
+
+def count_videos(data_dir: str = "data", num_frames: Optional[int] = 30) -> Tuple[int, int]:
     """
-    Count total videos in dataset without loading them.
+    Count usable videos in dataset without loading them.
+    
+    Videos the dataset index marks as unusable (undecodable, or fewer than
+    num_frames frames) are not counted.
     
     Args:
         data_dir: Root directory containing 'violent' and 'nonviolent' subdirectories
+        num_frames: Frames sampled per video, for the usability check
+            (None counts every file)
     
     Returns:
         (total_nonviolent, total_violent) counts
     """
-    nonviolent_count = 0
-    violent_count = 0
+    if num_frames is None:
+        labels = [label for _, label in list_video_files(data_dir)]
+    else:
+        labels = [entry['label'] for entry in index_dataset(data_dir) if is_usable(entry, num_frames)]
+    return labels.count(0), labels.count(1)
+
+
+def split_video_files(data_dir: str = "data", validation_split: float = 0.2, seed: int = SPLIT_SEED,
+                      manifest_path: Optional[str] = None,
+                      num_frames: Optional[int] = 30) -> Tuple[List[Tuple[str, int]], List[Tuple[str, int]]]:
+    """
+    Split video files into stratified train/validation lists without decoding them.
     
-    nonviolent_dir = os.path.join(data_dir, "nonviolent")
-    if os.path.isdir(nonviolent_dir):
-        nonviolent_count = len([f for f in os.listdir(nonviolent_dir) if os.path.isfile(os.path.join(nonviolent_dir, f))])
+    The split is drawn once per class with a fixed seed and persisted to a
+    manifest (data_dir/split.json by default), so every run, and every tool
+    (training, cached embeddings, export calibration), sees the same split.
+    Files that have disappeared are dropped from it. New files are shuffled
+    with the same seed and assigned so each class keeps its validation
+    fraction, without moving files that were already assigned. A manifest
+    made with another seed or validation_split is rebuilt.
     
-    violent_dir = os.path.join(data_dir, "violent")
-    if os.path.isdir(violent_dir):
-        violent_count = len([f for f in os.listdir(violent_dir) if os.path.isfile(os.path.join(violent_dir, f))])
+    Videos the dataset index marks as unusable (undecodable, or fewer than
+    num_frames frames) do not count towards the validation quota, are never
+    assigned to validation, and are left out of the returned lists.
     
-    return nonviolent_count, violent_count
+    Args:
+        data_dir: Root directory containing 'violent' and 'nonviolent' subdirectories
+        validation_split: Fraction of each class to use for validation
+        seed: Seed for shuffling files before they are assigned
+        manifest_path: Manifest location (default: data_dir/split.json)
+        num_frames: Frames sampled per video, for the usability check
+            (None keeps every file)
+    
+    Returns:
+        (train_files, val_files) lists of (video_path, label) tuples
+    """
+    manifest_path = manifest_path or os.path.join(data_dir, SPLIT_MANIFEST)
+    files = list_video_files(data_dir)
+    relative = {os.path.relpath(path, data_dir).replace(os.sep, "/"): (path, label) for path, label in files}
+    
+    if num_frames is None:
+        usable = set(relative)
+    else:
+        usable = {os.path.relpath(entry['path'], data_dir).replace(os.sep, "/")
+                  for entry in index_dataset(data_dir) if is_usable(entry, num_frames)}
+    
+    assigned = {}
+    if os.path.isfile(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get("seed") == seed and manifest.get("validation_split") == validation_split:
+            assigned = {rel: subset for subset in ("train", "val") for rel, _ in manifest[subset]}
+        else:
+            print(f"Split manifest {manifest_path} was made with other settings; rebuilding it")
+    
+    changed = len(assigned) == 0 or any(rel not in relative for rel in assigned)
+    assigned = {rel: subset for rel, subset in assigned.items() if rel in relative}
+    
+    rng = np.random.default_rng(seed)
+    for label in range(len(CLASSES)):
+        in_class = [rel for rel, (_, l) in relative.items() if l == label]
+        new = [rel for rel in in_class if rel not in assigned]
+        if not new:
+            continue
+        changed = True
+        # Quotas count only videos that can be used
+        candidates = [rel for rel in in_class if rel in usable]
+        num_val = len(candidates) - int(len(candidates) * (1 - validation_split))
+        missing_val = max(0, num_val - sum(assigned.get(rel) == "val" for rel in candidates))
+        for i in rng.permutation(len(new)):
+            if new[i] in usable and missing_val > 0:
+                assigned[new[i]] = "val"
+                missing_val -= 1
+            else:
+                assigned[new[i]] = "train"
+    
+    if changed and relative:
+        manifest = {"seed": seed, "validation_split": validation_split,
+                    "train": [[rel, relative[rel][1]] for rel in relative if assigned[rel] == "train"],
+                    "val": [[rel, relative[rel][1]] for rel in relative if assigned[rel] == "val"]}
+        try:
+            atomic_write_json(manifest_path, manifest, indent=1)
+        except OSError as e:
+            print(f"Warning: could not write split manifest {manifest_path}: {e}")
+    
+    train_files = [relative[rel] for rel in relative if assigned[rel] == "train" and rel in usable]
+    val_files = [relative[rel] for rel in relative if assigned[rel] == "val" and rel in usable]
+    return train_files, val_files
 
 
-def video_generator(data_dir: str = "data", num_frames: int = 30) -> Generator[Tuple[np.ndarray, int], None, None]:
+def interleave_classes(files: List[Tuple[str, int]], rng: np.random.Generator) -> List[Tuple[str, int]]:
+    """
+    Shuffle files within each class, then spread the classes evenly through the list.
+    
+    Each file of a class with n files gets a random position inside its own
+    1/n slot of the epoch; sorting all files by position interleaves the
+    classes in proportion, so any window of the result (e.g. a batch) holds
+    roughly the overall class mix.
+    
+    Args:
+        files: (video_path, label) tuples
+        rng: Random generator; each call draws a new order
+    
+    Returns:
+        The same tuples in the new order
+    """
+    positions = np.empty(len(files))
+    labels = np.array([label for _, label in files])
+    for label in np.unique(labels):
+        members = np.flatnonzero(labels == label)
+        n = len(members)
+        positions[rng.permutation(members)] = (np.arange(n) + rng.random(n)) / n
+    return [files[i] for i in np.argsort(positions, kind="stable")]
+
+
+def video_generator(data_dir: str = "data", num_frames: int = 30,
+                    frame_dtype: str = "float32",
+                    img_size: int = 224) -> Generator[Tuple[np.ndarray, int], None, None]:
     """
     Generator that yields (frames, label) for each video one at a time.
-    Memory-efficient: does not load all videos into RAM.
+    Memory-efficient: does not load all videos into RAM. Videos the dataset
+    index marks as unusable are skipped without being decoded.
     
     Args:
         data_dir: Root directory containing 'violent' and 'nonviolent' subdirectories
         num_frames: Number of frames to extract per video
+        frame_dtype: "float32" (scaled to [0, 1]) or "uint8" (raw pixels)
+        img_size: Frame height and width (the model's input resolution)
     
     Yields:
         (frames, label) tuples where:
-            - frames: np.ndarray of shape (num_frames, 224, 224, 3), dtype float32
+            - frames: np.ndarray of shape (num_frames, img_size, img_size, 3), dtype frame_dtype
             - label: int (0 for nonviolent, 1 for violent)
     """
     
@@ -61,34 +183,30 @@ def video_generator(data_dir: str = "data", num_frames: int = 30) -> Generator[T
         print(f"Error: Data directory '{data_dir}' not found.")
         return
     
-    # Process nonviolent videos (label 0)
-    nonviolent_dir = os.path.join(data_dir, "nonviolent")
-    if os.path.isdir(nonviolent_dir):
-        for video_file in os.listdir(nonviolent_dir):
-            video_path = os.path.join(nonviolent_dir, video_file)
-            if os.path.isfile(video_path):
-                frames = extract_frames(video_path, num_frames=num_frames)
-                if frames is not None:
-                    yield frames, np.int32(0)
-    
-    # Process violent videos (label 1)
-    violent_dir = os.path.join(data_dir, "violent")
-    if os.path.isdir(violent_dir):
-        for video_file in os.listdir(violent_dir):
-            video_path = os.path.join(violent_dir, video_file)
-            if os.path.isfile(video_path):
-                frames = extract_frames(video_path, num_frames=num_frames)
-                if frames is not None:
-                    yield frames, np.int32(1)
+    # The index leaves out videos extract_frames would reject, without decoding them
+    for entry in index_dataset(data_dir):
+        if not is_usable(entry, num_frames):
+            continue
+        frames = extract_frames(entry['path'], num_frames=num_frames, img_size=img_size, dtype=frame_dtype)
+        if frames is not None:
+            yield frames, np.int32(entry['label'])
 
 
 def get_dataset_split(data_dir: str = "data", num_frames: int = 30, 
                      batch_size: int = 8, validation_split: float = 0.2, 
-                     epochs: int = 10) -> Tuple:
+                     epochs: int = 10, frame_dtype: str = "float32",
+                     img_size: int = 224, shuffle_buffer: int = 0,
+                     seed: Optional[int] = None, num_parallel_calls: Optional[int] = None,
+                     deterministic: bool = False,
+                     frame_store: Optional[FrameStore] = None) -> Tuple:
     """
     Create tf.data.Dataset objects for training and validation without loading full dataset.
-    Uses stratified split to ensure both classes are in both train and validation sets.
+    Uses the stratified split from split_video_files (persisted in data_dir/split.json),
+    so both classes are in both sets and each generator decodes only its own videos.
     Training dataset is repeated for multiple epochs; validation dataset is not repeated.
+    Training files are reshuffled and class-interleaved every epoch before any
+    video is decoded, so no large buffer of decoded samples is needed. Both
+    datasets start from file paths and decode videos in parallel.
     
     Args:
         data_dir: Root directory containing 'violent' and 'nonviolent' subdirectories
@@ -96,6 +214,22 @@ def get_dataset_split(data_dir: str = "data", num_frames: int = 30,
         batch_size: Batch size for training
         validation_split: Fraction of data to use for validation (default 0.2)
         epochs: Number of training epochs (used for repeating train dataset)
+        frame_dtype: "float32" (scaled to [0, 1]) or "uint8" (raw pixels, 4x less
+            memory in shuffle/prefetch buffers; model must normalize in-graph)
+        img_size: Frame height and width (the model's input resolution)
+        shuffle_buffer: Optional sample-level shuffle buffer on top of the file
+            order, in decoded samples (default 0: none). Each sample holds
+            num_frames * img_size^2 * 3 values of frame_dtype
+        seed: Seed for the per-epoch file order and the shuffle buffer (default:
+            different every run). A seed also turns on deterministic, since
+            parallel decoding would otherwise reorder the seeded file order
+        num_parallel_calls: Videos decoded concurrently (default: tf.data.AUTOTUNE,
+            which scales with the available cores)
+        deterministic: Keep samples in file order when decoding in parallel. The
+            default lets a fast video overtake a slow one, so one long decode
+            never stalls the batch behind it (always on when seed is given)
+        frame_store: Optional compiled FrameStore with the same num_frames and
+            img_size; stored videos are read from it instead of decoded
     
     Returns:
         (train_dataset, val_dataset, train_steps, val_steps, class_counts)
@@ -109,10 +243,19 @@ def get_dataset_split(data_dir: str = "data", num_frames: int = 30,
     
     import tensorflow as tf
     
-    print("Creating dataset generators...")
-    
-    # Count videos first
-    nonviolent_count, violent_count = count_videos(data_dir)
+    print("Creating dataset pipelines...")
+    
+    # Split file paths once (persisted in the split manifest); counts come from
+    # the split itself, so no video is decoded just to be skipped
+    # Videos extract_frames would reject are left out, so the step counts are exact
+    train_files, val_files = split_video_files(data_dir, validation_split, num_frames=num_frames)
+    skipped = len(list_video_files(data_dir)) - len(train_files) - len(val_files)
+    nonviolent_train = sum(1 for _, label in train_files if label == 0)
+    violent_train = len(train_files) - nonviolent_train
+    nonviolent_val = sum(1 for _, label in val_files if label == 0)
+    violent_val = len(val_files) - nonviolent_val
+    nonviolent_count = nonviolent_train + nonviolent_val
+    violent_count = violent_train + violent_val
     total_count = nonviolent_count + violent_count
     
     if total_count == 0:
@@ -123,12 +266,8 @@ def get_dataset_split(data_dir: str = "data", num_frames: int = 30,
     print(f"  Nonviolent videos: {nonviolent_count}")
     print(f"  Violent videos: {violent_count}")
     print(f"  Total videos: {total_count}")
-    
-    # Calculate stratified split (80/20 for each class)
-    nonviolent_train = int(nonviolent_count * (1 - validation_split))
-    nonviolent_val = nonviolent_count - nonviolent_train
-    violent_train = int(violent_count * (1 - validation_split))
-    violent_val = violent_count - violent_train
+    if skipped:
+        print(f"  Skipped (undecodable or fewer than {num_frames} frames): {skipped}")
     
     train_count = nonviolent_train + violent_train
     val_count = nonviolent_val + violent_val
@@ -141,95 +280,71 @@ def get_dataset_split(data_dir: str = "data", num_frames: int = 30,
     print(f"    - Nonviolent: {nonviolent_val}")
     print(f"    - Violent: {violent_val}")
     
-    # Define output signature for tf.data.Dataset
-    output_signature = (
-        tf.TensorSpec(shape=(num_frames, 224, 224, 3), dtype=tf.float32),
-        tf.TensorSpec(shape=(), dtype=tf.int32)
-    )
-    
-    # Create train generator (80% of each class)
-    def train_gen():
-        nonviolent_count = 0
-        violent_count = 0
-        
-        # Generate nonviolent training samples
-        nonviolent_dir = os.path.join(data_dir, "nonviolent")
-        if os.path.isdir(nonviolent_dir):
-            for video_file in os.listdir(nonviolent_dir):
-                if nonviolent_count >= nonviolent_train:
-                    break
-                video_path = os.path.join(nonviolent_dir, video_file)
-                if os.path.isfile(video_path):
-                    frames = extract_frames(video_path, num_frames=num_frames)
-                    if frames is not None:
-                        yield frames, np.int32(0)
-                        nonviolent_count += 1
-        
-        # Generate violent training samples
-        violent_dir = os.path.join(data_dir, "violent")
-        if os.path.isdir(violent_dir):
-            for video_file in os.listdir(violent_dir):
-                if violent_count >= violent_train:
-                    break
-                video_path = os.path.join(violent_dir, video_file)
-                if os.path.isfile(video_path):
-                    frames = extract_frames(video_path, num_frames=num_frames)
-                    if frames is not None:
-                        yield frames, np.int32(1)
-                        violent_count += 1
-    
-    # Create validation generator (20% of each class)
-    def val_gen():
-        nonviolent_count = 0
-        violent_count = 0
-        nonviolent_skip = 0
-        violent_skip = 0
-        
-        # Skip nonviolent training samples, collect validation samples
-        nonviolent_dir = os.path.join(data_dir, "nonviolent")
-        if os.path.isdir(nonviolent_dir):
-            for video_file in os.listdir(nonviolent_dir):
-                if nonviolent_count >= nonviolent_val:
-                    break
-                video_path = os.path.join(nonviolent_dir, video_file)
-                if os.path.isfile(video_path):
-                    frames = extract_frames(video_path, num_frames=num_frames)
-                    if frames is not None:
-                        if nonviolent_skip < nonviolent_train:
-                            nonviolent_skip += 1
-                        else:
-                            yield frames, np.int32(0)
-                            nonviolent_count += 1
-        
-        # Skip violent training samples, collect validation samples
-        violent_dir = os.path.join(data_dir, "violent")
-        if os.path.isdir(violent_dir):
-            for video_file in os.listdir(violent_dir):
-                if violent_count >= violent_val:
-                    break
-                video_path = os.path.join(violent_dir, video_file)
-                if os.path.isfile(video_path):
-                    frames = extract_frames(video_path, num_frames=num_frames)
-                    if frames is not None:
-                        if violent_skip < violent_train:
-                            violent_skip += 1
-                        else:
-                            yield frames, np.int32(1)
-                            violent_count += 1
-    
-    # Create tf.data.Dataset from generators
-    train_dataset = tf.data.Dataset.from_generator(
-        train_gen,
-        output_signature=output_signature
-    )
-    
-    val_dataset = tf.data.Dataset.from_generator(
-        val_gen,
-        output_signature=output_signature
-    )
-    
-    # Shuffle training data (before repeat for better randomization)
-    train_dataset = train_dataset.shuffle(buffer_size=min(1000, train_count))
+    # Decode one video inside the tf.data graph. extract_frames runs in
+    # numpy_function on TensorFlow's thread pool; OpenCV releases the GIL while
+    # decoding and resizing, so several videos are decoded at once. A video that
+    # fails anyway is flagged and filtered out instead of stopping the epoch.
+    frame_shape = (num_frames, img_size, img_size, 3)
+    if frame_store is not None and frame_store.sample_shape != frame_shape:
+        raise ValueError(f"Frame store holds {frame_store.sample_shape} samples, "
+                         f"the dataset needs {frame_shape}")
+    
+    def decode(video_path):
+        if frame_store is not None:
+            # A view of the memory-mapped store; TensorFlow copies it once into the tensor
+            stored = frame_store.get(video_path.decode())
+            if stored is not None:
+                if frame_dtype == "uint8":
+                    return stored, True
+                return np.divide(stored, np.float32(255.0), dtype=np.float32), True
+        frames = extract_frames(video_path.decode(), num_frames=num_frames, img_size=img_size, dtype=frame_dtype)
+        if frames is None:
+            return np.zeros(frame_shape, dtype=frame_dtype), False
+        return frames, True
+    
+    def decode_fn(video_path, label):
+        frames, ok = tf.numpy_function(decode, [video_path], (tf.as_dtype(frame_dtype), tf.bool),
+                                       stateful=False)
+        frames.set_shape(frame_shape)
+        return frames, label, ok
+    
+    def decoded(frames, label, ok):
+        return ok
+    
+    def drop_flag(frames, label, ok):
+        return frames, label
+    
+    # Each dataset starts from the file paths of its own split. The training
+    # paths come from a generator that repeat() restarts every epoch, so every
+    # epoch draws a new order; decoding is the expensive step and runs in parallel
+    rng = np.random.default_rng(seed)
+    deterministic = deterministic or seed is not None
+    parallel = tf.data.AUTOTUNE if num_parallel_calls is None else num_parallel_calls
+    path_signature = (tf.TensorSpec(shape=(), dtype=tf.string), tf.TensorSpec(shape=(), dtype=tf.int32))
+    
+    def make_paths(files, shuffle=False):
+        if not shuffle:
+            return tf.data.Dataset.from_tensor_slices((
+                tf.constant([path for path, _ in files], dtype=tf.string),
+                tf.constant([label for _, label in files], dtype=tf.int32)
+            ))
+        def gen():
+            for video_path, label in interleave_classes(files, rng):
+                yield video_path, np.int32(label)
+        return tf.data.Dataset.from_generator(gen, output_signature=path_signature)
+    
+    def make_dataset(files, shuffle=False):
+        dataset = make_paths(files, shuffle)
+        dataset = dataset.map(decode_fn, num_parallel_calls=parallel, deterministic=deterministic)
+        return dataset.filter(decoded).map(drop_flag)
+    
+    train_dataset = make_dataset(train_files, shuffle=True)
+    val_dataset = make_dataset(val_files)
+    
+    # Files are already shuffled; a sample buffer only adds local mixing and
+    # holds that many decoded videos in memory
+    if shuffle_buffer > 1:
+        train_dataset = train_dataset.shuffle(buffer_size=min(shuffle_buffer, train_count), seed=seed)
     
     # Add batching and prefetching for performance
     train_dataset = train_dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
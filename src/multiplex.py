@@ -0,0 +1,301 @@
+"""
+Multiplex many live video sources through a single model instance.
+
+Running one predict process per camera multiplies memory by the number of
+feeds. StreamMultiplexer instead keeps one model and one LiveReader per
+source (see src/live.py). On every tick it:
+
+    1. drains new frames from all readers round-robin, one frame per stream
+       at a time, and encodes them in one frame encoder call. Each
+       embedding goes into the stream's EmbeddingRing, so every frame is
+       encoded once however many windows it ends up in.
+    2. picks the streams that are due for a score, earliest deadline first.
+       It assembles each one's latest num_frames window from its ring and
+       scores up to max_batch_size windows in one temporal head call.
+
+Each stream is due every `interval_s` seconds once it has a full window.
+Streams that did not fit in a batch keep their earlier deadline, so they
+go first on the next tick; no feed can be starved by the others. A score
+whose newest frame is older than `deadline_ms` counts as a missed deadline.
+
+Local files replayed at real-time speed (--realtime) stand in for cameras.
+
+Usage:
+    python -m src.multiplex --source rtsp://cam1/stream --source rtsp://cam2/stream
+    python -m src.multiplex --source a.mp4 --source b.mp4 --source c.mp4 --realtime
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from typing import Dict, Iterator, List, Sequence
+
+try:
+    # When running as module: python -m src.multiplex
+    from src.embeddings import EmbeddingRing
+    from src.live import DROP_POLICIES, LiveReader
+    from src.model_download import get_model_path
+    from src.net import load_model, model_input_dtype, split_model
+    from src.predict import get_label
+except ImportError:
+    # When running directly
+    from embeddings import EmbeddingRing
+    from live import DROP_POLICIES, LiveReader
+    from model_download import get_model_path
+    from net import load_model, model_input_dtype, split_model
+    from predict import get_label
+
+
+class _Stream:
+    """Per-source state kept by StreamMultiplexer."""
+
+    def __init__(self, index: int, source, reader: LiveReader, ring: EmbeddingRing):
+        self.index = index
+        self.source = source
+        self.reader = reader
+        self.ring = ring
+        self.newest_capture = 0.0   # capture time of the newest encoded frame
+        self.newest_stream_time = 0.0  # source position (s) of the newest encoded frame
+        self.scored_end = 0         # ring.end when the stream was last scored
+        self.due = None             # time the next score is due (None until a window is full)
+        self.scores = 0
+        self.missed = 0
+
+
+class StreamMultiplexer:
+    """
+    Score N live sources with one batched model.
+
+    Args:
+        model: Trained end-to-end model (build_model layout)
+        sources: cv2.VideoCapture sources (camera indices, URLs, files)
+        window_s: Seconds covered by one window of num_frames samples
+        interval_s: Seconds between scores of the same stream
+        max_batch_size: Windows per temporal head call
+        frame_batch_size: Frames per frame encoder call
+        deadline_ms: Latency budget from frame capture to score
+        buffer_size: Frame ring capacity per stream
+        drop_policy: Ring policy when a stream gets ahead of the model
+        realtime: Replay file sources at their native frame rate
+    """
+
+    def __init__(self, model, sources: Sequence, window_s: float = 5.0, interval_s: float = 1.0,
+                 max_batch_size: int = 8, frame_batch_size: int = 32, deadline_ms: float = 500.0,
+                 buffer_size: int = 32, drop_policy: str = "drop_oldest", realtime: bool = False):
+        self.encoder, self.head = split_model(model)
+        self.num_frames = model.inputs[0].shape[1]
+        img_size = model.inputs[0].shape[2]
+        dtype = model_input_dtype(model)
+        feature_dim = self.encoder.outputs[0].shape[-1]
+
+        self.interval_s = interval_s
+        self.max_batch_size = max_batch_size
+        self.frame_batch_size = frame_batch_size
+        self.deadline_s = deadline_ms / 1000.0
+
+        self.streams: List[_Stream] = []
+        try:
+            for index, source in enumerate(sources):
+                reader = LiveReader(source, sample_fps=self.num_frames / window_s, img_size=img_size,
+                                    dtype=dtype, buffer_size=buffer_size, drop_policy=drop_policy,
+                                    realtime=realtime)
+                ring = EmbeddingRing(self.num_frames + frame_batch_size, feature_dim)
+                self.streams.append(_Stream(index, source, reader, ring))
+        except Exception:
+            # A later source failed to open; release the ones already open
+            self.stop()
+            raise
+
+        self._frames = np.empty((frame_batch_size, img_size, img_size, 3), dtype=dtype)
+        self._windows = np.empty((max_batch_size, self.num_frames, feature_dim), dtype=np.float32)
+        self._next_stream = 0
+        self.batches = 0
+
+        # Warm up both halves so the first tick is not slow
+        self.encoder.predict(self._frames[:1], verbose=0)
+        self.head.predict(self._windows[:1], verbose=0)
+
+    def start(self) -> "StreamMultiplexer":
+        for stream in self.streams:
+            stream.reader.start()
+        return self
+
+    def stop(self) -> None:
+        for stream in self.streams:
+            stream.reader.stop()
+
+    @property
+    def running(self) -> bool:
+        return any(stream.reader.running or len(stream.reader.ring) for stream in self.streams)
+
+    def _encode_new_frames(self) -> int:
+        """Drain readers round-robin into one encoder batch; returns frames encoded."""
+        owners = []
+        captured = []
+        active = list(range(len(self.streams)))
+        # Rotate the starting stream so no stream always gets the last slots
+        active = active[self._next_stream:] + active[:self._next_stream]
+        self._next_stream = (self._next_stream + 1) % len(self.streams)
+
+        while active and len(owners) < self.frame_batch_size:
+            for i in list(active):
+                if len(owners) == self.frame_batch_size:
+                    break
+                entry = self.streams[i].reader.ring.get(self._frames[len(owners)], timeout=0)
+                if entry is None:
+                    active.remove(i)
+                    continue
+                owners.append(i)
+                captured.append(entry)
+
+        if not owners:
+            return 0
+
+        embeddings = self.encoder.predict(self._frames[:len(owners)], batch_size=len(owners), verbose=0)
+        owners = np.array(owners)
+        for i in np.unique(owners):
+            # Frames of one stream keep their order within the batch
+            stream = self.streams[i]
+            stream.ring.append(embeddings[owners == i])
+            stream.newest_capture, stream.newest_stream_time = captured[int(np.flatnonzero(owners == i)[-1])]
+            if stream.due is None and stream.ring.end >= self.num_frames:
+                stream.due = time.perf_counter()
+        return len(owners)
+
+    def _score_due_streams(self) -> List[Dict]:
+        """Score up to max_batch_size due streams, earliest deadline first."""
+        now = time.perf_counter()
+        due = [s for s in self.streams
+               if s.due is not None and s.due <= now and s.ring.end > s.scored_end]
+        if not due:
+            return []
+        due.sort(key=lambda s: s.due)
+        batch = due[:self.max_batch_size]
+
+        for slot, stream in enumerate(batch):
+            stream.ring.window(stream.ring.end - self.num_frames, self.num_frames,
+                               out=self._windows[slot])
+        predictions = self.head.predict(self._windows[:len(batch)], verbose=0)
+        done = time.perf_counter()
+        self.batches += 1
+
+        results = []
+        for stream, prediction in zip(batch, predictions):
+            latency = done - stream.newest_capture
+            missed = latency > self.deadline_s
+            stream.scores += 1
+            stream.missed += missed
+            stream.scored_end = stream.ring.end
+            # Stay on the interval grid, but do not build up a backlog after a stall
+            stream.due = max(stream.due + self.interval_s, done)
+            score = float(prediction[0])
+            results.append({
+                'stream': stream.index,
+                'source': str(stream.source),
+                'score': score,
+                'label': get_label(score),
+                'stream_time_s': stream.newest_stream_time,
+                'latency_ms': latency * 1000,
+                'deadline_missed': missed,
+                'batch_size': len(batch),
+                'dropped': stream.reader.ring.dropped,
+            })
+        return results
+
+    def run(self) -> Iterator[Dict]:
+        """
+        Run the multiplexer until every source is exhausted.
+
+        Yields:
+            One dict per stream score with 'stream', 'source', 'score',
+            'label', 'stream_time_s', 'latency_ms', 'deadline_missed',
+            'batch_size' and 'dropped'
+        """
+        while self.running:
+            encoded = self._encode_new_frames()
+            results = self._score_due_streams()
+            yield from results
+            if not encoded and not results:
+                time.sleep(0.005)
+
+    def stats(self) -> List[Dict]:
+        """Per-stream counters: frames read/sampled/dropped, scores, missed deadlines, capture FPS."""
+        return [{
+            'stream': s.index,
+            'source': str(s.source),
+            'frames_read': s.reader.frames_read,
+            'frames_sampled': s.reader.frames_sampled,
+            'dropped': s.reader.ring.dropped,
+            'scores': s.scores,
+            'missed_deadlines': s.missed,
+            'capture_fps': s.reader.capture_fps,
+        } for s in self.streams]
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Monitor several video sources with one batched model"
+    )
+    parser.add_argument("--source", action="append", required=True,
+                        help="Camera index, stream URL, pipeline or video file; repeat per stream")
+    parser.add_argument("--model", type=str, default=get_model_path(),
+                        help="Path to trained model (default: model/violence_model.h5)")
+    parser.add_argument("--window", type=float, default=5.0,
+                        help="Seconds covered by the model's frame sequence (default: 5)")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="Seconds between scores of each stream (default: 1)")
+    parser.add_argument("--max-batch-size", type=int, default=8,
+                        help="Windows per forward pass (default: 8)")
+    parser.add_argument("--deadline-ms", type=float, default=500.0,
+                        help="Capture-to-score latency budget (default: 500)")
+    parser.add_argument("--buffer", type=int, default=32,
+                        help="Frame buffer per stream (default: 32)")
+    parser.add_argument("--drop-policy", choices=DROP_POLICIES, default="drop_oldest",
+                        help="What to do when a stream's buffer is full (default: drop_oldest)")
+    parser.add_argument("--realtime", action="store_true",
+                        help="Replay file sources at their native frame rate")
+
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.model):
+        print(f"ERROR: Model not found: {args.model}")
+        sys.exit(1)
+
+    print(f"Loading model from {args.model}...")
+    model = load_model(args.model)
+
+    sources = [int(s) if s.isdigit() else s for s in args.source]
+    try:
+        mux = StreamMultiplexer(model, sources, window_s=args.window, interval_s=args.interval,
+                                max_batch_size=args.max_batch_size, deadline_ms=args.deadline_ms,
+                                buffer_size=args.buffer, drop_policy=args.drop_policy,
+                                realtime=args.realtime)
+    except RuntimeError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+    print(f"Monitoring {len(sources)} streams...")
+    mux.start()
+    try:
+        for r in mux.run():
+            print(f"[{r['stream']}] {r['stream_time_s']:8.2f}s  {r['score']:.4f} {r['label']:10s}  "
+                  f"latency {r['latency_ms']:7.1f} ms{' (missed)' if r['deadline_missed'] else ''}  "
+                  f"batch {r['batch_size']}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mux.stop()
+
+    print("\n" + "=" * 60)
+    print(f"SUMMARY ({mux.batches} batches)")
+    print("=" * 60)
+    for s in mux.stats():
+        print(f"[{s['stream']}] {s['source']}: {s['scores']} scores, {s['missed_deadlines']} missed, "
+              f"{s['dropped']} dropped of {s['frames_sampled']} sampled, {s['capture_fps']:.1f} fps")
+
+
+if __name__ == "__main__":
+    main()
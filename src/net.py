@@ -1,61 +1,480 @@
 """
-Build ResNet50 + LSTM model for violence detection.
+Build CNN backbone + LSTM model for violence detection.
+
+The per-frame backbone is ResNet50 by default; MobileNetV3 (Small/Large) and
+EfficientNet-B0 are cheaper alternatives (see BACKBONES), and the input
+resolution is configurable.
+
+The model is also available as two separately callable parts: a per-frame
+encoder (backbone + global average pooling) and a temporal head (LSTM or GRU
++ dense stack), either built fresh or split out of a trained end-to-end model.
 """
 
+import numpy as np
+import tensorflow as tf
+from typing import Optional, Tuple
 from tensorflow import keras
 from tensorflow.keras import layers
-from tensorflow.keras.applications import ResNet50
+from tensorflow.keras.applications import EfficientNetB0, MobileNetV3Large, MobileNetV3Small, ResNet50
+
+# ImageNet channel means (BGR order) used by ResNet50's "caffe" preprocessing
+_CAFFE_MEAN_BGR = (103.939, 116.779, 123.68)
+
+
+@keras.utils.register_keras_serializable(package="violence_ai")
+class FramePreprocessing(layers.Layer):
+    """
+    Cast raw uint8 RGB frames to float32 and normalize them in-graph.
+
+    Modes:
+        - "unit": scale to [0, 1] (what float32 extract_frames output provides)
+        - "caffe": ResNet50 preprocessing (RGB -> BGR, subtract ImageNet means)
+        - "pixels": float pixel values in [0, 255] for backbones that normalize
+          internally (MobileNetV3, EfficientNet); float inputs in [0, 1] are
+          scaled up by 255
+    """
+
+    MODES = ("unit", "caffe", "pixels")
+
+    def __init__(self, mode: str = "caffe", **kwargs):
+        super().__init__(**kwargs)
+        if mode not in self.MODES:
+            raise ValueError(f"mode must be one of {self.MODES}, got '{mode}'")
+        self.mode = mode
+
+    def call(self, inputs):
+        x = tf.cast(inputs, tf.float32)
+        if self.mode == "unit":
+            return x / 255.0
+        if self.mode == "pixels":
+            return x * 255.0 if tf.as_dtype(inputs.dtype).is_floating else x
+        x = x[..., ::-1]
+        return x - tf.constant(_CAFFE_MEAN_BGR, dtype=tf.float32)
+
+    def compute_output_shape(self, input_shape):
+        return input_shape
+
+    def get_config(self):
+        config = super().get_config()
+        config.update({"mode": self.mode})
+        return config
+
+
+@keras.utils.register_keras_serializable(package="violence_ai")
+class FrameBatched(layers.Wrapper):
+    """
+    Apply a per-frame layer to every frame of every video in a single call.
+
+    Drop-in replacement for TimeDistributed: (batch, T, ...) inputs are folded
+    to (batch * T, ...), run through the wrapped layer as one large batch and
+    unfolded again. TimeDistributed instead calls the layer once per time step,
+    which for a ResNet50 backbone means T small convolution batches plus
+    stacking/transposing copies.
+    """
+
+    def call(self, inputs, training=None):
+        shape = tf.shape(inputs)
+        frames = tf.reshape(inputs, tf.concat([[-1], shape[2:]], axis=0))
+        outputs = self.layer(frames, training=training)
+        return tf.reshape(outputs, tf.concat([shape[:2], tf.shape(outputs)[1:]], axis=0))
+
+    def compute_output_shape(self, input_shape):
+        inner_shape = self.layer.compute_output_shape((None,) + tuple(input_shape[2:]))
+        return (input_shape[0], input_shape[1]) + tuple(inner_shape[1:])
 
 
-def build_model(num_frames: int = 30) -> keras.Model:
+# Wrappers that apply a per-frame layer across the time axis
+_FRAME_WRAPPERS = (layers.TimeDistributed, FrameBatched)
+
+
+# Per-frame backbones: keras.applications constructor, FramePreprocessing mode
+# for uint8 frames and pooled feature size. ResNet50 takes float32 frames in
+# [0, 1] as they are; the others normalize internally and need "pixels".
+BACKBONES = {
+    "resnet50": (ResNet50, "caffe", 2048),
+    "mobilenet_v3_small": (MobileNetV3Small, "pixels", 576),
+    "mobilenet_v3_large": (MobileNetV3Large, "pixels", 960),
+    "efficientnet_b0": (EfficientNetB0, "pixels", 1280),
+}
+
+# Recurrent layers available for the temporal head (LSTM is the default;
+# GRU is cheaper and used by distilled students)
+TEMPORAL = {"lstm": layers.LSTM, "gru": layers.GRU}
+
+
+def _frame_layers(backbone: str, input_dtype: str, img_size: int,
+                  weights: Optional[str]) -> Tuple[Optional[layers.Layer], keras.Model]:
+    """Build the preprocessing layer (or None) and frozen backbone for one frame."""
+    if backbone not in BACKBONES:
+        raise ValueError(f"backbone must be one of {tuple(BACKBONES)}, got '{backbone}'")
+    if input_dtype not in ("float32", "uint8"):
+        raise ValueError(f"input_dtype must be 'float32' or 'uint8', got '{input_dtype}'")
+
+    constructor, mode, _ = BACKBONES[backbone]
+    preprocessing = None
+    if input_dtype == "uint8":
+        preprocessing = FramePreprocessing(mode=mode)
+    elif mode == "pixels":
+        preprocessing = FramePreprocessing(mode="pixels")
+
+    # Pretrained backbone without top classification layer, frozen
+    # (can be unfrozen for fine-tuning)
+    cnn = constructor(weights=weights, include_top=False, input_shape=(img_size, img_size, 3))
+    cnn.trainable = False
+    return preprocessing, cnn
+
+
+def build_model(num_frames: int = 30, input_dtype: str = "float32",
+                fold_time: bool = False, weights: Optional[str] = 'imagenet',
+                backbone: str = "resnet50", img_size: int = 224,
+                temporal: str = "lstm") -> keras.Model:
     """
-    Build ResNet50 + LSTM model for binary video classification.
-    
+    Build CNN backbone + LSTM model for binary video classification.
+
     Args:
         num_frames: Number of frames per video (default 30)
-    
+        input_dtype: "float32" to take frames already scaled to [0, 1] (default),
+            or "uint8" to take raw RGB frames and apply the backbone's preprocessing
+            inside the model, keeping host-side buffers 4x smaller
+        fold_time: Run the backbone on all batch * num_frames frames at once
+            (FrameBatched) instead of per time step (TimeDistributed). Both
+            variants have identical weights and outputs.
+        weights: Backbone initialization, 'imagenet' (default) or None for
+            random weights (benchmarks, or when weights are loaded afterwards)
+        backbone: One of BACKBONES (default "resnet50")
+        img_size: Frame height and width (default 224)
+        temporal: Recurrent layer of the head, one of TEMPORAL (default "lstm")
+
     Returns:
         Compiled keras model ready for training
     """
-    
-    # Input: (batch_size, num_frames, 224, 224, 3)
-    inputs = layers.Input(shape=(num_frames, 224, 224, 3), dtype='float32')
-    
-    # Load pretrained ResNet50 without top classification layer
-    resnet = ResNet50(weights='imagenet', include_top=False, input_shape=(224, 224, 3))
-    
-    # Freeze ResNet50 weights initially (can be unfrozen for fine-tuning)
-    resnet.trainable = False
-    
-    # TimeDistributed wrapper to apply ResNet50 to each frame independently
-    # Output shape: (batch_size, num_frames, 7, 7, 2048)
-    x = layers.TimeDistributed(resnet)(inputs)
-    
+    preprocessing, cnn = _frame_layers(backbone, input_dtype, img_size, weights)
+
+    # Input: (batch_size, num_frames, img_size, img_size, 3)
+    inputs = layers.Input(shape=(num_frames, img_size, img_size, 3), dtype=input_dtype)
+
+    # Cast + normalize on the accelerator instead of in the input pipeline
+    x = inputs
+    if preprocessing is not None:
+        x = preprocessing(x)
+
+    # Wrapper to apply the backbone to each frame independently
+    # Output shape: (batch_size, num_frames, h, w, feature_dim)
+    wrapper = FrameBatched if fold_time else layers.TimeDistributed
+    x = wrapper(cnn)(x)
+
     # Global Average Pooling on spatial dimensions for each frame
-    # Output shape: (batch_size, num_frames, 2048)
-    x = layers.TimeDistributed(layers.GlobalAveragePooling2D())(x)
-    
-    # LSTM layer to capture temporal dependencies
+    # Output shape: (batch_size, num_frames, feature_dim)
+    x = wrapper(layers.GlobalAveragePooling2D())(x)
+
+    # LSTM + dense classification stack
+    outputs = _temporal_layers(x, temporal)
+
+    # Create model
+    model = keras.Model(inputs=inputs, outputs=outputs)
+
+    # Compile model
+    _compile(model)
+
+    return model
+
+
+def _temporal_layers(x, temporal: str = "lstm"):
+    """Apply the LSTM (or GRU) + dense stack to per-frame features of shape (batch, T, D)."""
+    if temporal not in TEMPORAL:
+        raise ValueError(f"temporal must be one of {tuple(TEMPORAL)}, got '{temporal}'")
+
+    # Recurrent layer to capture temporal dependencies
     # Output shape: (batch_size, 128)
-    x = layers.LSTM(128, return_sequences=False)(x)
-    
+    x = TEMPORAL[temporal](128, return_sequences=False)(x)
+
     # Dense layers
     x = layers.Dense(64, activation='relu')(x)
     x = layers.Dropout(0.5)(x)
     x = layers.Dense(32, activation='relu')(x)
     x = layers.Dropout(0.3)(x)
-    
+
     # Output layer with sigmoid for binary classification
-    outputs = layers.Dense(1, activation='sigmoid')(x)
-    
-    # Create model
-    model = keras.Model(inputs=inputs, outputs=outputs)
-    
-    # Compile model
+    return layers.Dense(1, activation='sigmoid')(x)
+
+
+def _compile(model: keras.Model, soft_targets: bool = False) -> None:
+    """
+    Compile with the optimizer, loss and metrics used for training.
+
+    Accuracy, precision and recall assume 0/1 labels (Precision and Recall
+    treat any non-zero target as positive), so models trained on soft targets
+    are compiled with the loss only.
+    """
     model.compile(
         optimizer=keras.optimizers.Adam(learning_rate=0.001),
         loss='binary_crossentropy',
-        metrics=['accuracy', keras.metrics.Precision(), keras.metrics.Recall()]
+        metrics=[] if soft_targets else ['accuracy', keras.metrics.Precision(), keras.metrics.Recall()]
     )
-    
+
+
+def build_frame_encoder(input_dtype: str = "float32", weights: Optional[str] = 'imagenet',
+                        backbone: str = "resnet50", img_size: int = 224) -> keras.Model:
+    """
+    Build the frozen per-frame feature extractor (backbone + global average pooling).
+
+    Produces the same per-frame features as the TimeDistributed part of
+    build_model with the same arguments.
+
+    Args:
+        input_dtype: "float32" or "uint8", as in build_model
+        weights: Backbone initialization, as in build_model
+        backbone: One of BACKBONES, as in build_model
+        img_size: Frame height and width, as in build_model
+
+    Returns:
+        Uncompiled keras model mapping (batch, img_size, img_size, 3) frames
+        to (batch, feature_dim)
+    """
+    preprocessing, cnn = _frame_layers(backbone, input_dtype, img_size, weights)
+
+    inputs = layers.Input(shape=(img_size, img_size, 3), dtype=input_dtype)
+
+    x = inputs
+    if preprocessing is not None:
+        x = preprocessing(x)
+
+    x = cnn(x)
+    outputs = layers.GlobalAveragePooling2D()(x)
+
+    return keras.Model(inputs=inputs, outputs=outputs, name="frame_encoder")
+
+
+def build_temporal_head(num_frames: int = 30, feature_dim: int = 2048,
+                        temporal: str = "lstm", soft_targets: bool = False) -> keras.Model:
+    """
+    Build the LSTM (or GRU) + dense classifier that runs on precomputed frame embeddings.
+
+    Args:
+        num_frames: Number of frames per video (default 30)
+        feature_dim: Size of each frame embedding (see BACKBONES; 2048 for ResNet50)
+        temporal: Recurrent layer, one of TEMPORAL (default "lstm")
+        soft_targets: Trained on probabilities rather than 0/1 labels (e.g.
+            distillation targets); compiled with the loss only
+
+    Returns:
+        Compiled keras model mapping (batch, num_frames, feature_dim) to (batch, 1)
+    """
+    inputs = layers.Input(shape=(num_frames, feature_dim), dtype='float32')
+    outputs = _temporal_layers(inputs, temporal)
+
+    model = keras.Model(inputs=inputs, outputs=outputs, name="temporal_head")
+    _compile(model, soft_targets=soft_targets)
+
     return model
+
+
+def _backbone(model: keras.Model) -> keras.Model:
+    """Return the nested backbone model, unwrapping TimeDistributed if needed."""
+    for layer in model.layers:
+        inner = layer.layer if isinstance(layer, _FRAME_WRAPPERS) else layer
+        if isinstance(inner, keras.Model):
+            return inner
+    raise ValueError(f"No backbone model found in '{model.name}'")
+
+
+def model_backbone(model: keras.Model) -> str:
+    """Return the BACKBONES key of a model's (or encoder's) backbone."""
+    name = _backbone(model).name.lower()
+    for key in BACKBONES:
+        if key.replace("_", "") == name:
+            return key
+    raise ValueError(f"Unknown backbone '{_backbone(model).name}' in '{model.name}'")
+
+
+def _head_layers(model: keras.Model) -> list:
+    """Return the weighted layers after the per-frame feature extractor, in order."""
+    head = []
+    for layer in model.layers:
+        if isinstance(layer, tuple(TEMPORAL.values())) or head:
+            if layer.weights:
+                head.append(layer)
+    return head
+
+
+def model_temporal(model: keras.Model) -> str:
+    """Return the TEMPORAL key of a model's (or head's) recurrent layer."""
+    for layer in model.layers:
+        for key, cls in TEMPORAL.items():
+            if isinstance(layer, cls):
+                return key
+    raise ValueError(f"No recurrent layer found in '{model.name}'")
+
+
+def assemble_model(encoder: keras.Model, head: keras.Model, num_frames: Optional[int] = None,
+                   img_size: Optional[int] = None) -> keras.Model:
+    """
+    Build a full end-to-end model carrying the weights of an encoder and a head.
+
+    The result has the same structure as build_model, so it can be saved and
+    used by predict.py and the Streamlit app like any other trained model.
+
+    Args:
+        encoder: Model from build_frame_encoder
+        head: Model from build_temporal_head (typically trained on cached embeddings)
+        num_frames: Frames per video (default: the head's)
+        img_size: Frame height and width (default: the encoder's)
+
+    Returns:
+        Compiled keras model taking (batch, num_frames, H, W, 3) frames
+    """
+    model = build_model(num_frames=num_frames or head.inputs[0].shape[1],
+                        input_dtype=model_input_dtype(encoder), weights=None,
+                        backbone=model_backbone(encoder), img_size=img_size or encoder.inputs[0].shape[1],
+                        temporal=model_temporal(head))
+
+    _backbone(model).set_weights(_backbone(encoder).get_weights())
+    for target, source in zip(_head_layers(model), _head_layers(head)):
+        target.set_weights(source.get_weights())
+
+    return model
+
+
+def resize_model(model: keras.Model, num_frames: Optional[int] = None,
+                 img_size: Optional[int] = None) -> keras.Model:
+    """
+    Rebuild a trained model for fewer frames and/or a smaller frame size, keeping its weights.
+
+    Neither the pooled backbone nor the recurrent head depends on these sizes,
+    so the result runs as is. It is cheaper, usually somewhat less accurate,
+    and suited as a first-stage screener (see src/cascade.py).
+
+    Args:
+        model: Trained end-to-end model
+        num_frames: Frames per video (default: unchanged)
+        img_size: Frame height and width (default: unchanged)
+
+    Returns:
+        Compiled keras model sharing no layers with `model`
+    """
+    encoder, head = split_model(model)
+    return assemble_model(encoder, head, num_frames=num_frames, img_size=img_size)
+
+
+def split_model(model: keras.Model) -> Tuple[keras.Model, keras.Model]:
+    """
+    Split a full end-to-end model into a frame encoder and a temporal head.
+
+    Works on any model with the build_model layout, including models saved
+    before the split API existed. The returned models share layers (and
+    therefore weights) with `model`; nothing is copied.
+
+    Args:
+        model: Full model taking (batch, num_frames, H, W, 3) frames
+
+    Returns:
+        (encoder, head) where encoder maps (batch, H, W, 3) frames to
+        (batch, feature_dim) embeddings and head maps
+        (batch, num_frames, feature_dim) embeddings to (batch, 1) scores
+    """
+    frame_shape = tuple(model.inputs[0].shape[2:])
+    num_frames = model.inputs[0].shape[1]
+
+    # Per-frame part: preprocessing plus everything wrapped in TimeDistributed
+    frame_layers = []
+    head_layers = []
+    for layer in model.layers[1:]:
+        if not head_layers and isinstance(layer, (FramePreprocessing,) + _FRAME_WRAPPERS):
+            frame_layers.append(layer.layer if isinstance(layer, _FRAME_WRAPPERS) else layer)
+        else:
+            head_layers.append(layer)
+
+    if not frame_layers or not head_layers:
+        raise ValueError(f"Model '{model.name}' does not have the build_model layout")
+
+    frames = layers.Input(shape=frame_shape, dtype=model_input_dtype(model))
+    x = frames
+    for layer in frame_layers:
+        x = layer(x)
+    encoder = keras.Model(inputs=frames, outputs=x, name="frame_encoder")
+
+    features = layers.Input(shape=(num_frames, x.shape[-1]), dtype='float32')
+    x = features
+    for layer in head_layers:
+        x = layer(x)
+    head = keras.Model(inputs=features, outputs=x, name="temporal_head")
+
+    return encoder, head
+
+
+def load_split_model(model_path: str = "model/violence_model.h5") -> Tuple[keras.Model, keras.Model]:
+    """
+    Load a trained model (e.g. violence_model.h5) as a frame encoder and temporal head.
+
+    Args:
+        model_path: Path to the saved end-to-end model
+
+    Returns:
+        (encoder, head) as returned by split_model
+    """
+    return split_model(load_model(model_path))
+
+
+def predict_split(encoder: keras.Model, head: keras.Model, videos: np.ndarray,
+                  frame_batch_size: int = 64) -> np.ndarray:
+    """
+    Score a batch of videos with a split model.
+
+    Frames of all videos are encoded together in batches of `frame_batch_size`,
+    independently of how many frames each video has, then regrouped per video
+    for the temporal head.
+
+    Args:
+        encoder: Frame encoder from split_model or build_frame_encoder
+        head: Temporal head from split_model or build_temporal_head
+        videos: Array of shape (batch, num_frames, H, W, 3)
+        frame_batch_size: Number of frames per encoder call
+
+    Returns:
+        np.ndarray of shape (batch, 1) with violence probabilities
+    """
+    batch, num_frames = videos.shape[:2]
+    frames = videos.reshape((batch * num_frames,) + videos.shape[2:])
+    embeddings = encoder.predict(frames, batch_size=frame_batch_size, verbose=0)
+    embeddings = embeddings.reshape(batch, num_frames, -1)
+    return head.predict(embeddings, batch_size=batch, verbose=0)
+
+
+def fold_time(model: keras.Model) -> keras.Model:
+    """
+    Convert a trained model to the FrameBatched (time folded into batch) layout.
+
+    The returned model shares its layers and weights with `model` and gives
+    the same outputs; it only changes how the backbone is batched.
+
+    Args:
+        model: Full model with the build_model layout
+
+    Returns:
+        Equivalent keras model running the frame encoder once per batch
+    """
+    encoder, head = split_model(model)
+    inputs = layers.Input(shape=tuple(model.inputs[0].shape[1:]), dtype=model_input_dtype(model))
+    outputs = head(FrameBatched(encoder)(inputs))
+    return keras.Model(inputs=inputs, outputs=outputs, name=f"{model.name}_folded")
+
+
+def load_model(model_path: str = "model/violence_model.h5") -> keras.Model:
+    """
+    Load a trained violence detection model, including custom layers.
+
+    Args:
+        model_path: Path to the saved model
+
+    Returns:
+        Loaded keras model
+    """
+    return keras.models.load_model(
+        model_path,
+        custom_objects={"FramePreprocessing": FramePreprocessing, "FrameBatched": FrameBatched},
+    )
+
+
+def model_input_dtype(model: keras.Model) -> str:
+    """Return the frame dtype a model expects ("float32" or "uint8")."""
+    return tf.as_dtype(model.inputs[0].dtype).name
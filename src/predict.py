@@ -3,31 +3,65 @@ Command-line interface for predicting violence in videos.
 
 Usage:
     python -m src.predict --video "path/to/video.mp4"
+    python -m src.predict --video a.mp4 b.mp4 c.mp4 --batch-size 4
+    python -m src.predict --video long_recording.mp4 --windowed --window 5 --stride 1
+    python -m src.predict --video clip.mp4 --model model/violence_model_dynamic.tflite
+    python -m src.predict --video clip.mp4 --model model/violence_model_encoder.onnx
+    python -m src.predict --video a.mp4 b.mp4 c.mp4 --cascade --band 0.2 0.8
 """
 
 import os
 import sys
+import time
+import queue
 import argparse
+import threading
+import cv2
 import numpy as np
-from tensorflow import keras
+from typing import Dict, Iterator, List, Optional, Tuple
 
 try:
     # When running as module: python -m src.predict
-    from src.frames import extract_frames
+    from src.backends import BACKENDS, as_backend, batch_buckets, load_backend
+    from src.frames import FrameConverter, extract_frames
+    from src.embeddings import EmbeddingRing
     from src.model_download import ensure_model_exists, get_model_path
+    from src.net import fold_time, load_model, model_input_dtype, split_model
 except ImportError:
     # When running directly
-    from frames import extract_frames
+    from backends import BACKENDS, as_backend, batch_buckets, load_backend
+    from frames import FrameConverter, extract_frames
+    from embeddings import EmbeddingRing
     from model_download import ensure_model_exists, get_model_path
+    from net import fold_time, load_model, model_input_dtype, split_model
 
+# Confidence above which a video is labelled violent
+THRESHOLD = 0.5
 
-def predict_video(video_path: str, model_path: str = "model/violence_model.h5"):
+# Keys of the result dicts produced by predict_videos, in output order
+RESULT_FIELDS = ["path", "label", "confidence", "decode_ms", "queue_ms",
+                 "inference_ms", "batch_size", "error"]
+
+# Marks the end of one decode thread's work in the ready queue
+_DECODER_DONE = object()
+
+
+def get_label(confidence: float) -> str:
+    """Map a violence confidence score to its label string."""
+    return "VIOLENT" if confidence > THRESHOLD else "NONVIOLENT"
+
+
+def predict_video(video_path: str, model_path: str = "model/violence_model.h5",
+                  backend: str = "auto", jit_compile: bool = False, fold: bool = False):
     """
     Load model and predict violence for a given video.
     
     Args:
         video_path: Path to the video file
-        model_path: Path to the trained model
+        model_path: Path to the trained model (Keras, or an exported .tflite/.onnx)
+        backend: Inference engine, one of backends.BACKENDS
+        jit_compile: Compile the Keras model with XLA (compiled backend)
+        fold: Run the backbone on all frames at once (net.fold_time)
     
     Returns:
         Tuple of (label_string, confidence_score)
@@ -46,11 +80,12 @@ def predict_video(video_path: str, model_path: str = "model/violence_model.h5"):
     
     # Load model
     print(f"Loading model from {model_path}...")
-    model = keras.models.load_model(model_path)
+    model = load_backend(model_path, backend, batch_sizes=(1,), jit_compile=jit_compile, fold=fold)
     
-    # Extract frames
+    # Extract frames (uint8 when the model normalizes in-graph)
     print(f"Extracting frames from {video_path}...")
-    frames = extract_frames(video_path, num_frames=30, img_size=224)
+    frames = extract_frames(video_path, num_frames=model.input_shape[0], img_size=model.input_shape[1],
+                            dtype=model.input_dtype)
     
     if frames is None:
         print(f"ERROR: Could not extract frames from video. Video may be corrupt or too short.")
@@ -61,15 +96,266 @@ def predict_video(video_path: str, model_path: str = "model/violence_model.h5"):
     
     # Predict
     print("Running prediction...")
-    prediction = model.predict(X, verbose=0)
+    prediction = model.predict(X)
     confidence = prediction[0][0]
     
     # Determine label
-    label = "VIOLENT" if confidence > 0.5 else "NONVIOLENT"
+    label = get_label(confidence)
     
     return label, confidence
 
 
+def predict_videos(video_paths: List[str], model, batch_size: int = 8,
+                   num_workers: Optional[int] = None, queue_depth: int = 16) -> Iterator[Dict]:
+    """
+    Score many videos with decode and inference running concurrently.
+
+    Decode threads (OpenCV releases the GIL) extract frames into a fixed pool
+    of `queue_depth` preallocated sample buffers and put them on a ready
+    queue; this generator drains the queue in batches of `batch_size` and
+    runs the model while the threads keep decoding. When all buffers are
+    full the decoders wait, so memory stays bounded however many videos
+    are queued. Throughput approaches that of the slower stage.
+
+    Args:
+        video_paths: Videos to score
+        model: Loaded end-to-end model or inference backend (see backends.py)
+        batch_size: Videos per forward pass
+        num_workers: Decode threads (default: CPU count)
+        queue_depth: Decoded videos that may wait for inference
+
+    Yields:
+        One result dict per video with the RESULT_FIELDS keys, in completion
+        order (not input order). Videos that cannot be decoded are reported
+        with label/confidence None and an error message.
+    """
+    model = as_backend(model)
+    sample_shape = model.input_shape
+    num_frames, img_size = sample_shape[0], sample_shape[1]
+    dtype = model.input_dtype
+    num_workers = max(1, min(num_workers or os.cpu_count(), len(video_paths)))
+
+    pending_paths = queue.Queue()
+    for path in video_paths:
+        pending_paths.put(path)
+
+    free_buffers = queue.Queue()
+    for _ in range(max(1, queue_depth)):
+        free_buffers.put(np.empty(sample_shape, dtype=dtype))
+
+    ready = queue.Queue()
+    stop = threading.Event()
+
+    def decoder():
+        while not stop.is_set():
+            try:
+                path = pending_paths.get_nowait()
+            except queue.Empty:
+                break
+
+            # Backpressure: wait for inference to hand a buffer back
+            buffer = None
+            while buffer is None and not stop.is_set():
+                try:
+                    buffer = free_buffers.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            if buffer is None:
+                break
+
+            start = time.perf_counter()
+            frames = extract_frames(path, num_frames=num_frames, img_size=img_size,
+                                    dtype=dtype, out=buffer)
+            decode_ms = (time.perf_counter() - start) * 1000
+            if frames is None:
+                free_buffers.put(buffer)
+                buffer = None
+            ready.put((path, buffer, decode_ms, time.perf_counter()))
+        ready.put(_DECODER_DONE)
+
+    threads = [threading.Thread(target=decoder, daemon=True) for _ in range(num_workers)]
+    for thread in threads:
+        thread.start()
+
+    batch = np.empty((batch_size,) + sample_shape, dtype=dtype)
+    batch_items = []  # (path, decode_ms, queue_ms) for each filled batch slot
+    finished = 0
+
+    try:
+        while finished < num_workers:
+            item = ready.get()
+            if item is _DECODER_DONE:
+                finished += 1
+            else:
+                path, buffer, decode_ms, ready_at = item
+                if buffer is None:
+                    yield {
+                        "path": path, "label": None, "confidence": None,
+                        "decode_ms": round(decode_ms, 1), "queue_ms": None,
+                        "inference_ms": None, "batch_size": None,
+                        "error": "could not extract frames (corrupt, missing or too short)",
+                    }
+                else:
+                    batch[len(batch_items)] = buffer
+                    free_buffers.put(buffer)
+                    batch_items.append((path, decode_ms, (time.perf_counter() - ready_at) * 1000))
+
+            if batch_items and (len(batch_items) == batch_size or finished == num_workers):
+                start = time.perf_counter()
+                predictions = model.predict(batch[:len(batch_items)])
+                inference_ms = (time.perf_counter() - start) * 1000
+
+                for (path, decode_ms, queue_ms), prediction in zip(batch_items, predictions):
+                    confidence = float(prediction[0])
+                    yield {
+                        "path": path, "label": get_label(confidence), "confidence": confidence,
+                        "decode_ms": round(decode_ms, 1), "queue_ms": round(queue_ms, 1),
+                        "inference_ms": round(inference_ms, 1), "batch_size": len(batch_items),
+                        "error": None,
+                    }
+                batch_items = []
+    finally:
+        # Also reached when the caller stops iterating early
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+def predict_windows(video_path: str, model, window_s: float = 5.0, stride_s: float = 1.0,
+                    batch_size: int = 8, frame_batch_size: int = 32,
+                    max_cache_mb: float = 64.0) -> List[Tuple[float, float, float]]:
+    """
+    Score a video window by window for temporal localization.
+
+    The video is decoded once, front to back. Frames are sampled at
+    num_frames / window_s per second so every window gets the model's
+    num_frames frames spread evenly over window_s seconds; skipped frames
+    are only grab()bed. Each sampled frame goes through the frame encoder
+    exactly once (frame_batch_size frames per call) and its embedding is kept
+    in an EmbeddingRing. Every stride_s seconds a window is assembled from
+    the cached embeddings and scored by the temporal head, batch_size windows
+    per call. With overlapping windows this saves most backbone work (75% at
+    stride = window / 4), and memory stays bounded however long the video is.
+
+    Args:
+        video_path: Path to the video file
+        model: Loaded end-to-end model
+        window_s: Window length in seconds
+        stride_s: Seconds between window starts
+        batch_size: Windows per temporal head call
+        frame_batch_size: Frames per encoder call
+        max_cache_mb: Memory cap for cached embeddings; frame_batch_size is
+            reduced to fit
+
+    Returns:
+        List of (start_s, end_s, score) tuples in time order. Empty if the
+        video is shorter than one window or cannot be opened.
+    """
+    encoder, head = split_model(model)
+    num_frames, img_size = model.inputs[0].shape[1], model.inputs[0].shape[2]
+    feature_dim = encoder.outputs[0].shape[-1]
+    dtype = model_input_dtype(model)
+
+    # The ring must hold one window plus one encoder batch of new frames
+    cache_frames = int(max_cache_mb * 1024 * 1024) // (feature_dim * 4)
+    frame_batch_size = min(frame_batch_size, cache_frames - num_frames)
+    if frame_batch_size < 1:
+        raise ValueError(f"max_cache_mb={max_cache_mb} cannot hold one {num_frames}-frame window")
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return []
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if fps <= 0:
+        fps = 30.0
+
+    sample_dt = window_s / num_frames          # seconds between samples
+    stride_samples = max(1, round(stride_s / sample_dt))
+
+    convert = FrameConverter(img_size=img_size, dtype=dtype)
+    ring = EmbeddingRing(num_frames + frame_batch_size, feature_dim)
+    frames = np.empty((frame_batch_size, img_size, img_size, 3), dtype=dtype)
+    windows = np.empty((batch_size, num_frames, feature_dim), dtype=np.float32)
+    window_spans = []
+    timeline = []
+    state = {'staged': 0, 'next_window': 0}
+
+    def score_windows():
+        predictions = head.predict(windows[:len(window_spans)], verbose=0)
+        for (start, end), prediction in zip(window_spans, predictions):
+            timeline.append((start, end, float(prediction[0])))
+        window_spans.clear()
+
+    def encode_frames():
+        staged = state['staged']
+        ring.append(encoder.predict(frames[:staged], batch_size=staged, verbose=0))
+        state['staged'] = 0
+
+        # Every window whose frames are now all encoded is assembled from the ring
+        while state['next_window'] + num_frames <= ring.end:
+            first = state['next_window']
+            ring.window(first, num_frames, out=windows[len(window_spans)])
+            window_spans.append((first * sample_dt, (first + num_frames) * sample_dt))
+            if len(window_spans) == batch_size:
+                score_windows()
+            state['next_window'] += stride_samples
+
+    num_samples = 0
+    frame_idx = 0
+    try:
+        while True:
+            # Source frame holding the next sample
+            next_frame = round(num_samples * sample_dt * fps)
+            if not cap.grab():
+                break
+            if frame_idx >= next_frame:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                # Low frame rate sources may supply several consecutive samples
+                while round(num_samples * sample_dt * fps) <= frame_idx:
+                    convert(frame, frames[state['staged']])
+                    state['staged'] += 1
+                    num_samples += 1
+                    if state['staged'] == frame_batch_size:
+                        encode_frames()
+            frame_idx += 1
+    finally:
+        cap.release()
+
+    if state['staged']:
+        encode_frames()
+    if window_spans:
+        score_windows()
+
+    return timeline
+
+
+def merge_segments(timeline: List[Tuple[float, float, float]],
+                   threshold: float = THRESHOLD) -> List[Tuple[float, float, float]]:
+    """
+    Merge consecutive/overlapping windows scoring above threshold into segments.
+
+    Args:
+        timeline: (start_s, end_s, score) windows from predict_windows
+        threshold: Minimum score for a window to count as violent
+
+    Returns:
+        List of (start_s, end_s, max_score) violent segments
+    """
+    segments = []
+    for start, end, score in timeline:
+        if score <= threshold:
+            continue
+        if segments and start <= segments[-1][1]:
+            prev_start, prev_end, prev_score = segments[-1]
+            segments[-1] = (prev_start, max(prev_end, end), max(prev_score, score))
+        else:
+            segments.append((start, end, score))
+    return segments
+
+
 def main():
     """CLI entry point."""
     # Ensure model exists before running prediction
@@ -85,8 +371,9 @@ def main():
     parser.add_argument(
         "--video",
         type=str,
+        nargs="+",
         required=True,
-        help="Path to video file"
+        help="Path to video file (several paths are decoded and scored in a pipeline)"
     )
     parser.add_argument(
         "--model",
@@ -94,10 +381,130 @@ def main():
         default=get_model_path(),
         help="Path to trained model (default: model/violence_model.h5)"
     )
+    parser.add_argument("--batch-size", type=int, default=8,
+                        help="Videos per forward pass when several are given (default: 8)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Decode threads when several videos are given (default: CPU count)")
+    parser.add_argument("--queue-depth", type=int, default=16,
+                        help="Decoded videos that may wait for inference (default: 16)")
+    parser.add_argument("--windowed", action="store_true",
+                        help="Score fixed-length windows across the video and print a timeline")
+    parser.add_argument("--window", type=float, default=5.0,
+                        help="Window length in seconds for --windowed (default: 5)")
+    parser.add_argument("--stride", type=float, default=1.0,
+                        help="Seconds between window starts for --windowed (default: 1)")
+    parser.add_argument("--backend", choices=BACKENDS, default="auto",
+                        help="Inference engine (default: auto, from the model file extension)")
+    parser.add_argument("--jit-compile", action="store_true",
+                        help="Compile the Keras model with XLA")
+    parser.add_argument("--fold-time", action="store_true",
+                        help="Run the backbone on all frames of a clip as one batch (same outputs; "
+                             "compare with python -m src.benchmark first)")
+    parser.add_argument("--cascade", action="store_true",
+                        help="Screen every video with a cheap model first; run --model only on uncertain ones")
+    parser.add_argument("--screener", type=str, default=None,
+                        help="Screener model for --cascade (default: --model resized, see --screener-frames/size)")
+    parser.add_argument("--screener-frames", type=int, default=None,
+                        help="Frames per video of the resized screener (default: 10)")
+    parser.add_argument("--screener-size", type=int, default=None,
+                        help="Frame size of the resized screener (default: 160)")
+    parser.add_argument("--band", type=float, nargs=2, default=None, metavar=("LOW", "HIGH"),
+                        help="Screener scores escalated to the full model (default: 0.2 0.8)")
     
     args = parser.parse_args()
     
-    label, confidence = predict_video(args.video, args.model)
+    if args.windowed:
+        if not os.path.isfile(args.model):
+            print(f"ERROR: Model not found: {args.model}")
+            sys.exit(1)
+        if args.backend not in ("auto", "compiled", "keras") or args.model.lower().endswith((".tflite", ".onnx")):
+            print("ERROR: --windowed needs the Keras model (it reuses per-frame embeddings)")
+            sys.exit(1)
+        print(f"Loading model from {args.model}...")
+        model = load_model(args.model)
+        if args.fold_time:
+            model = fold_time(model)
+        
+        failed = 0
+        for video_path in args.video:
+            print(f"\nScanning {video_path} (window={args.window}s, stride={args.stride}s)...")
+            timeline = predict_windows(video_path, model, window_s=args.window,
+                                       stride_s=args.stride, batch_size=args.batch_size)
+            if not timeline:
+                print("ERROR: Could not read video or video is shorter than one window.")
+                failed += 1
+                continue
+            for start, end, score in timeline:
+                marker = "  <-- VIOLENT" if get_label(score) == "VIOLENT" else ""
+                print(f"  {start:8.2f}s - {end:8.2f}s  {score:.4f}{marker}")
+            segments = merge_segments(timeline)
+            print(f"Violent segments: {len(segments)}")
+            for start, end, score in segments:
+                print(f"  {start:8.2f}s - {end:8.2f}s  (max {score:.4f})")
+        sys.exit(1 if failed else 0)
+    
+    if args.cascade:
+        # Imported here: cascade builds on this module
+        try:
+            from src.cascade import DEFAULT_BAND, cascade_summary, load_cascade
+        except ImportError:
+            from cascade import DEFAULT_BAND, cascade_summary, load_cascade
+        
+        for path in (args.model, args.screener):
+            if path and not os.path.isfile(path):
+                print(f"ERROR: Model not found: {path}")
+                sys.exit(1)
+        print(f"Loading cascade (full model {args.model})...")
+        try:
+            cascade = load_cascade(args.model, args.screener, args.screener_frames, args.screener_size,
+                                   band=tuple(args.band or DEFAULT_BAND),
+                                   batch_sizes=batch_buckets(args.batch_size))
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        
+        results = []
+        for result in cascade.predict(args.video, batch_size=args.batch_size,
+                                      num_workers=args.workers, queue_depth=args.queue_depth):
+            results.append(result)
+            if result["error"]:
+                print(f"{result['path']}: ERROR {result['error']}")
+            else:
+                print(f"{result['path']}: {result['label']} ({result['confidence']:.4f}) "
+                      f"stage {result['stage']} (screener {result['screener_confidence']:.4f})")
+        
+        summary = cascade_summary(results, cascade)
+        print("\n" + "=" * 60)
+        print("CASCADE SUMMARY")
+        print("=" * 60)
+        print(f"Decided by screener: {summary['screened']}/{summary['videos']}, "
+              f"escalated: {summary['escalated']}, failed: {summary['failed']}")
+        print(f"Per-clip compute: screener {summary['screener_ms']:.1f} ms, "
+              f"full model {summary['model_ms']:.1f} ms, cascade average {summary['cascade_ms']:.1f} ms")
+        print(f"Compute saved: {summary['compute_saved']:.1%} ({summary['speedup']:.1f}x)")
+        print("=" * 60)
+        sys.exit(1 if summary['failed'] else 0)
+    
+    if len(args.video) > 1:
+        if not os.path.isfile(args.model):
+            print(f"ERROR: Model not found: {args.model}")
+            sys.exit(1)
+        print(f"Loading model from {args.model}...")
+        model = load_backend(args.model, args.backend, batch_sizes=batch_buckets(args.batch_size),
+                             jit_compile=args.jit_compile, fold=args.fold_time)
+        
+        failed = 0
+        for result in predict_videos(args.video, model, batch_size=args.batch_size,
+                                     num_workers=args.workers, queue_depth=args.queue_depth):
+            if result["error"]:
+                failed += 1
+                print(f"{result['path']}: ERROR {result['error']}")
+            else:
+                print(f"{result['path']}: {result['label']} ({result['confidence']:.4f})")
+        sys.exit(1 if failed else 0)
+    
+    label, confidence = predict_video(args.video[0], args.model, args.backend, args.jit_compile,
+                                      fold=args.fold_time)
     
     if label is not None:
         print("\n" + "=" * 60)
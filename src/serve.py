@@ -0,0 +1,358 @@
+"""
+Local HTTP inference server with dynamic micro-batching.
+
+Keeps one warm model in memory. Concurrent requests are decoded in their own
+handler threads and their frames are coalesced into micro-batches: a batch
+is run as soon as it holds `max_batch_size` videos or the oldest request has
+waited `max_delay_ms`, whichever comes first.
+
+Endpoints:
+    POST /predict   JSON body {"path": "/abs/path/video.mp4"}, or the raw video
+                    bytes (any non-JSON Content-Type; optional X-Filename header
+                    for the file extension)
+    GET  /health    Model and batching configuration
+    GET  /stats     Request/batch counters
+
+Every prediction response includes a latency breakdown in milliseconds
+(decode, queue, inference, total) and the size of the batch it ran in.
+
+Usage:
+    python -m src.serve --port 8500 --max-batch-size 8 --max-delay-ms 10
+    curl -X POST localhost:8500/predict -H "Content-Type: application/json" -d '{"path": "/data/clip.mp4"}'
+    curl -X POST localhost:8500/predict --data-binary @clip.mp4 -H "Content-Type: video/mp4"
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import tempfile
+import threading
+import numpy as np
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+try:
+    # When running as module: python -m src.serve
+    from src.backends import as_backend, batch_buckets, load_backend
+    from src.frames import extract_frames
+    from src.model_download import ensure_model_exists, get_model_path
+    from src.predict import get_label
+except ImportError:
+    # When running directly
+    from backends import as_backend, batch_buckets, load_backend
+    from frames import extract_frames
+    from model_download import ensure_model_exists, get_model_path
+    from predict import get_label
+
+# Largest accepted upload
+MAX_UPLOAD_MB = 512
+
+
+class MicroBatcher:
+    """
+    Coalesce single-video requests into batched forward passes.
+
+    A single worker thread owns the model. It waits for the first request,
+    then keeps collecting until the batch is full or `max_delay_ms` has passed
+    since that first request arrived, and runs one forward pass for all of them.
+    """
+
+    def __init__(self, model, max_batch_size: int = 8, max_delay_ms: float = 10.0):
+        self.model = as_backend(model)
+        self.max_batch_size = max_batch_size
+        self.max_delay_ms = max_delay_ms
+        self.sample_shape = self.model.input_shape
+        self.dtype = self.model.input_dtype
+
+        # Warm up so the first real request does not pay for graph building
+        self.model.predict(np.zeros((1,) + self.sample_shape, dtype=self.dtype))
+
+        self.stats = {'requests': 0, 'batches': 0, 'errors': 0}
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, frames: np.ndarray) -> Future:
+        """
+        Queue one video's frames for inference.
+
+        Returns:
+            Future resolving to a dict with 'confidence', 'queue_ms',
+            'inference_ms' and 'batch_size'
+        """
+        future = Future()
+        self._queue.put((frames, future, time.perf_counter()))
+        return future
+
+    def close(self) -> None:
+        """Finish queued requests and stop the worker thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self):
+        """Block for the first request, then gather more until full or the deadline passes."""
+        first = self._queue.get()
+        if first is None:
+            return None, True
+
+        items = [first]
+        deadline = first[2] + self.max_delay_ms / 1000.0
+        while len(items) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return items, True
+            items.append(item)
+        return items, False
+
+    def _run(self):
+        batch = np.empty((self.max_batch_size,) + self.sample_shape, dtype=self.dtype)
+        stopping = False
+
+        while not stopping:
+            items, stopping = self._collect()
+            if not items:
+                break
+
+            for i, (frames, _, _) in enumerate(items):
+                batch[i] = frames
+
+            start = time.perf_counter()
+            try:
+                predictions = self.model.predict(batch[:len(items)])
+            except Exception as e:
+                self.stats['errors'] += len(items)
+                for _, future, _ in items:
+                    future.set_exception(e)
+                continue
+            inference_ms = (time.perf_counter() - start) * 1000
+
+            self.stats['requests'] += len(items)
+            self.stats['batches'] += 1
+            for (_, future, submitted), prediction in zip(items, predictions):
+                future.set_result({
+                    'confidence': float(prediction[0]),
+                    'queue_ms': (start - submitted) * 1000,
+                    'inference_ms': inference_ms,
+                    'batch_size': len(items),
+                })
+
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    """HTTP handler; the server instance carries the shared MicroBatcher."""
+
+    server_version = "ViolenceAI/1.0"
+
+    def _send_json(self, status: int, payload: Dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        batcher = self.server.batcher
+        if self.path == "/health":
+            self._send_json(200, {
+                'status': 'ok',
+                'input_shape': list(batcher.sample_shape),
+                'input_dtype': batcher.dtype,
+                'max_batch_size': batcher.max_batch_size,
+                'max_delay_ms': batcher.max_delay_ms,
+            })
+        elif self.path == "/stats":
+            stats = dict(batcher.stats)
+            stats['mean_batch_size'] = stats['requests'] / stats['batches'] if stats['batches'] else 0.0
+            self._send_json(200, stats)
+        else:
+            self._send_json(404, {'error': f"unknown endpoint {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {'error': f"unknown endpoint {self.path}"})
+            return
+
+        received = time.perf_counter()
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            self._send_json(400, {'error': "invalid Content-Length header"})
+            return
+        if length <= 0:
+            self._send_json(400, {'error': "empty request body"})
+            return
+        if length > MAX_UPLOAD_MB * 1024 * 1024:
+            self._send_json(413, {'error': f"upload larger than {MAX_UPLOAD_MB} MB"})
+            return
+        body = self.rfile.read(length)
+
+        temp_path = None
+        try:
+            if self.headers.get("Content-Type", "").startswith("application/json"):
+                try:
+                    video_path = json.loads(body)["path"]
+                except (ValueError, KeyError, TypeError):
+                    video_path = None
+                # Anything but a string would reach os.path.isfile as a file
+                # descriptor and extract_frames as a camera index
+                if not isinstance(video_path, str):
+                    self._send_json(400, {'error': 'JSON body must be {"path": "..."}'})
+                    return
+                if not os.path.isfile(video_path):
+                    self._send_json(404, {'error': f"video not found: {video_path}"})
+                    return
+            else:
+                # OpenCV needs a file; keep the client's extension for the demuxer
+                suffix = os.path.splitext(self.headers.get("X-Filename", ""))[1] or ".mp4"
+                with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+                    tmp.write(body)
+                    temp_path = tmp.name
+                video_path = temp_path
+
+            self._predict(video_path, received)
+        finally:
+            if temp_path is not None:
+                os.unlink(temp_path)
+
+    def _predict(self, video_path: str, received: float) -> None:
+        batcher = self.server.batcher
+        num_frames, img_size = batcher.sample_shape[0], batcher.sample_shape[1]
+
+        start = time.perf_counter()
+        frames = extract_frames(video_path, num_frames=num_frames, img_size=img_size, dtype=batcher.dtype)
+        decode_ms = (time.perf_counter() - start) * 1000
+        if frames is None:
+            self._send_json(422, {'error': "could not extract frames (corrupt or too short)"})
+            return
+
+        try:
+            result = batcher.submit(frames).result()
+        except Exception as e:
+            self._send_json(500, {'error': f"inference failed: {e}"})
+            return
+
+        self._send_json(200, {
+            'label': get_label(result['confidence']),
+            'confidence': result['confidence'],
+            'batch_size': result['batch_size'],
+            'timings_ms': {
+                'decode': round(decode_ms, 1),
+                'queue': round(result['queue_ms'], 1),
+                'inference': round(result['inference_ms'], 1),
+                'total': round((time.perf_counter() - received) * 1000, 1),
+            },
+        })
+
+
+def create_server(model, host: str = "127.0.0.1", port: int = 8500, max_batch_size: int = 8,
+                  max_delay_ms: float = 10.0, quiet: bool = False) -> ThreadingHTTPServer:
+    """
+    Create (but do not start) the inference server.
+
+    Args:
+        model: Loaded end-to-end model or inference backend (see backends.py)
+        host: Interface to bind (localhost only by default)
+        port: TCP port (0 picks a free one)
+        max_batch_size: Largest micro-batch
+        max_delay_ms: Longest a request waits for others to join its batch
+        quiet: Suppress per-request access logs
+
+    Returns:
+        ThreadingHTTPServer; call serve_forever() to run and shutdown() +
+        server.batcher.close() to stop
+    """
+    server = ThreadingHTTPServer((host, port), InferenceHandler)
+    server.daemon_threads = True
+    server.batcher = MicroBatcher(model, max_batch_size=max_batch_size, max_delay_ms=max_delay_ms)
+    server.quiet = quiet
+    return server
+
+
+def request_prediction(video_path: str, url: str = "http://127.0.0.1:8500",
+                       upload: bool = False, timeout: Optional[float] = None) -> Dict:
+    """
+    Client helper: ask a running server to score a video.
+
+    Args:
+        video_path: Video to score
+        url: Server base URL
+        upload: Send the file's bytes instead of its path (for servers that
+            cannot see the client's filesystem)
+        timeout: Socket timeout in seconds
+
+    Returns:
+        Decoded JSON response (contains 'error' on failure)
+    """
+    import urllib.request
+    import urllib.error
+
+    if upload:
+        with open(video_path, "rb") as f:
+            data = f.read()
+        headers = {"Content-Type": "application/octet-stream",
+                   "X-Filename": os.path.basename(video_path)}
+    else:
+        data = json.dumps({"path": os.path.abspath(video_path)}).encode()
+        headers = {"Content-Type": "application/json"}
+
+    request = urllib.request.Request(f"{url.rstrip('/')}/predict", data=data, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read())
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Serve violence predictions over local HTTP with micro-batching"
+    )
+    parser.add_argument("--model", type=str, default=get_model_path(),
+                        help="Path to trained model (default: model/violence_model.h5)")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8500, help="Port (default: 8500)")
+    parser.add_argument("--max-batch-size", type=int, default=8, help="Largest micro-batch (default: 8)")
+    parser.add_argument("--max-delay-ms", type=float, default=10.0,
+                        help="Longest a request waits for a batch to fill (default: 10)")
+    parser.add_argument("--quiet", action="store_true", help="Disable access logs")
+
+    args = parser.parse_args()
+
+    if args.model == get_model_path():
+        try:
+            ensure_model_exists()
+        except RuntimeError as e:
+            print(f"\n❌ {str(e)}")
+            sys.exit(1)
+
+    print(f"Loading model from {args.model}...")
+    model = load_backend(args.model, batch_sizes=batch_buckets(args.max_batch_size))
+
+    server = create_server(model, args.host, args.port, args.max_batch_size,
+                           args.max_delay_ms, args.quiet)
+    print(f"Serving on http://{args.host}:{server.server_address[1]} "
+          f"(max_batch_size={args.max_batch_size}, max_delay_ms={args.max_delay_ms})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        server.server_close()
+        server.batcher.close()
+
+
+if __name__ == "__main__":
+    main()
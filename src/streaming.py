@@ -0,0 +1,228 @@
+"""
+Streaming inference that carries LSTM state forward frame by frame.
+
+The stateless model re-runs its whole num_frames sequence for every score.
+StreamingScorer instead runs the frame encoder only on each newly arrived
+frame and advances the LSTM by a single step, so every update costs O(1)
+regardless of the window length. It uses the weights of the trained
+end-to-end model (see net.split_model).
+
+The model was trained on num_frames-long sequences starting from a zero
+state, so by default each LSTM state is reset after `horizon` = num_frames
+steps. Several staggered states (`phases`) run side by side and the score
+comes from the one that has seen the most frames: between
+horizon - horizon // phases + 1 and horizon of them (16 to 30 with the
+defaults). The score read from a state after exactly num_frames steps
+equals the stateless model's score on those frames; phases = num_frames
+makes that hold for every score, at num_frames times the LSTM cost.
+
+Usage:
+    python -m src.streaming --source recording.mp4 --window 5 --emit-every 5
+    python -m src.streaming --source 0            # webcam
+"""
+
+import os
+import sys
+import time
+import argparse
+import cv2
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import layers
+from typing import Iterator, Optional, Tuple
+
+try:
+    # When running as module: python -m src.streaming
+    from src.frames import FrameConverter
+    from src.model_download import get_model_path
+    from src.net import load_model, model_input_dtype, split_model
+    from src.predict import get_label
+except ImportError:
+    # When running directly
+    from frames import FrameConverter
+    from model_download import get_model_path
+    from net import load_model, model_input_dtype, split_model
+    from predict import get_label
+
+
+class StreamingScorer:
+    """
+    Incremental violence scorer fed one preprocessed frame at a time.
+
+    Args:
+        model: Trained end-to-end model (build_model layout)
+        emit_every: Return a score every this many frames (others return None)
+        horizon: Steps after which an LSTM state is reset; defaults to the
+            model's num_frames. None never resets (pure carried state).
+        phases: Number of staggered LSTM states (ignored when horizon is None);
+            more phases keep the reported state closer to a full horizon
+    """
+
+    _DEFAULT = object()
+
+    def __init__(self, model, emit_every: int = 1, horizon=_DEFAULT, phases: int = 2):
+        self.encoder, head = split_model(model)
+        self.num_frames = model.inputs[0].shape[1]
+        self.frame_shape = tuple(model.inputs[0].shape[2:])
+        self.dtype = model_input_dtype(model)
+        self.emit_every = max(1, emit_every)
+
+        self.horizon = self.num_frames if horizon is self._DEFAULT else horizon
+        self.phases = 1 if self.horizon is None else max(1, min(phases, self.horizon))
+        self._offsets = np.array([k * (self.horizon or 0) // self.phases for k in range(self.phases)])
+
+        lstm_index = next((i for i, layer in enumerate(head.layers) if isinstance(layer, layers.LSTM)), None)
+        if lstm_index is None:
+            raise ValueError(f"Streaming needs an LSTM head; '{model.name}' has none")
+        self._cell = head.layers[lstm_index].cell
+        self._dense = head.layers[lstm_index + 1:]
+        units = self._cell.units
+
+        self._h = np.zeros((self.phases, units), dtype=np.float32)
+        self._c = np.zeros((self.phases, units), dtype=np.float32)
+        self.frames_seen = 0
+
+        # Warm up the traced step so the first live frame is not slow
+        self._step(tf.zeros((1,) + self.frame_shape, dtype=self.dtype), self._h, self._c)
+
+    @tf.function(reduce_retracing=True)
+    def _step(self, frame, h, c):
+        embedding = self.encoder(frame, training=False)
+        inputs = tf.repeat(embedding, tf.shape(h)[0], axis=0)
+        h, (_, c) = self._cell(inputs, [h, c], training=False)
+        x = h
+        for layer in self._dense:
+            x = layer(x, training=False)
+        return h, c, x[:, 0]
+
+    def reset(self) -> None:
+        """Forget all carried state (e.g. after a camera cut)."""
+        self._h[:] = 0.0
+        self._c[:] = 0.0
+        self.frames_seen = 0
+
+    def _steps_in_phase(self, n: int) -> np.ndarray:
+        """Frames each phase has seen after frame n (0 for phases not started yet)."""
+        if self.horizon is None:
+            return np.array([n + 1])
+        since = n - self._offsets
+        return np.where(since >= 0, since % self.horizon + 1, 0)
+
+    def update(self, frame: np.ndarray) -> Optional[float]:
+        """
+        Feed the next frame and advance every LSTM state by one step.
+
+        Args:
+            frame: Preprocessed (H, W, 3) frame in the model's input dtype
+                (see frames.FrameConverter)
+
+        Returns:
+            Violence score in [0, 1] every emit_every frames, otherwise None
+        """
+        n = self.frames_seen
+        if self.horizon is not None:
+            # Phases starting a new horizon (or not started yet) begin from zero state
+            fresh = self._steps_in_phase(n) <= 1
+            self._h[fresh] = 0.0
+            self._c[fresh] = 0.0
+
+        h, c, scores = self._step(frame[np.newaxis], self._h, self._c)
+        self._h, self._c = h.numpy(), c.numpy()
+        self.frames_seen += 1
+
+        if self.frames_seen % self.emit_every:
+            return None
+        # Report the phase that has seen the most frames in its horizon
+        return float(scores.numpy()[int(np.argmax(self._steps_in_phase(n)))])
+
+
+def stream_scores(source, scorer: StreamingScorer, window_s: float = 5.0) -> Iterator[Tuple[float, float]]:
+    """
+    Read a cv2.VideoCapture source and yield (timestamp_s, score) as scores are emitted.
+
+    Frames are sampled at num_frames / window_s per second, the rate the
+    model expects for a window_s-second clip.
+
+    Args:
+        source: Anything cv2.VideoCapture accepts (file path, camera index, URL)
+        scorer: StreamingScorer to feed
+        window_s: Seconds covered by num_frames samples
+    """
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open video source: {source}")
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if fps <= 0:
+        fps = 30.0
+    sample_dt = window_s / scorer.num_frames
+
+    convert = FrameConverter(img_size=scorer.frame_shape[0], dtype=scorer.dtype)
+    frame = np.empty(scorer.frame_shape, dtype=scorer.dtype)
+    frame_idx = 0
+    num_samples = 0
+    try:
+        while cap.grab():
+            t = frame_idx / fps
+            frame_idx += 1
+            # Skip (grab only) frames that fall before the next sample time
+            if t + 0.5 / fps < num_samples * sample_dt:
+                continue
+            ret, raw = cap.retrieve()
+            if not ret:
+                break
+            num_samples += 1
+            score = scorer.update(convert(raw, frame))
+            if score is not None:
+                yield t, score
+    finally:
+        cap.release()
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Score a video or camera stream incrementally with a stateful LSTM"
+    )
+    parser.add_argument("--source", type=str, required=True,
+                        help="Video file, camera index (e.g. 0) or stream URL")
+    parser.add_argument("--model", type=str, default=get_model_path(),
+                        help="Path to trained model (default: model/violence_model.h5)")
+    parser.add_argument("--window", type=float, default=5.0,
+                        help="Seconds covered by the model's frame sequence (default: 5)")
+    parser.add_argument("--emit-every", type=int, default=5,
+                        help="Emit a score every N sampled frames (default: 5)")
+    parser.add_argument("--phases", type=int, default=2,
+                        help="Staggered LSTM states (default: 2)")
+    parser.add_argument("--no-reset", action="store_true",
+                        help="Never reset LSTM state (carry it for the whole stream)")
+
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.model):
+        print(f"ERROR: Model not found: {args.model}")
+        sys.exit(1)
+
+    print(f"Loading model from {args.model}...")
+    model = load_model(args.model)
+    scorer = StreamingScorer(model, emit_every=args.emit_every, phases=args.phases,
+                             **({'horizon': None} if args.no_reset else {}))
+
+    source = int(args.source) if args.source.isdigit() else args.source
+    start = time.perf_counter()
+    try:
+        for t, score in stream_scores(source, scorer, window_s=args.window):
+            print(f"{t:8.2f}s  {score:.4f}  {get_label(score)}")
+    except RuntimeError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+    elapsed = time.perf_counter() - start
+    print(f"\nProcessed {scorer.frames_seen} frames in {elapsed:.1f}s "
+          f"({scorer.frames_seen / max(elapsed, 1e-9):.1f} frames/s)")
+
+
+if __name__ == "__main__":
+    main()
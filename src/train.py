@@ -3,29 +3,61 @@ Train the violence detection model using tf.data generators for memory efficienc
 """
 
 import os
+import json
+import argparse
 import numpy as np
 import matplotlib.pyplot as plt
 from sklearn.metrics import confusion_matrix, classification_report, accuracy_score
 import seaborn as sns
+from typing import Optional
 from tensorflow import keras
 
 try:
     # When running as module: python -m src.train
-    from src.load_data import get_dataset_split
-    from src.net import build_model
+    from src.load_data import get_dataset_split, split_video_files
+    from src.frame_store import FRAME_STORE_DIR, FrameStore
+    from src.net import (BACKBONES, TEMPORAL, build_model, build_frame_encoder, build_temporal_head,
+                         assemble_model, load_model)
+    from src.embeddings import (CACHE_DIR, backbone_id, precompute_embeddings,
+                                get_embedding_dataset_split)
+    from src.distill import SOFT_LABEL_DIR, compare_models, distillation_targets, precompute_soft_labels
+    from src.model_download import get_model_path
 except ImportError:
     # When running directly
-    from load_data import get_dataset_split
-    from net import build_model
+    from load_data import get_dataset_split, split_video_files
+    from frame_store import FRAME_STORE_DIR, FrameStore
+    from net import (BACKBONES, TEMPORAL, build_model, build_frame_encoder, build_temporal_head,
+                     assemble_model, load_model)
+    from embeddings import (CACHE_DIR, backbone_id, precompute_embeddings,
+                            get_embedding_dataset_split)
+    from distill import SOFT_LABEL_DIR, compare_models, distillation_targets, precompute_soft_labels
+    from model_download import get_model_path
 
 
-def train_model():
+def train_model(use_cached_embeddings: bool = False, cache_dir: str = CACHE_DIR,
+                backbone: str = "resnet50", img_size: int = 224, temporal: str = "lstm",
+                decode_workers: Optional[int] = None, deterministic: bool = False,
+                frame_store_dir: Optional[str] = None):
     """
-    Train the ResNet50 + LSTM model end-to-end using tf.data generators.
+    Train the backbone + LSTM model end-to-end using tf.data generators.
     Memory-efficient: streams data from disk instead of loading into RAM.
     
+    Args:
+        use_cached_embeddings: Run the frozen backbone once per video, cache the
+            pooled frame embeddings on disk and train only the LSTM head on them.
+            The saved model is still the full end-to-end model.
+        cache_dir: Directory for cached embeddings
+        backbone: Per-frame CNN, one of net.BACKBONES (default "resnet50")
+        img_size: Frame height and width fed to the backbone (default 224)
+        temporal: Recurrent layer of the head, one of net.TEMPORAL (default "lstm")
+        decode_workers: Videos decoded in parallel (default: tf.data.AUTOTUNE)
+        deterministic: Keep the decoded sample order fixed (see load_data.get_dataset_split)
+        frame_store_dir: Decode every video once into a memory-mapped frame store
+            in this directory (see frame_store.py) and train from it
+    
     Saves:
-        - model/violence_model.h5: Trained model
+        - model/violence_model.h5: Trained model (model/violence_model_<backbone>.keras
+          for backbones other than ResNet50)
         - outputs/confusion_matrix.png: Confusion matrix visualization
         - outputs/training_curves.png: Training/validation accuracy and loss curves
     """
@@ -37,21 +69,60 @@ def train_model():
     print("=" * 60)
     print("Violence Detection Model Training")
     print("=" * 60)
+    print(f"Backbone: {backbone} ({img_size}x{img_size})")
     
     # Training parameters
     EPOCHS = 10
     BATCH_SIZE = 8
     NUM_FRAMES = 30
+    # uint8 frames keep prefetch buffers 4x smaller; the model
+    # casts and applies the backbone's preprocessing in-graph
+    FRAME_DTYPE = "uint8"
     
-    # Get dataset generators with correct steps_per_epoch
-    print("\n[1/5] Loading dataset (streaming from disk)...")
-    train_dataset, val_dataset, train_steps, val_steps, class_counts = get_dataset_split(
-        data_dir="data",
-        num_frames=NUM_FRAMES,
-        batch_size=BATCH_SIZE,
-        validation_split=0.2,
-        epochs=EPOCHS
-    )
+    if use_cached_embeddings:
+        # Run the frozen backbone once per video; only new/changed videos are encoded
+        print("\n[1/5] Caching frame embeddings...")
+        encoder = build_frame_encoder(input_dtype=FRAME_DTYPE, backbone=backbone, img_size=img_size)
+        encoder_id = backbone_id(encoder)
+        train_files, val_files = split_video_files("data", validation_split=0.2, num_frames=NUM_FRAMES)
+        stats = precompute_embeddings(train_files + val_files, encoder, encoder_id,
+                                      num_frames=NUM_FRAMES, cache_dir=cache_dir)
+        print(f"  Cached: {stats['cached']}, computed: {stats['computed']}, failed: {stats['failed']}")
+        
+        train_dataset, val_dataset, train_steps, val_steps, class_counts = get_embedding_dataset_split(
+            data_dir="data",
+            backbone=encoder_id,
+            cache_dir=cache_dir,
+            num_frames=NUM_FRAMES,
+            feature_dim=encoder.outputs[0].shape[-1],
+            batch_size=BATCH_SIZE,
+            validation_split=0.2,
+            epochs=EPOCHS
+        )
+    else:
+        # Get dataset generators with correct steps_per_epoch
+        print("\n[1/5] Loading dataset (streaming from disk)...")
+        frame_store = None
+        if frame_store_dir:
+            # Decode each video once; later epochs and runs read the stored frames
+            print(f"  Compiling frame store in {frame_store_dir}...")
+            frame_store = FrameStore(frame_store_dir, num_frames=NUM_FRAMES, img_size=img_size)
+            train_files, val_files = split_video_files("data", validation_split=0.2, num_frames=NUM_FRAMES)
+            stats = frame_store.compile(train_files + val_files)
+            print(f"  Cached: {stats['cached']}, computed: {stats['computed']}, failed: {stats['failed']}")
+        
+        train_dataset, val_dataset, train_steps, val_steps, class_counts = get_dataset_split(
+            data_dir="data",
+            num_frames=NUM_FRAMES,
+            batch_size=BATCH_SIZE,
+            validation_split=0.2,
+            epochs=EPOCHS,
+            frame_dtype=FRAME_DTYPE,
+            img_size=img_size,
+            num_parallel_calls=decode_workers,
+            deterministic=deterministic,
+            frame_store=frame_store
+        )
     
     if train_dataset is None:
         print("ERROR: No data loaded. Check data directory structure.")
@@ -61,9 +132,15 @@ def train_model():
         print("    violent/     (video files)")
         return
     
-    # Build model
-    print("\n[2/5] Building ResNet50 + LSTM model...")
-    model = build_model(num_frames=NUM_FRAMES)
+    # Build model (only the LSTM head when training on cached embeddings)
+    if use_cached_embeddings:
+        print("\n[2/5] Building LSTM head for cached embeddings...")
+        model = build_temporal_head(num_frames=NUM_FRAMES, feature_dim=encoder.outputs[0].shape[-1],
+                                    temporal=temporal)
+    else:
+        print(f"\n[2/5] Building {backbone} + LSTM model...")
+        model = build_model(num_frames=NUM_FRAMES, input_dtype=FRAME_DTYPE,
+                            backbone=backbone, img_size=img_size, temporal=temporal)
     print("Model architecture:")
     model.summary()
     
@@ -80,9 +157,17 @@ def train_model():
         verbose=1
     )
     
-    # Save model
-    model_path = "model/violence_model.h5"
-    model.save(model_path)
+    # Save model (re-attach the backbone so the saved file is end-to-end).
+    # MobileNetV3 does not round-trip through the legacy .h5 format, so the
+    # other backbones are saved in the native .keras format
+    if backbone == "resnet50":
+        model_path = "model/violence_model.h5"
+    else:
+        model_path = f"model/violence_model_{backbone}.keras"
+    if use_cached_embeddings:
+        assemble_model(encoder, model).save(model_path)
+    else:
+        model.save(model_path)
     print(f"\n[4/5] Model saved to {model_path}")
     
     # Evaluate on validation set
@@ -196,5 +281,214 @@ def train_model():
     print(f"Metrics saved to: outputs/")
 
 
+def distill_model(teacher_path: str, backbone: str = "mobilenet_v3_small", img_size: int = 224,
+                  temporal: str = "gru", temperature: float = 2.0, alpha: float = 0.5,
+                  cache_dir: str = CACHE_DIR, soft_label_dir: str = SOFT_LABEL_DIR):
+    """
+    Distill a trained model into a cheaper student (see src/distill.py).
+
+    The teacher scores every video once (cached in soft_label_dir). The
+    student's frozen backbone is run once per video (cached in cache_dir) and
+    only its temporal head is trained, on blended hard/soft targets.
+
+    Args:
+        teacher_path: Trained end-to-end model used as teacher
+        backbone: Student backbone, one of net.BACKBONES (default "mobilenet_v3_small")
+        img_size: Student frame resolution (default 224)
+        temporal: Student recurrent layer, one of net.TEMPORAL (default "gru")
+        temperature: Softening temperature for the teacher's scores
+        alpha: Weight of the hard labels in the training targets
+        cache_dir: Directory for cached student embeddings
+        soft_label_dir: Directory for cached teacher scores
+
+    Saves:
+        - model/violence_model_student_<backbone>.keras: Distilled end-to-end student
+        - outputs/distillation_report.json: Teacher vs student accuracy and CPU latency
+    """
+    os.makedirs("model", exist_ok=True)
+    os.makedirs("outputs", exist_ok=True)
+
+    print("=" * 60)
+    print("Violence Detection Model Distillation")
+    print("=" * 60)
+
+    EPOCHS = 10
+    BATCH_SIZE = 8
+    FRAME_DTYPE = "uint8"
+
+    print(f"\n[1/5] Scoring videos with the teacher ({teacher_path})...")
+    teacher = load_model(teacher_path)
+    num_frames = teacher.inputs[0].shape[1]
+    train_files, val_files = split_video_files("data", validation_split=0.2, num_frames=num_frames)
+    soft_labels = precompute_soft_labels(train_files, teacher, cache_dir=soft_label_dir)
+    targets = distillation_targets(train_files, soft_labels, temperature=temperature, alpha=alpha)
+
+    print(f"\n[2/5] Caching {backbone} ({img_size}x{img_size}) frame embeddings...")
+    encoder = build_frame_encoder(input_dtype=FRAME_DTYPE, backbone=backbone, img_size=img_size)
+    encoder_id = backbone_id(encoder)
+    stats = precompute_embeddings(train_files + val_files, encoder, encoder_id,
+                                  num_frames=num_frames, cache_dir=cache_dir)
+    print(f"  Cached: {stats['cached']}, computed: {stats['computed']}, failed: {stats['failed']}")
+
+    train_dataset, val_dataset, train_steps, val_steps, _ = get_embedding_dataset_split(
+        data_dir="data",
+        backbone=encoder_id,
+        cache_dir=cache_dir,
+        num_frames=num_frames,
+        feature_dim=encoder.outputs[0].shape[-1],
+        batch_size=BATCH_SIZE,
+        validation_split=0.2,
+        epochs=EPOCHS,
+        targets=targets
+    )
+    if train_dataset is None:
+        print("ERROR: No data loaded. Check data directory structure.")
+        return
+
+    print(f"\n[3/5] Training {temporal.upper()} student head for {EPOCHS} epochs "
+          f"(T={temperature}, alpha={alpha})...")
+    # Soft targets make fit's accuracy/precision/recall meaningless; the hard-label
+    # metrics come from the validation comparison below
+    head = build_temporal_head(num_frames=num_frames, feature_dim=encoder.outputs[0].shape[-1],
+                               temporal=temporal, soft_targets=True)
+    head.fit(
+        train_dataset,
+        steps_per_epoch=train_steps,
+        validation_data=val_dataset,
+        validation_steps=val_steps,
+        epochs=EPOCHS,
+        verbose=1
+    )
+
+    student = assemble_model(encoder, head)
+    model_path = f"model/violence_model_student_{backbone}.keras"
+    student.save(model_path)
+    print(f"\n[4/5] Student saved to {model_path}")
+
+    print("\n[5/5] Comparing teacher and student on the validation set...")
+    sizes_mb = {'teacher': os.path.getsize(teacher_path) / (1024 * 1024),
+                'student': os.path.getsize(model_path) / (1024 * 1024)}
+    report = compare_models({'teacher': teacher, 'student': student}, val_files, sizes_mb)
+
+    print("\n" + "=" * 60)
+    print("DISTILLATION REPORT")
+    print("=" * 60)
+    for name, r in report.items():
+        print(f"{name:8s} acc {r['accuracy']:.4f}  prec {r['precision']:.4f}  rec {r['recall']:.4f}  "
+              f"agree {r['agreement']:.4f}  "
+              f"median {r['median_ms']:8.1f} ms  p95 {r['p95_ms']:8.1f} ms  "
+              f"{r['params'] / 1e6:5.1f}M params  {r['size_mb']:6.1f} MB")
+    speedup = report['teacher']['median_ms'] / report['student']['median_ms']
+    print("-" * 60)
+    print(f"Student speedup: {speedup:.1f}x")
+    print("=" * 60)
+
+    report_path = "outputs/distillation_report.json"
+    with open(report_path, "w") as f:
+        json.dump({'teacher': teacher_path, 'student': model_path, 'backbone': backbone,
+                   'img_size': img_size, 'temporal': temporal, 'temperature': temperature,
+                   'alpha': alpha, 'speedup': speedup, 'results': report}, f, indent=2)
+    print(f"Report saved to {report_path}")
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Train the violence detection model"
+    )
+    parser.add_argument(
+        "--cached-embeddings",
+        action="store_true",
+        help="Precompute frozen backbone embeddings once and train only the LSTM head"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=CACHE_DIR,
+        help=f"Directory for cached embeddings (default: {CACHE_DIR})"
+    )
+    
+    parser.add_argument(
+        "--backbone",
+        choices=tuple(BACKBONES),
+        default=None,
+        help="Per-frame CNN backbone (default: resnet50, or mobilenet_v3_small with --distill)"
+    )
+    parser.add_argument(
+        "--img-size",
+        type=int,
+        default=224,
+        help="Frame resolution fed to the backbone (default: 224)"
+    )
+    
+    parser.add_argument(
+        "--temporal",
+        choices=tuple(TEMPORAL),
+        default=None,
+        help="Recurrent layer of the head (default: lstm, or gru with --distill)"
+    )
+    parser.add_argument(
+        "--decode-workers",
+        type=int,
+        default=None,
+        help="Videos decoded in parallel during training (default: tuned automatically)"
+    )
+    parser.add_argument(
+        "--deterministic",
+        action="store_true",
+        help="Keep the training sample order reproducible instead of taking videos as they finish decoding"
+    )
+    
+    parser.add_argument(
+        "--frame-store",
+        nargs="?",
+        const=FRAME_STORE_DIR,
+        default=None,
+        metavar="DIR",
+        help=f"Decode every video once into a memory-mapped frame store and train from it "
+             f"(default DIR: {FRAME_STORE_DIR})"
+    )
+    
+    parser.add_argument(
+        "--distill",
+        action="store_true",
+        help="Train a small student on the soft labels of a trained teacher model"
+    )
+    parser.add_argument(
+        "--teacher",
+        type=str,
+        default=get_model_path(),
+        help="Teacher model for --distill (default: model/violence_model.h5)"
+    )
+    parser.add_argument(
+        "--temperature",
+        type=float,
+        default=2.0,
+        help="Softening temperature for the teacher's scores (default: 2.0)"
+    )
+    parser.add_argument(
+        "--alpha",
+        type=float,
+        default=0.5,
+        help="Weight of hard labels vs teacher scores in --distill targets (default: 0.5)"
+    )
+    
+    args = parser.parse_args()
+    
+    if args.distill:
+        if not os.path.isfile(args.teacher):
+            print(f"ERROR: Teacher model not found: {args.teacher}")
+            return
+        distill_model(args.teacher, backbone=args.backbone or "mobilenet_v3_small",
+                      img_size=args.img_size, temporal=args.temporal or "gru",
+                      temperature=args.temperature, alpha=args.alpha, cache_dir=args.cache_dir)
+        return
+    
+    train_model(use_cached_embeddings=args.cached_embeddings, cache_dir=args.cache_dir,
+                backbone=args.backbone or "resnet50", img_size=args.img_size,
+                temporal=args.temporal or "lstm", decode_workers=args.decode_workers,
+                deterministic=args.deterministic, frame_store_dir=args.frame_store)
+
+
 if __name__ == "__main__":
-    train_model()
+    main()
@@ -0,0 +1,53 @@
+"""
+Shared fixtures: tiny synthetic videos written with OpenCV.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def write_video(path: str, num_frames: int = 12, size: int = 32, value: int = 128, seed: int = 0) -> str:
+    """
+    Write an MJPG .avi of num_frames frames.
+
+    Pixels are `value` plus a little per-frame noise, so different videos (and
+    different frames of one video) decode to different bytes while their mean
+    brightness stays close to `value`.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10.0, (size, size))
+    rng = np.random.default_rng(seed)
+    for _ in range(num_frames):
+        noise = rng.integers(-8, 9, size=(size, size, 3))
+        writer.write(np.clip(value + noise, 0, 255).astype(np.uint8))
+    writer.release()
+    return path
+
+
+def write_junk(path: str) -> str:
+    """Write a file that no decoder accepts."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"not a video")
+    return path
+
+
+@pytest.fixture
+def make_dataset(tmp_path):
+    """Create data/{nonviolent,violent} with the given number of videos per class."""
+    def make(per_class: int, num_frames: int = 12):
+        data_dir = tmp_path / "data"
+        for class_name in ("nonviolent", "violent"):
+            for i in range(per_class):
+                write_video(str(data_dir / class_name / f"{i:02d}.avi"), num_frames=num_frames, seed=i)
+        return str(data_dir)
+    return make
@@ -0,0 +1,92 @@
+"""Tests for cascade band routing and its compute summary."""
+
+import math
+
+import numpy as np
+import pytest
+
+from conftest import write_junk, write_video
+from src.cascade import Cascade, cascade_summary
+
+NUM_FRAMES = 4
+IMG_SIZE = 16
+
+
+class BrightnessBackend:
+    """Inference backend whose score for a clip is its mean pixel value / 255."""
+
+    input_shape = (NUM_FRAMES, IMG_SIZE, IMG_SIZE, 3)
+    input_dtype = "uint8"
+
+    def __init__(self, fixed=None):
+        self.fixed = fixed
+        self.calls = 0
+
+    def predict(self, X):
+        self.calls += len(X)
+        if self.fixed is not None:
+            return np.full((len(X), 1), self.fixed, dtype=np.float32)
+        return X.reshape(len(X), -1).mean(axis=1, keepdims=True).astype(np.float32) / 255
+
+
+@pytest.fixture
+def cascade():
+    cascade = Cascade(BrightnessBackend(), BrightnessBackend(fixed=0.9), band=(0.2, 0.8))
+    # Fixed per-clip costs instead of the timings taken at construction
+    cascade.screener_ms, cascade.model_ms = 2.0, 10.0
+    cascade.screener.calls = cascade.model.calls = 0
+    return cascade
+
+
+def test_band_is_inclusive(cascade):
+    assert cascade.uncertain(0.2) and cascade.uncertain(0.5) and cascade.uncertain(0.8)
+    assert not cascade.uncertain(0.19) and not cascade.uncertain(0.81)
+
+
+def test_invalid_band_is_rejected():
+    with pytest.raises(ValueError):
+        Cascade(BrightnessBackend(), BrightnessBackend(), band=(0.8, 0.2))
+
+
+def test_routing_and_summary(cascade, tmp_path):
+    dark = write_video(str(tmp_path / "dark.avi"), num_frames=8, value=20)
+    grey = write_video(str(tmp_path / "grey.avi"), num_frames=8, value=128)
+    bright = write_video(str(tmp_path / "bright.avi"), num_frames=8, value=235)
+    broken = write_junk(str(tmp_path / "broken.avi"))
+
+    results = {r["path"]: r for r in cascade.predict([dark, grey, bright, broken], batch_size=2, num_workers=1)}
+
+    assert set(results) == {dark, grey, bright, broken}
+    # Confident screener scores are final; the uncertain clip goes to the model
+    assert results[dark]["stage"] == 1 and results[dark]["label"] == "NONVIOLENT"
+    assert results[bright]["stage"] == 1 and results[bright]["label"] == "VIOLENT"
+    assert results[grey]["stage"] == 2
+    assert results[grey]["confidence"] == pytest.approx(0.9)
+    assert 0.2 <= results[grey]["screener_confidence"] <= 0.8
+    assert results[broken]["stage"] == 1 and results[broken]["error"]
+    assert cascade.screener.calls == 3 and cascade.model.calls == 1
+
+    assert results[dark]["compute_ms"] == 2.0 and results[dark]["compute_saved_ms"] == 8.0
+    assert results[grey]["compute_ms"] == 12.0 and results[grey]["compute_saved_ms"] == -2.0
+    assert results[broken]["compute_ms"] is None
+
+    summary = cascade_summary(results.values(), cascade)
+    assert summary['videos'] == 3
+    assert summary['screened'] == 2
+    assert summary['escalated'] == 1
+    assert summary['failed'] == 1
+    # (2 + 2 + 12) / 3 ms per clip against 10 ms for the full model alone
+    assert summary['cascade_ms'] == pytest.approx(16 / 3)
+    assert summary['compute_saved'] == pytest.approx(1 - 16 / 30)
+    assert summary['speedup'] == pytest.approx(30 / 16)
+
+
+def test_summary_of_failures_only(cascade):
+    failed = {"path": "x.avi", "label": None, "confidence": None, "stage": 1, "screener_confidence": None,
+              "compute_ms": None, "compute_saved_ms": None, "error": "could not extract frames"}
+
+    summary = cascade_summary([failed], cascade)
+
+    assert summary['videos'] == 0 and summary['failed'] == 1
+    assert math.isnan(summary['cascade_ms'])
+    assert math.isnan(summary['compute_saved']) and math.isnan(summary['speedup'])
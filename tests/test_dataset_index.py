@@ -0,0 +1,90 @@
+"""Tests for the incremental dataset index and the loaders that use it."""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+import src.dataset_index as dataset_index
+from conftest import write_junk, write_video
+from src.dataset_index import INDEX_FILE, index_dataset, is_usable
+from src.load_data import count_videos, video_generator
+
+
+@pytest.fixture
+def probed(monkeypatch):
+    """Record every path probe_video is called with (the index probes in-process below PARALLEL_MIN_FILES)."""
+    paths = []
+    original = dataset_index.probe_video
+
+    def probe(video_path):
+        paths.append(video_path)
+        return original(video_path)
+
+    monkeypatch.setattr(dataset_index, "probe_video", probe)
+    return paths
+
+
+def _rewrite(path, **kwargs):
+    write_video(path, **kwargs)
+    # Make sure the change is seen even on filesystems with coarse timestamps
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_index_probes_only_new_or_changed_videos(make_dataset, probed):
+    data_dir = make_dataset(3)
+    index_path = os.path.join(data_dir, INDEX_FILE)
+
+    entries = index_dataset(data_dir)
+    assert len(probed) == 6 and len(entries) == 6
+    assert all(e['decodable'] and e['frames'] == 12 for e in entries)
+
+    # Nothing changed: no probes and the index file is left alone
+    mtime = os.stat(index_path).st_mtime_ns
+    probed.clear()
+    assert index_dataset(data_dir) == entries
+    assert probed == []
+    assert os.stat(index_path).st_mtime_ns == mtime
+
+    changed = os.path.join(data_dir, "violent", "01.avi")
+    _rewrite(changed, num_frames=5)
+    added = write_video(os.path.join(data_dir, "nonviolent", "03.avi"), num_frames=20)
+    removed = os.path.join(data_dir, "violent", "02.avi")
+    os.remove(removed)
+
+    probed.clear()
+    entries = {e['path']: e for e in index_dataset(data_dir)}
+
+    assert sorted(probed) == sorted([changed, added])
+    assert removed not in entries and len(entries) == 6
+    assert entries[changed]['frames'] == 5 and entries[added]['frames'] == 20
+    with open(index_path) as f:
+        assert set(json.load(f)) == {os.path.relpath(path, data_dir).replace(os.sep, "/") for path in entries}
+
+
+def test_is_usable(make_dataset):
+    data_dir = make_dataset(1)
+    write_junk(os.path.join(data_dir, "violent", "junk.avi"))
+    write_video(os.path.join(data_dir, "violent", "short.avi"), num_frames=3)
+
+    usable = {os.path.basename(e['path']): is_usable(e, num_frames=8) for e in index_dataset(data_dir)
+              if e['label'] == 1}
+
+    assert usable == {"00.avi": True, "junk.avi": False, "short.avi": False}
+
+
+def test_loaders_skip_unusable_videos(make_dataset, probed):
+    data_dir = make_dataset(2)
+    write_junk(os.path.join(data_dir, "violent", "junk.avi"))
+    write_video(os.path.join(data_dir, "nonviolent", "short.avi"), num_frames=3)
+
+    assert count_videos(data_dir, num_frames=8) == (2, 2)
+    assert count_videos(data_dir, num_frames=None) == (3, 3)
+
+    samples = list(video_generator(data_dir, num_frames=8, frame_dtype="uint8", img_size=16))
+    assert [int(label) for _, label in samples] == [0, 0, 1, 1]
+    assert all(frames.shape == (8, 16, 16, 3) and frames.dtype == np.uint8 for frames, _ in samples)
+    # Everything was probed once, by the first call
+    assert len(probed) == 6
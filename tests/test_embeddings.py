@@ -0,0 +1,73 @@
+"""Tests for the embedding ring and the cache cap of windowed prediction."""
+
+import numpy as np
+import pytest
+
+from conftest import write_video
+from src.embeddings import EmbeddingRing
+from src.net import build_model, split_model
+from src.predict import predict_windows
+
+NUM_FRAMES = 4
+IMG_SIZE = 32
+
+
+def _embeddings(first, n, dim=3):
+    """Embeddings whose every value is the frame number, so slots are easy to check."""
+    return np.repeat(np.arange(first, first + n, dtype=np.float32)[:, np.newaxis], dim, axis=1)
+
+
+def test_window_across_the_wrap_around():
+    ring = EmbeddingRing(5, feature_dim=3)
+    for first in range(0, 12, 3):
+        ring.append(_embeddings(first, 3))
+
+    assert (ring.start, ring.end) == (7, 12)
+    np.testing.assert_array_equal(ring.window(7, 5), _embeddings(7, 5))
+    out = np.empty((3, 3), dtype=np.float32)
+    assert ring.window(8, 3, out=out) is out
+    np.testing.assert_array_equal(out, _embeddings(8, 3))
+
+
+def test_evicted_and_future_frames_raise_index_error():
+    ring = EmbeddingRing(4, feature_dim=3)
+    ring.append(_embeddings(0, 3))
+    ring.append(_embeddings(3, 3))
+
+    assert ring.start == 2
+    with pytest.raises(IndexError):
+        ring.window(1, 2)      # frame 1 was evicted
+    with pytest.raises(IndexError):
+        ring.window(4, 3)      # frame 6 is not appended yet
+    np.testing.assert_array_equal(ring.window(2, 4), _embeddings(2, 4))
+
+
+def test_capacity_limits():
+    with pytest.raises(ValueError):
+        EmbeddingRing(0)
+    ring = EmbeddingRing(2, feature_dim=3)
+    with pytest.raises(ValueError):
+        ring.append(_embeddings(0, 3))
+    assert ring.nbytes == 2 * 3 * 4
+
+
+@pytest.fixture(scope="module")
+def model():
+    return build_model(num_frames=NUM_FRAMES, input_dtype="uint8", weights=None,
+                       backbone="mobilenet_v3_small", img_size=IMG_SIZE)
+
+
+def test_max_cache_mb_caps_the_ring(model, tmp_path):
+    video = write_video(str(tmp_path / "clip.avi"), num_frames=20, size=IMG_SIZE)
+    feature_dim = split_model(model)[0].outputs[0].shape[-1]
+    reference = predict_windows(video, model, window_s=0.4, stride_s=0.1)
+
+    # Room for one window plus a single new frame: encoded one frame at a time, same result
+    one_extra_mb = (NUM_FRAMES + 1) * feature_dim * 4 / (1024 * 1024)
+    capped = predict_windows(video, model, window_s=0.4, stride_s=0.1, max_cache_mb=one_extra_mb)
+    assert [(s, e) for s, e, _ in capped] == [(s, e) for s, e, _ in reference]
+    np.testing.assert_allclose([score for *_, score in capped], [score for *_, score in reference], atol=1e-5)
+
+    # Room for exactly one window leaves no space for new frames
+    with pytest.raises(ValueError):
+        predict_windows(video, model, window_s=0.4, max_cache_mb=NUM_FRAMES * feature_dim * 4 / (1024 * 1024))
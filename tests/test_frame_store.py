@@ -0,0 +1,107 @@
+"""Tests for the memory-mapped frame store."""
+
+import os
+
+import numpy as np
+import pytest
+
+from conftest import write_junk, write_video
+from src.frame_store import FrameStore
+from src.frames import extract_frames
+
+NUM_FRAMES = 8
+IMG_SIZE = 16
+
+
+def _bump_mtime(path):
+    # Make sure a rewrite is seen even on filesystems with coarse timestamps
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def _decoded(path):
+    return extract_frames(path, num_frames=NUM_FRAMES, img_size=IMG_SIZE, dtype="uint8")
+
+
+@pytest.fixture
+def videos(tmp_path):
+    return [write_video(str(tmp_path / "videos" / f"{i}.avi"), seed=i) for i in range(3)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FrameStore(str(tmp_path / "store"), num_frames=NUM_FRAMES, img_size=IMG_SIZE)
+
+
+def _reopen(store):
+    return FrameStore(os.path.dirname(store.data_path), num_frames=NUM_FRAMES, img_size=IMG_SIZE)
+
+
+def test_compile_matches_extract_frames(store, videos):
+    stats = store.compile([(path, 0) for path in videos])
+
+    assert stats == {'cached': 0, 'computed': 3, 'failed': 0}
+    assert os.path.getsize(store.data_path) == 3 * store.sample_bytes
+    store = _reopen(store)
+    assert len(store) == 3
+    for path in videos:
+        np.testing.assert_array_equal(store.get(path), _decoded(path))
+
+    assert store.compile([(path, 0) for path in videos]) == {'cached': 3, 'computed': 0, 'failed': 0}
+
+
+def test_changed_video_reuses_its_row(store, videos):
+    store.compile([(path, 0) for path in videos])
+    row = store.row(videos[1])
+
+    write_video(videos[1], seed=99)
+    _bump_mtime(videos[1])
+    assert store.get(videos[1]) is None
+
+    stats = store.compile([(path, 0) for path in videos])
+
+    assert stats == {'cached': 2, 'computed': 1, 'failed': 0}
+    store = _reopen(store)
+    assert store.row(videos[1]) == row
+    assert os.path.getsize(store.data_path) == 3 * store.sample_bytes
+    np.testing.assert_array_equal(store.get(videos[1]), _decoded(videos[1]))
+
+
+def test_failed_row_is_recycled(store, videos, tmp_path):
+    store.compile([(path, 0) for path in videos])
+    row = store.row(videos[1])
+
+    # The changed video keeps its row, fails to decode, and the row is freed
+    write_junk(videos[1])
+    _bump_mtime(videos[1])
+    assert store.compile([(path, 0) for path in videos]) == {'cached': 2, 'computed': 0, 'failed': 1}
+    assert store.row(videos[1]) is None
+    assert len(store) == 2
+
+    # The next new video takes the freed row instead of growing the file
+    new = write_video(str(tmp_path / "videos" / "new.avi"), seed=7)
+    store.compile([(new, 0)])
+
+    store = _reopen(store)
+    assert store.row(new) == row
+    assert os.path.getsize(store.data_path) == 3 * store.sample_bytes
+    np.testing.assert_array_equal(store.get(new), _decoded(new))
+    for path in (videos[0], videos[2]):
+        np.testing.assert_array_equal(store.get(path), _decoded(path))
+
+
+def test_trailing_failed_rows_are_trimmed(store, videos, tmp_path):
+    junk = [write_junk(str(tmp_path / "videos" / f"junk{i}.avi")) for i in range(2)]
+
+    stats = store.compile([(videos[0], 0), (junk[0], 0), (videos[1], 0), (junk[1], 0)])
+
+    assert stats == {'cached': 0, 'computed': 2, 'failed': 2}
+    store = _reopen(store)
+    # junk[0]'s row was recycled for videos[1]; junk[1] failed in the last
+    # row, which is cut off again, so the file shrinks from the 4 rows
+    # reserved up front to 2
+    assert store.nbytes == os.path.getsize(store.data_path) == 2 * store.sample_bytes
+    assert [store.row(path) for path in videos[:2]] == [0, 1]
+    assert store.row(junk[0]) is None and store.row(junk[1]) is None
+    for path in videos[:2]:
+        np.testing.assert_array_equal(store.get(path), _decoded(path))
@@ -0,0 +1,88 @@
+"""Tests for frame sampling in extract_frames."""
+
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from src.frames import FrameConverter, SEEK_MIN_STRIDE, _sample_indices, extract_frames
+
+IMG_SIZE = 16
+
+
+def _write_ramp(path, num_frames):
+    """Clip whose frame i has brightness 3 * i, so a wrong frame is easy to spot."""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25.0, (48, 32))
+    rng = np.random.default_rng(0)
+    for i in range(num_frames):
+        noise = rng.integers(0, 4, size=(32, 48, 3))
+        writer.write((3 * i + noise).astype(np.uint8))
+    writer.release()
+    return path
+
+
+def _reference(path, num_frames, dtype):
+    """Read every frame with cap.read() and keep the sampled ones."""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    convert = FrameConverter(img_size=IMG_SIZE, dtype=dtype)
+    out = np.empty((num_frames, IMG_SIZE, IMG_SIZE, 3), dtype=dtype)
+    for i, index in enumerate(_sample_indices(len(frames), num_frames)):
+        convert(frames[index], out[i])
+    return out
+
+
+@pytest.fixture
+def clip(tmp_path):
+    return _write_ramp(str(tmp_path / "ramp.avi"), 64)
+
+
+@pytest.mark.parametrize("sampling", ["grab", "seek", "auto"])
+@pytest.mark.parametrize("num_frames", [4, 10, 64])
+@pytest.mark.parametrize("dtype", ["uint8", "float32"])
+def test_sampling_matches_reference(clip, sampling, num_frames, dtype):
+    frames = extract_frames(clip, num_frames=num_frames, img_size=IMG_SIZE, sampling=sampling, dtype=dtype)
+
+    assert frames.shape == (num_frames, IMG_SIZE, IMG_SIZE, 3) and frames.dtype == np.dtype(dtype)
+    np.testing.assert_array_equal(frames, _reference(clip, num_frames, dtype))
+
+
+def test_auto_seeks_only_for_sparse_sampling(clip, monkeypatch):
+    import src.frames as frames_module
+
+    probed = []
+    original = frames_module._supports_accurate_seek
+    monkeypatch.setattr(frames_module, "_supports_accurate_seek",
+                        lambda cap, total: probed.append(total) or original(cap, total))
+
+    extract_frames(clip, num_frames=64 // SEEK_MIN_STRIDE + 1, img_size=IMG_SIZE, sampling="auto")
+    assert probed == []
+    extract_frames(clip, num_frames=64 // SEEK_MIN_STRIDE, img_size=IMG_SIZE, sampling="auto")
+    assert probed == [64]
+
+
+def test_sampled_frames_come_from_the_right_positions(clip):
+    frames = extract_frames(clip, num_frames=4, img_size=IMG_SIZE, sampling="seek", dtype="uint8")
+
+    # Frame i has brightness about 3 * i (+ up to 3 of noise and some JPEG error)
+    expected = 3 * _sample_indices(64, 4) + 1.5
+    np.testing.assert_allclose(frames.reshape(4, -1).mean(axis=1), expected, atol=2.0)
+
+
+@pytest.mark.parametrize("sampling", ["grab", "seek", "auto"])
+def test_too_short_or_unreadable_video_is_none(clip, tmp_path, sampling):
+    assert extract_frames(clip, num_frames=65, img_size=IMG_SIZE, sampling=sampling) is None
+    missing = os.path.join(str(tmp_path), "missing.avi")
+    assert extract_frames(missing, num_frames=4, img_size=IMG_SIZE, sampling=sampling) is None
+
+
+def test_unknown_sampling_is_rejected(clip):
+    with pytest.raises(ValueError):
+        extract_frames(clip, num_frames=4, img_size=IMG_SIZE, sampling="skip")
@@ -0,0 +1,106 @@
+"""Tests for the persisted train/validation split and the per-epoch file order."""
+
+import os
+from collections import Counter
+
+import numpy as np
+
+from conftest import write_junk, write_video
+from src.load_data import interleave_classes, split_video_files
+
+
+def _assignments(train, val):
+    return {**{path: "train" for path, _ in train}, **{path: "val" for path, _ in val}}
+
+
+def _val_per_class(val):
+    return Counter(label for _, label in val)
+
+
+def test_split_is_stratified_and_persisted(make_dataset):
+    data_dir = make_dataset(10)
+
+    train, val = split_video_files(data_dir, validation_split=0.2, num_frames=None)
+
+    assert _val_per_class(val) == {0: 2, 1: 2}
+    assert len(train) == 16
+    assert os.path.isfile(os.path.join(data_dir, "split.json"))
+    assert split_video_files(data_dir, validation_split=0.2, num_frames=None) == (train, val)
+
+
+def test_split_keeps_assignments_when_files_are_added(make_dataset):
+    data_dir = make_dataset(10)
+    before = _assignments(*split_video_files(data_dir, validation_split=0.2, num_frames=None))
+
+    for class_name in ("nonviolent", "violent"):
+        for i in range(10, 15):
+            write_video(os.path.join(data_dir, class_name, f"{i:02d}.avi"), seed=i)
+    train, val = split_video_files(data_dir, validation_split=0.2, num_frames=None)
+
+    after = _assignments(train, val)
+    assert {path: after[path] for path in before} == before
+    # 15 per class: 3 in validation, the extra slot taken by a new file
+    assert _val_per_class(val) == {0: 3, 1: 3}
+
+
+def test_split_refills_quota_of_removed_files(make_dataset):
+    data_dir = make_dataset(10)
+    train, val = split_video_files(data_dir, validation_split=0.2, num_frames=None)
+    before = _assignments(train, val)
+
+    removed = [path for path, label in val if label == 1]
+    for path in removed:
+        os.remove(path)
+    train, val = split_video_files(data_dir, validation_split=0.2, num_frames=None)
+    assert _val_per_class(val) == {0: 2}
+    assert _assignments(train, val) == {path: subset for path, subset in before.items()
+                                          if path not in removed}
+
+    write_video(os.path.join(data_dir, "violent", "10.avi"), seed=10)
+    write_video(os.path.join(data_dir, "violent", "11.avi"), seed=11)
+    train, val = split_video_files(data_dir, validation_split=0.2, num_frames=None)
+
+    after = _assignments(train, val)
+    assert all(after[path] == subset for path, subset in before.items() if path not in removed)
+    # 10 violent files again, so both new files fill the two freed validation slots
+    assert _val_per_class(val) == {0: 2, 1: 2}
+    assert {path for path, label in val if label == 1} == \
+        {os.path.join(data_dir, "violent", name) for name in ("10.avi", "11.avi")}
+
+
+def test_split_leaves_out_unusable_videos(make_dataset):
+    data_dir = make_dataset(5)
+    junk = write_junk(os.path.join(data_dir, "violent", "05.avi"))
+    short = write_video(os.path.join(data_dir, "violent", "06.avi"), num_frames=3)
+
+    train, val = split_video_files(data_dir, validation_split=0.2, num_frames=8)
+
+    listed = {path for path, _ in train + val}
+    assert junk not in listed and short not in listed
+    assert _val_per_class(val) == {0: 1, 1: 1}
+    assert len(train) == 8
+
+
+def test_interleave_classes_is_a_permutation():
+    files = [(f"a{i}", 0) for i in range(30)] + [(f"b{i}", 1) for i in range(10)]
+    rng = np.random.default_rng(0)
+
+    first = interleave_classes(files, rng)
+    second = interleave_classes(files, rng)
+
+    assert sorted(first) == sorted(files)
+    assert sorted(second) == sorted(files)
+    assert first != second
+
+
+def test_interleave_classes_spreads_classes_evenly():
+    files = [(f"a{i}", 0) for i in range(30)] + [(f"b{i}", 1) for i in range(10)]
+    order = interleave_classes(files, np.random.default_rng(1))
+
+    # Each class file sits in its own 1/n slot of the epoch, so every block of
+    # 40/10 = 4 consecutive files holds about one file of the minority class
+    minority = np.array([label for _, label in order]) == 1
+    for start in range(0, len(order), 8):
+        assert 1 <= minority[start:start + 8].sum() <= 3
+    positions = np.flatnonzero(minority)
+    assert np.diff(positions).max() <= 8
@@ -0,0 +1,86 @@
+"""Tests for the multi-stream multiplexer, replaying synthetic video files as streams."""
+
+import cv2
+import numpy as np
+import pytest
+
+import src.multiplex as multiplex
+from conftest import write_video
+from src.frames import FrameConverter
+from src.net import build_model
+from src.multiplex import StreamMultiplexer
+
+NUM_FRAMES = 4
+IMG_SIZE = 32
+FPS = 10.0  # conftest.write_video frame rate
+VIDEO_FRAMES = 12
+
+
+@pytest.fixture(scope="module")
+def model():
+    return build_model(num_frames=NUM_FRAMES, input_dtype="uint8", weights=None,
+                       backbone="mobilenet_v3_small", img_size=IMG_SIZE)
+
+
+@pytest.fixture
+def sources(tmp_path):
+    return [write_video(str(tmp_path / f"cam{i}.avi"), num_frames=VIDEO_FRAMES, value=60 * (i + 1), seed=i)
+            for i in range(3)]
+
+
+def _decoded(path):
+    cap = cv2.VideoCapture(path)
+    convert = FrameConverter(img_size=IMG_SIZE, dtype="uint8")
+    frames = []
+    while True:
+        ret, raw = cap.read()
+        if not ret:
+            break
+        frames.append(convert(raw, np.empty((IMG_SIZE, IMG_SIZE, 3), dtype=np.uint8)))
+    cap.release()
+    return np.stack(frames)
+
+
+def test_replayed_streams_match_stateless_model(model, sources):
+    # window_s = NUM_FRAMES / FPS samples every source frame; interval_s = 0
+    # scores a stream on every tick that brought it new frames
+    mux = StreamMultiplexer(model, sources, window_s=NUM_FRAMES / FPS, interval_s=0.0,
+                            max_batch_size=4, frame_batch_size=8, buffer_size=VIDEO_FRAMES)
+    mux.start()
+    try:
+        results = list(mux.run())
+    finally:
+        mux.stop()
+
+    assert {r['stream'] for r in results} == {0, 1, 2}
+    for stats in mux.stats():
+        assert stats['frames_read'] == stats['frames_sampled'] == VIDEO_FRAMES
+        assert stats['dropped'] == 0
+
+    for index, path in enumerate(sources):
+        frames = _decoded(path)
+        scored = [r for r in results if r['stream'] == index]
+        # Every stream is scored up to its last frame
+        assert round(scored[-1]['stream_time_s'] * FPS) == VIDEO_FRAMES - 1
+        for r in scored:
+            end = round(r['stream_time_s'] * FPS) + 1
+            assert end >= NUM_FRAMES
+            expected = model.predict(frames[np.newaxis, end - NUM_FRAMES:end], verbose=0)[0, 0]
+            assert r['score'] == pytest.approx(float(expected), abs=1e-4)
+
+
+def test_failed_source_releases_opened_readers(model, sources, tmp_path, monkeypatch):
+    readers = []
+
+    class RecordingReader(multiplex.LiveReader):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            readers.append(self)
+
+    monkeypatch.setattr(multiplex, "LiveReader", RecordingReader)
+
+    with pytest.raises(RuntimeError):
+        StreamMultiplexer(model, sources[:2] + [str(tmp_path / "missing.avi")], window_s=NUM_FRAMES / FPS)
+
+    assert len(readers) == 2
+    assert not any(reader._cap.isOpened() for reader in readers)
@@ -0,0 +1,80 @@
+"""Tests for sliding-window localization: the window timeline and segment merging."""
+
+import cv2
+import numpy as np
+import pytest
+
+from conftest import write_junk, write_video
+from src.frames import FrameConverter
+from src.net import build_model
+from src.predict import THRESHOLD, merge_segments, predict_windows
+
+NUM_FRAMES = 4
+IMG_SIZE = 32
+FPS = 10.0  # conftest.write_video frame rate
+
+
+@pytest.fixture(scope="module")
+def model():
+    return build_model(num_frames=NUM_FRAMES, input_dtype="uint8", weights=None,
+                       backbone="mobilenet_v3_small", img_size=IMG_SIZE)
+
+
+@pytest.fixture
+def video(tmp_path):
+    return write_video(str(tmp_path / "long.avi"), num_frames=40, size=IMG_SIZE)
+
+
+def _decoded(path):
+    cap = cv2.VideoCapture(path)
+    convert = FrameConverter(img_size=IMG_SIZE, dtype="uint8")
+    frames = []
+    while True:
+        ret, raw = cap.read()
+        if not ret:
+            break
+        frames.append(convert(raw, np.empty((IMG_SIZE, IMG_SIZE, 3), dtype=np.uint8)))
+    cap.release()
+    return np.stack(frames)
+
+
+@pytest.mark.parametrize("window_s, stride_s", [(0.4, 0.2), (0.8, 0.4), (0.8, 0.8)])
+def test_timeline_matches_stateless_windows(model, video, window_s, stride_s):
+    timeline = predict_windows(video, model, window_s=window_s, stride_s=stride_s,
+                               batch_size=3, frame_batch_size=5)
+
+    frames = _decoded(video)
+    sample_dt = window_s / NUM_FRAMES
+    stride = round(stride_s / sample_dt)
+    num_samples = int(len(frames) / FPS / sample_dt)
+    firsts = list(range(0, num_samples - NUM_FRAMES + 1, stride))
+    assert [start for start, _, _ in timeline] == pytest.approx([first * sample_dt for first in firsts])
+    assert [end - start for start, end, _ in timeline] == pytest.approx([window_s] * len(firsts))
+
+    # Window i holds samples first .. first + NUM_FRAMES - 1, taken from source frame round(t * fps)
+    sampled = frames[[round(i * sample_dt * FPS) for i in range(num_samples)]]
+    clips = np.stack([sampled[first:first + NUM_FRAMES] for first in firsts])
+    expected = model.predict(clips, verbose=0)[:, 0]
+    np.testing.assert_allclose([score for _, _, score in timeline], expected, atol=1e-4)
+
+
+def test_short_or_unreadable_video_gives_empty_timeline(model, tmp_path):
+    short = write_video(str(tmp_path / "short.avi"), num_frames=3, size=IMG_SIZE)
+    assert predict_windows(short, model, window_s=0.4, stride_s=0.1) == []
+    assert predict_windows(write_junk(str(tmp_path / "junk.avi")), model, window_s=0.4) == []
+
+
+def test_merge_segments_joins_overlapping_violent_windows():
+    timeline = [(0.0, 5.0, 0.9), (1.0, 6.0, 0.7), (2.0, 7.0, 0.2),
+                (6.0, 11.0, 0.6), (8.0, 13.0, 0.4), (14.0, 19.0, 0.8)]
+
+    assert merge_segments(timeline) == [(0.0, 11.0, 0.9), (14.0, 19.0, 0.8)]
+
+
+def test_merge_segments_touching_windows_and_threshold():
+    timeline = [(0.0, 1.0, 0.6), (1.0, 2.0, 0.7), (2.5, 3.5, THRESHOLD)]
+
+    # Touching windows merge; a score equal to the threshold is not violent
+    assert merge_segments(timeline) == [(0.0, 2.0, 0.7)]
+    assert merge_segments(timeline, threshold=0.65) == [(1.0, 2.0, 0.7)]
+    assert merge_segments([]) == []
@@ -0,0 +1,146 @@
+"""Tests for the micro-batching inference server."""
+
+import json
+import threading
+import http.client
+
+import numpy as np
+import pytest
+
+from conftest import write_video
+from src.serve import MAX_UPLOAD_MB, MicroBatcher, create_server
+
+NUM_FRAMES = 4
+IMG_SIZE = 16
+
+
+class RecordingBackend:
+    """Inference backend that scores a clip by its mean pixel value and records batch sizes."""
+
+    input_shape = (NUM_FRAMES, IMG_SIZE, IMG_SIZE, 3)
+    input_dtype = "uint8"
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, X):
+        self.batch_sizes.append(len(X))
+        return X.reshape(len(X), -1).mean(axis=1, keepdims=True).astype(np.float32) / 255
+
+
+def _frames(value):
+    return np.full(RecordingBackend.input_shape, value, dtype=np.uint8)
+
+
+def test_batcher_coalesces_queued_requests():
+    backend = RecordingBackend()
+    batcher = MicroBatcher(backend, max_batch_size=4, max_delay_ms=200.0)
+    try:
+        futures = [batcher.submit(_frames(10 * i)) for i in range(6)]
+        results = [future.result(timeout=10) for future in futures]
+    finally:
+        batcher.close()
+
+    # Warm-up call, then one full batch and the remaining two after the delay
+    assert backend.batch_sizes == [1, 4, 2]
+    assert [r['batch_size'] for r in results] == [4, 4, 4, 4, 2, 2]
+    assert [r['confidence'] for r in results] == pytest.approx([10 * i / 255 for i in range(6)])
+    assert batcher.stats == {'requests': 6, 'batches': 2, 'errors': 0}
+
+
+def test_batcher_runs_a_lone_request_after_the_delay():
+    backend = RecordingBackend()
+    batcher = MicroBatcher(backend, max_batch_size=8, max_delay_ms=20.0)
+    try:
+        result = batcher.submit(_frames(255)).result(timeout=10)
+    finally:
+        batcher.close()
+
+    assert result['batch_size'] == 1
+    assert result['confidence'] == pytest.approx(1.0)
+    assert result['queue_ms'] >= 15.0
+
+
+def test_batcher_reports_inference_errors():
+    class FailingBackend(RecordingBackend):
+        def predict(self, X):
+            if self.batch_sizes:
+                raise RuntimeError("boom")
+            return super().predict(X)
+
+    batcher = MicroBatcher(FailingBackend(), max_batch_size=2, max_delay_ms=1.0)
+    try:
+        with pytest.raises(RuntimeError):
+            batcher.submit(_frames(0)).result(timeout=10)
+    finally:
+        batcher.close()
+    assert batcher.stats['errors'] == 1
+
+
+@pytest.fixture
+def server():
+    server = create_server(RecordingBackend(), port=0, max_batch_size=2, max_delay_ms=1.0, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.batcher.close()
+    server.server_close()
+
+
+def _post(server, body=b"", headers=None, path="/predict"):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=30)
+    try:
+        connection.putrequest("POST", path)
+        for name, value in (headers or {}).items():
+            connection.putheader(name, value)
+        if "Content-Length" not in (headers or {}):
+            connection.putheader("Content-Length", str(len(body)))
+        connection.endheaders(body)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def _post_json(server, payload):
+    return _post(server, json.dumps(payload).encode(), {"Content-Type": "application/json"})
+
+
+def test_predict_path(server, tmp_path):
+    video = write_video(str(tmp_path / "clip.avi"), num_frames=8, value=200)
+
+    status, response = _post_json(server, {"path": video})
+
+    assert status == 200
+    assert response['label'] == "VIOLENT"
+    assert response['batch_size'] == 1
+    assert set(response['timings_ms']) == {'decode', 'queue', 'inference', 'total'}
+
+
+@pytest.mark.parametrize("body", [b"not json", b'{"video": "x.mp4"}', b'["x.mp4"]',
+                                  b'{"path": 0}', b'{"path": ["x.mp4"]}', b'{"path": {"a": 1}}'])
+def test_bad_json_body_is_400(server, body):
+    status, response = _post(server, body, {"Content-Type": "application/json"})
+    assert status == 400
+    assert "path" in response['error']
+
+
+def test_bad_content_length_is_400(server):
+    assert _post(server, headers={"Content-Length": "abc"})[0] == 400
+    assert _post(server, headers={"Content-Length": "0"})[0] == 400
+
+
+def test_missing_video_and_unknown_endpoint_are_404(server, tmp_path):
+    assert _post_json(server, {"path": str(tmp_path / "missing.mp4")})[0] == 404
+    assert _post(server, b"{}", path="/nope")[0] == 404
+
+
+def test_oversized_upload_is_413(server):
+    status, _ = _post(server, headers={"Content-Length": str(MAX_UPLOAD_MB * 1024 * 1024 + 1)})
+    assert status == 413
+
+
+def test_undecodable_upload_is_422(server):
+    status, _ = _post(server, b"not a video", {"Content-Type": "video/mp4", "X-Filename": "clip.mp4"})
+    assert status == 422
@@ -0,0 +1,65 @@
+"""Tests for the stateful streaming scorer."""
+
+import numpy as np
+import pytest
+
+from src.net import build_model
+from src.streaming import StreamingScorer
+
+NUM_FRAMES = 6
+IMG_SIZE = 32
+
+
+@pytest.fixture(scope="module")
+def model():
+    return build_model(num_frames=NUM_FRAMES, input_dtype="uint8", weights=None,
+                       backbone="mobilenet_v3_small", img_size=IMG_SIZE)
+
+
+@pytest.fixture(scope="module")
+def frames():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=(3 * NUM_FRAMES, IMG_SIZE, IMG_SIZE, 3), dtype=np.uint8)
+
+
+def _stateless(model, clip):
+    return float(model.predict(clip[np.newaxis], verbose=0)[0, 0])
+
+
+def test_score_after_num_frames_matches_stateless_model(model, frames):
+    scorer = StreamingScorer(model)
+
+    scores = [scorer.update(frame) for frame in frames[:NUM_FRAMES]]
+
+    assert scores[-1] == pytest.approx(_stateless(model, frames[:NUM_FRAMES]), abs=1e-5)
+
+
+def test_every_score_matches_with_one_phase_per_frame(model, frames):
+    scorer = StreamingScorer(model, phases=NUM_FRAMES)
+
+    scores = [scorer.update(frame) for frame in frames]
+
+    # Once warmed up, the reported state has always seen the last num_frames frames
+    for end in range(NUM_FRAMES, len(frames) + 1):
+        assert scores[end - 1] == pytest.approx(_stateless(model, frames[end - NUM_FRAMES:end]), abs=1e-5)
+
+
+@pytest.mark.parametrize("phases", [1, 2, 3])
+def test_reported_state_warm_up(model, phases):
+    scorer = StreamingScorer(model, phases=phases)
+
+    seen = [scorer._steps_in_phase(n).max() for n in range(NUM_FRAMES, 4 * NUM_FRAMES)]
+
+    assert min(seen) == NUM_FRAMES - NUM_FRAMES // phases + 1
+    assert max(seen) == NUM_FRAMES
+
+
+def test_emit_every_and_reset(model, frames):
+    scorer = StreamingScorer(model, emit_every=3)
+
+    scores = [scorer.update(frame) for frame in frames[:NUM_FRAMES]]
+    assert [score is not None for score in scores] == [False, False, True, False, False, True]
+
+    scorer.reset()
+    again = [scorer.update(frame) for frame in frames[:NUM_FRAMES]]
+    assert again[-1] == pytest.approx(scores[-1], abs=1e-6)